@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for the shared text-cleaning engine.
+
+Cleans a synthetic corpus (1M strings by default) with the old per-collector
+two-pass clean_text and with collectors.text_cleaning.clean_many, and prints
+strings/sec for both. Pass --min-rate to fail (exit 1) when clean_many drops
+below a known-good throughput.
+
+Run from the sent_analysis directory:
+    python -m benchmarks.bench_cleaning --strings 1000000 --min-rate 500000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from collectors.text_cleaning import clean_many
+
+ASCII_TOKENS = [
+    'Qatar', 'UAE', 'Dubai', 'world', 'cup', 'great', 'awful', 'really', "don't",
+    'hello!!', 'ok.', 'yes,', 'why?', '#WorldCup', '@someone', '&amp;', '(lol)',
+    'https://t.co/AbC123?x=1', 'www.example.com/path', 'http://news.example.org',
+    '\n', '--', '100%', '$5',
+]
+UNICODE_TOKENS = ['café', 'مرحبا', '😀', '🔥🔥', '—']
+
+def make_corpus(n, seed=7, unicode_share=0.15):
+    """Build n synthetic post/comment strings, about unicode_share of them non-ASCII"""
+    rng = random.Random(seed)
+    choice = rng.choice
+    corpus = []
+    for _ in range(n):
+        words = [choice(ASCII_TOKENS) for _ in range(rng.randint(4, 40))]
+        if rng.random() < unicode_share:
+            words[rng.randrange(len(words))] = choice(UNICODE_TOKENS)
+        corpus.append(' '.join(words))
+    return corpus
+
+def legacy_clean_text(text):
+    """The two-pass clean_text each collector used to carry its own copy of"""
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'[^\w\s.,!?]', '', text)
+    text = ' '.join(text.split())
+    return text.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--strings', type=int, default=1_000_000)
+    parser.add_argument('--min-rate', type=float, default=None,
+                        help="Minimum acceptable clean_many strings/sec")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.strings)
+
+    start = time.perf_counter()
+    expected = [legacy_clean_text(text) for text in corpus]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleaned = clean_many(corpus)
+    batch_s = time.perf_counter() - start
+
+    if cleaned != expected:
+        print("clean_many output differs from the legacy clean_text")
+        sys.exit(1)
+
+    legacy_rate = args.strings / legacy_s
+    batch_rate = args.strings / batch_s
+    print(f"Strings: {args.strings:,}")
+    print(f"Legacy clean_text: {legacy_rate:,.0f} strings/sec ({legacy_s:.2f}s)")
+    print(f"clean_many:        {batch_rate:,.0f} strings/sec ({batch_s:.2f}s)")
+    print(f"Speedup: {batch_rate / legacy_rate:.2f}x")
+
+    if args.min_rate is not None and batch_rate < args.min_rate:
+        print(f"REGRESSION: clean_many below {args.min_rate:,.0f} strings/sec")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+End-to-end pipeline benchmark on a synthetic Reddit/Bluesky/YouTube corpus.
+
+For each corpus size, times every stage a collection run goes through:
+cleaning (clean_many), scoring (SentimentProcessor.process_data),
+aggregation (SentimentCube plus the report/chart aggregates) and saving
+(save_results to CSV). Reports records/sec and peak resident memory per
+stage, writes everything to a JSON file, and with --baseline compares the
+run against an earlier JSON, exiting 1 if any stage got slower than
+--tolerance allows.
+
+Run from the sent_analysis directory:
+    python -m benchmarks.bench_pipeline --sizes 1000,100000,1000000 --output bench.json
+    python -m benchmarks.bench_pipeline --sizes 1000,100000 --baseline bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.corpus import make_records
+from collectors.text_cleaning import clean_many
+from processor.charts import chart_aggregates
+from processor.cube import SentimentCube
+from processor.sentiment_analyzer import SentimentProcessor
+
+STAGES = ['clean', 'score', 'aggregate', 'save']
+
+# Corpora this small finish each stage in milliseconds, so they are run a few times and the fastest run kept
+SMALL_CORPUS = 10_000
+SMALL_CORPUS_REPEATS = 5
+
+# Stages faster than this in the baseline are too noisy to flag as regressions
+MIN_COMPARE_SECONDS = 0.05
+
+class PeakMemory:
+    """
+    Peak resident set size while a block runs, sampled from /proc/self/statm.
+
+    Where /proc isn't available it falls back to ru_maxrss, which is the
+    process-wide high-water mark rather than the block's own peak.
+    """
+
+    STATM = '/proc/self/statm'
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_mb = self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def current_mb(cls):
+        try:
+            with open(cls.STATM) as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+        except (OSError, ValueError):
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux reports kilobytes, macOS bytes
+            return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 2 ** 10
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self.current_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = self.current_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self.current_mb())
+        return False
+
+def timed(stage, n, func, results, quiet=False):
+    """Run func() as one stage, record its timing and memory under results[stage], and return its value"""
+    gc.collect()
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+    results[stage] = {
+        'seconds': round(elapsed, 4),
+        'records_per_sec': round(n / elapsed, 1) if elapsed > 0 else None,
+        'peak_rss_mb': round(memory.peak_mb, 1),
+        'rss_growth_mb': round(memory.peak_mb - memory.start_mb, 1),
+    }
+    if not quiet:
+        print_stage(stage, results[stage])
+    return value
+
+def print_stage(stage, measured):
+    print(f"  {stage:<10} {measured['seconds']:9.3f}s  {measured['records_per_sec'] or 0:14,.0f} records/sec  "
+          f"peak {measured['peak_rss_mb']:8.1f} MB (+{measured['rss_growth_mb']:.1f})")
+
+def run_size(n, processor, seed, workdir):
+    """Run every stage on an n-record corpus, best of several runs for small corpora; returns {stage: measurements}"""
+    print(f"\n{n:,} records")
+    repeats = SMALL_CORPUS_REPEATS if n <= SMALL_CORPUS else 1
+    runs = [run_stages(n, processor, seed, workdir, quiet=repeats > 1) for _ in range(repeats)]
+    best = {stage: min((run[stage] for run in runs), key=lambda measured: measured['seconds']) for stage in STAGES}
+    if repeats > 1:
+        print(f"  (best of {repeats} runs)")
+        for stage in STAGES:
+            print_stage(stage, best[stage])
+    return best
+
+def run_stages(n, processor, seed, workdir, quiet=False):
+    started = time.perf_counter()
+    records = make_records(n, seed=seed, raw=True)
+    if not quiet:
+        print(f"  (generated in {time.perf_counter() - started:.1f}s)")
+
+    results = {}
+
+    def clean():
+        for record, text in zip(records, clean_many([record['text'] for record in records])):
+            record['text'] = text
+    timed('clean', n, clean, results, quiet)
+
+    df = timed('score', n, lambda: processor.process_data(records), results, quiet)
+    del records
+
+    def aggregate():
+        cube = SentimentCube.from_frame(df)
+        return chart_aggregates(cube)
+    timed('aggregate', n, aggregate, results, quiet)
+
+    filename = os.path.join(workdir, f"bench_{n}.csv")
+    timed('save', n, lambda: processor.save_results(df, filename), results, quiet)
+    os.remove(filename)
+    del df
+    gc.collect()
+    return results
+
+def compare(current, baseline, tolerance):
+    """Print records/sec against a baseline run; returns the (size, stage) pairs that regressed"""
+    regressions = []
+    print(f"\n{'records':>10} {'stage':<10} {'baseline/s':>14} {'current/s':>14} {'change':>8}")
+    for size, stages in current['results'].items():
+        for stage, measured in stages.items():
+            before = baseline.get('results', {}).get(size, {}).get(stage)
+            if not before or not before.get('records_per_sec') or not measured.get('records_per_sec'):
+                continue
+            change = measured['records_per_sec'] / before['records_per_sec'] - 1
+            flag = ''
+            if before['seconds'] < MIN_COMPARE_SECONDS:
+                flag = '  (too short to judge)'
+            elif change < -tolerance:
+                flag = '  REGRESSION'
+                regressions.append((size, stage))
+            print(f"{int(size):>10,} {stage:<10} {before['records_per_sec']:>14,.0f} "
+                  f"{measured['records_per_sec']:>14,.0f} {change:>+8.1%}{flag}")
+    return regressions
+
+def environment(args):
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'analyzers': args.analyzers.split(','),
+        'workers': args.workers,
+        'seed': args.seed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000,1000000',
+                        help="Comma-separated corpus sizes (default 1000,100000,1000000)")
+    parser.add_argument('--analyzers', default='vader', help="Analyzer backends to score with (default vader)")
+    parser.add_argument('--workers', type=int, default=1, help="Scoring processes (default 1)")
+    parser.add_argument('--seed', type=int, default=42, help="Corpus seed; the same seed gives the same records")
+    parser.add_argument('--output', default='bench_pipeline.json', help="Where to write the results JSON")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Allowed records/sec drop vs the baseline before failing (default 0.15 = 15%%)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    processor = SentimentProcessor(analyzers=args.analyzers.split(','), workers=args.workers)
+    run = {'environment': environment(args), 'results': {}}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for n in sizes:
+                run['results'][str(n)] = run_size(n, processor, args.seed, workdir)
+    finally:
+        processor.close()
+
+    with open(args.output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(run, baseline, args.tolerance)
+        if regressions:
+            print(f"REGRESSION: {len(regressions)} stage(s) more than {args.tolerance:.0%} slower than {args.baseline}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark for SentimentProcessor.process_data.
+
+Compares the old row-wise `apply(pd.Series)` scoring path with the columnar
+`score_batch` path and prints rows/sec for both.
+
+Run from the sent_analysis directory:
+    python -m benchmarks.bench_scoring --rows 20000 [--workers 8]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.corpus import make_records
+from processor.sentiment_analyzer import SentimentProcessor
+
+def legacy_process_data(processor, data):
+    """The row-wise scoring path process_data used before score_batch"""
+    df = pd.DataFrame(data)
+    sentiment_df = df['text'].apply(lambda text: pd.Series(processor.analyze_sentiment(text)))
+    df = pd.concat([df, sentiment_df], axis=1)
+    df['sentiment_category'] = df['vader_compound'].apply(
+        lambda score: 'Positive' if score >= 0.05 else ('Negative' if score <= -0.05 else 'Neutral')
+    )
+    return df
+
+def time_rows_per_sec(fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n / elapsed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=1, help="Also time the process-pool path with N workers")
+    args = parser.parse_args()
+
+    processor = SentimentProcessor()
+    data = make_records(args.rows)
+
+    before, before_s = time_rows_per_sec(lambda: legacy_process_data(processor, data), args.rows)
+    after, after_s = time_rows_per_sec(lambda: processor.process_data(data), args.rows)
+
+    print(f"Rows: {args.rows}")
+    print(f"Before (apply/pd.Series): {before:,.0f} rows/sec ({before_s:.2f}s)")
+    print(f"After (score_batch):      {after:,.0f} rows/sec ({after_s:.2f}s)")
+    print(f"Speedup: {after / before:.2f}x")
+
+    if args.workers > 1:
+        parallel_processor = SentimentProcessor(workers=args.workers)
+        parallel, parallel_s = time_rows_per_sec(lambda: parallel_processor.process_data(data), args.rows)
+        parallel_processor.close()
+        print(f"Parallel ({args.workers} workers):  {parallel:,.0f} rows/sec ({parallel_s:.2f}s)")
+        print(f"Speedup vs before: {parallel / before:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Deterministic synthetic corpus of collector records for the benchmarks.
+
+make_records() builds Reddit, Bluesky and YouTube record dicts shaped exactly
+like the collectors' output: the same keys, the same created_at types (naive
+local for Reddit, UTC-aware for Bluesky and YouTube) and the same
+per-platform source_specific_metrics. The same n and seed always give the
+same records.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+from collectors.text_cleaning import clean_many
+
+# Share of records per platform, roughly what a default main.py run collects
+PLATFORM_MIX = [('Reddit', 0.4), ('Bluesky', 0.35), ('YouTube', 0.25)]
+
+QUERIES = ['UAE', 'Qatar']
+
+# RedditCollector's default subreddits; copied rather than imported so the benchmarks don't load praw
+SUBREDDITS = [
+    'worldnews', 'news', 'travel', 'soccer', 'football',
+    'politics', 'geopolitics', 'UAE', 'Qatar', 'MiddleEast',
+    'dubai', 'AskReddit', 'todayilearned'
+]
+
+# Sentiment-bearing and neutral words, so every analyzer has something to score
+WORDS = [
+    'great', 'terrible', 'amazing', 'awful', 'love', 'hate', 'visit', 'city',
+    'world', 'cup', 'stadium', 'hotel', 'flight', 'news', 'policy', 'people',
+    'good', 'bad', 'not', 'really', 'very', 'expensive', 'beautiful', 'hot',
+    'the', 'a', 'is', 'was', 'and', 'but', 'in', 'on', 'for', 'with', 'Dubai', 'Doha',
+]
+
+# Noise the collectors' cleaning has to strip: links, mentions, markup, emoji and non-Latin text
+NOISE = [
+    'https://t.co/AbC123?x=1', 'www.example.com/path', 'http://news.example.org',
+    '@someone', '#WorldCup', '&amp;', '(lol)', '!!', '...', '100%', '$5',
+    'café', 'مرحبا', '😀', '🔥🔥', '—',
+]
+
+# (min words, max words) per platform: long Reddit posts, short Bluesky posts, mid-length comments
+TEXT_WORDS = {
+    'Reddit': (12, 120),
+    'Bluesky': (4, 45),
+    'YouTube': (3, 60),
+}
+
+REDDIT_SELFTEXT_SHARE = 0.5
+
+# Records are spread over this many days before START
+SPAN_DAYS = 30
+START = datetime(2025, 7, 1, tzinfo=timezone.utc)
+
+def _text(rng, platform, noise_share=0.08):
+    low, high = TEXT_WORDS[platform]
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    # About noise_share of the words, without drawing a random number per word
+    for _ in range(int(len(words) * noise_share + rng.random())):
+        words[rng.randrange(len(words))] = rng.choice(NOISE)
+    return ' '.join(words)
+
+def _reddit(rng, i, query, created_at):
+    title = _text(rng, 'Reddit')[:120]
+    # Link and image posts have no selftext
+    selftext = _text(rng, 'Reddit') if rng.random() < REDDIT_SELFTEXT_SHARE else ''
+    return {
+        'source': 'Reddit',
+        'id': f"r{i:07x}",
+        'text': f"{title} {selftext}".strip(),
+        'author': f"redditor_{rng.randrange(50_000)}" if rng.random() > 0.03 else '[deleted]',
+        # praw's created_utc goes through datetime.fromtimestamp(), i.e. naive local time
+        'created_at': datetime.fromtimestamp(created_at.timestamp()),
+        'source_specific_metrics': {
+            'score': int(rng.paretovariate(1.2)) - 1,
+            'upvote_ratio': round(rng.uniform(0.5, 1.0), 2),
+            'num_comments': int(rng.paretovariate(1.1)) - 1,
+            'subreddit': rng.choice(SUBREDDITS),
+        },
+        'query': query,
+    }
+
+def _bluesky(rng, i, query, created_at):
+    return {
+        'source': 'Bluesky',
+        'id': f"at://did:plc:{rng.getrandbits(80):020x}/app.bsky.feed.post/{i:013d}",
+        'text': _text(rng, 'Bluesky')[:300],
+        'author': f"user{rng.randrange(200_000)}.bsky.social",
+        'created_at': created_at,
+        'source_specific_metrics': {
+            'reply_count': int(rng.paretovariate(1.5)) - 1,
+            'repost_count': int(rng.paretovariate(1.5)) - 1,
+            'like_count': int(rng.paretovariate(1.2)) - 1,
+        },
+        'query': query,
+    }
+
+def _youtube(rng, i, query, created_at):
+    return {
+        'source': 'YouTube',
+        'id': f"Ug{i:024x}",
+        'text': _text(rng, 'YouTube'),
+        'author': f"@viewer{rng.randrange(500_000)}",
+        'created_at': created_at,
+        'source_specific_metrics': {
+            # Comments cluster under a few hundred videos per query
+            'video_id': f"{query[:2]}{rng.randrange(300):09d}",
+            'like_count': int(rng.paretovariate(1.3)) - 1,
+        },
+        'query': query,
+    }
+
+_BUILDERS = {'Reddit': _reddit, 'Bluesky': _bluesky, 'YouTube': _youtube}
+
+def iter_records(n, seed=42, raw=False):
+    """
+    Yield n synthetic records, platforms interleaved by PLATFORM_MIX.
+
+    With raw=False the text is cleaned with clean_many() as the collectors do
+    before yielding; raw=True keeps the uncleaned text for benchmarking the
+    cleaning itself.
+    """
+    rng = random.Random(seed)
+    platforms = [name for name, _ in PLATFORM_MIX]
+    weights = [share for _, share in PLATFORM_MIX]
+    batch = []
+    for i in range(n):
+        platform = rng.choices(platforms, weights)[0]
+        created_at = START - timedelta(seconds=rng.randrange(SPAN_DAYS * 86400))
+        batch.append(_BUILDERS[platform](rng, i, rng.choice(QUERIES), created_at))
+        if len(batch) == 10_000:
+            yield from _finish(batch, raw)
+            batch = []
+    yield from _finish(batch, raw)
+
+def _finish(batch, raw):
+    if not raw:
+        for record, text in zip(batch, clean_many([record['text'] for record in batch])):
+            record['text'] = text
+    return batch
+
+def make_records(n, seed=42, raw=False):
+    """iter_records() as a list"""
+    return list(iter_records(n, seed, raw))
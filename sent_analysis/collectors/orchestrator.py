@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from processor.instrumentation import get_metrics
+
+# Max jobs in flight per platform. Collection is network-bound, so threads are
+# enough; the caps keep us polite to each API.
+DEFAULT_CONCURRENCY = {
+    # A praw.Reddit session is not thread-safe, and one shared session serves every query
+    'Reddit': 1,
+    'Bluesky': 2,
+    'YouTube': 2,
+}
+
+# Records per queue event, and the most events queued at once: at most about
+# JOB_CHUNK_SIZE * MAX_QUEUED_CHUNKS collected records wait for scoring
+JOB_CHUNK_SIZE = 100
+MAX_QUEUED_CHUNKS = 20
+
+class CollectionIncomplete(Exception):
+    """
+    Raised by a collector, after yielding what it did fetch, when part of a listing was skipped.
+
+    API errors, quota stops and cache misses mid-pagination leave gaps, so the
+    job is reported as failed and the cycle doesn't commit its watermarks.
+    """
+
+def collect_available(records):
+    """A list of every record the iterator yields, keeping them if it stops with CollectionIncomplete"""
+    collected = []
+    try:
+        for record in records:
+            collected.append(record)
+    except CollectionIncomplete as e:
+        print(f"Keeping {len(collected)} records from an incomplete collection: {e}")
+    return collected
+
+class CollectionJob:
+    """One collector call: a platform, a query and a callable that returns its records"""
+
+    def __init__(self, platform, query, fetch):
+        self.platform = platform
+        self.query = query
+        self.fetch = fetch
+
+    @property
+    def name(self):
+        return f"{self.platform}:{self.query}"
+
+class JobResult:
+    """Record count, timing and error (if any) of one finished CollectionJob"""
+
+    def __init__(self, job, record_count, elapsed, error=None, waited=0.0):
+        self.job = job
+        self.record_count = record_count
+        # Time spent collecting, not counting `waited`: time blocked on a full queue while records were scored
+        self.elapsed = elapsed
+        self.waited = waited
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+class _Stopped(Exception):
+    """Raised inside a job when the consumer has gone away"""
+
+def _put(events, stop, event):
+    """Put an event on the bounded queue, waiting for room; returns the seconds spent waiting"""
+    start = time.perf_counter()
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            events.put(event, timeout=0.1)
+            return time.perf_counter() - start
+        except queue.Full:
+            continue
+
+def _run_job(job, events, stop, chunk_size):
+    start = time.perf_counter()
+    count = 0
+    waited = 0.0
+    error = None
+    chunk = []
+    try:
+        for record in job.fetch():
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                waited += _put(events, stop, ('records', chunk))
+                count += len(chunk)
+                chunk = []
+    except _Stopped:
+        return
+    except Exception as e:
+        print(f"Error collecting from {job.platform} for query '{job.query}': {e}")
+        error = e
+    try:
+        # Records fetched before an error are still handed on
+        if chunk:
+            waited += _put(events, stop, ('records', chunk))
+            count += len(chunk)
+    except _Stopped:
+        return
+    result = JobResult(job, count, time.perf_counter() - start - waited, error=error, waited=waited)
+    get_metrics().record(
+        'collect', result.elapsed, items=result.record_count, error=not result.ok,
+        platform=job.platform, query=job.query
+    )
+    try:
+        _put(events, stop, ('result', result))
+    except _Stopped:
+        pass
+
+def run_jobs(jobs, concurrency=None, chunk_size=JOB_CHUNK_SIZE, max_queued=MAX_QUEUED_CHUNKS):
+    """
+    Run jobs concurrently under per-platform caps, yielding their events as they happen.
+
+    Events are ('records', list of up to chunk_size records) while a job is
+    collecting and ('result', JobResult) once it has finished. Jobs push into
+    a queue of at most max_queued chunks, so when the consumer is busy
+    scoring and saving, collection waits instead of piling records up in
+    memory. Closing the generator early stops the jobs at their next record.
+    """
+    caps = dict(DEFAULT_CONCURRENCY)
+    caps.update(concurrency or {})
+
+    events = queue.Queue(maxsize=max_queued)
+    stop = threading.Event()
+    # One pool per platform, sized to its cap, so a backlog on one platform
+    # never holds threads another platform could be using
+    executors = {}
+    pending = 0
+    try:
+        for job in jobs:
+            if job.platform not in executors:
+                executors[job.platform] = ThreadPoolExecutor(
+                    max_workers=caps.get(job.platform, 1),
+                    thread_name_prefix=f"collector-{job.platform}"
+                )
+            executors[job.platform].submit(_run_job, job, events, stop, chunk_size)
+            pending += 1
+        while pending:
+            kind, payload = events.get()
+            if kind == 'result':
+                pending -= 1
+            yield kind, payload
+    finally:
+        stop.set()
+        for executor in executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+
+def iter_job_records(jobs, concurrency=None, results=None):
+    """
+    Yield the records of every job as they are collected, then print per-job timings.
+
+    Pass a list as results to get each job's JobResult appended to it.
+    """
+    if results is None:
+        results = []
+    for kind, payload in run_jobs(jobs, concurrency):
+        if kind == 'records':
+            yield from payload
+        else:
+            results.append(payload)
+    print_job_report(results)
+
+def print_job_report(results):
+    """Print records, wall time and status for each job"""
+    if not results:
+        return
+    print("\n--- Collection job timings ---")
+    for result in sorted(results, key=lambda r: r.job.name):
+        status = 'ok' if result.ok else f"failed: {result.error}"
+        waited = f" (+{result.waited:.2f}s waiting on scoring)" if result.waited >= 0.01 else ''
+        print(f"{result.job.name:<24} {result.record_count:>6} records {result.elapsed:>8.2f}s  {status}{waited}")
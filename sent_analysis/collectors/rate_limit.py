@@ -0,0 +1,199 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from processor.instrumentation import get_metrics
+
+# (requests per second, burst) per platform, from each API's published limits:
+# - Reddit: 100 queries per minute per OAuth client, averaged over 10 minutes
+# - Bluesky: 3000 requests per 5 minutes per IP on the AppView
+# - YouTube: the per-minute request limit is far above what the daily unit
+#   budget allows, so QuotaTracker is the real bound; this only smooths bursts
+PLATFORM_LIMITS = {
+    'Reddit': (100 / 60, 10),
+    'Bluesky': (3000 / 300, 10),
+    'YouTube': (10, 20),
+}
+
+# Statuses worth retrying after a pause: throttling and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# YouTube reports throttling as a 403 with one of these reasons (quotaExceeded is daily and not retried)
+RETRYABLE_403_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`.
+
+    block_for() empties the bucket and holds every caller back for a while,
+    which is how a Retry-After from one thread slows down all of them.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def block_for(self, seconds):
+        """Hold every caller back for `seconds` and restart from an empty bucket"""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(self._updated, self._blocked_until)
+
+class RateLimiter:
+    """
+    Paces calls to one platform through a shared TokenBucket and retries throttled ones.
+
+    A throttled call (429, a YouTube rate-limit 403, or a transient 5xx) is
+    retried after the server's Retry-After or rate-limit reset if it sent
+    one, otherwise after exponential backoff with full jitter. The pause is
+    applied to the bucket, so every thread calling the platform waits with it.
+    """
+
+    def __init__(self, platform, rate, burst, max_retries=5, base_delay=1.0, max_delay=300.0):
+        self.platform = platform
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def call(self, func, *args, **kwargs):
+        """Call func(*args, **kwargs) within the rate limit, retrying while it is throttled"""
+        metrics = get_metrics()
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                metrics.record('request', time.perf_counter() - start, items=1, platform=self.platform)
+                return result
+            except Exception as e:
+                metrics.record('request', time.perf_counter() - start, items=1, error=True, platform=self.platform)
+                delay = self.retry_delay(e, attempt)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                print(f"{self.platform} throttled ({e.__class__.__name__}); retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1} of {self.max_retries})")
+                self.bucket.block_for(delay)
+
+    def retry_delay(self, error, attempt):
+        """Seconds to wait before retrying after `error`, or None if it shouldn't be retried"""
+        status, headers, body = error_details(error)
+        if status not in RETRYABLE_STATUSES and not (
+            status == 403 and any(reason in body for reason in RETRYABLE_403_REASONS)
+        ):
+            return None
+        server_delay = server_retry_delay(headers)
+        if server_delay is not None:
+            # A little jitter so threads released together don't hit the API in lockstep
+            return min(self.max_delay, server_delay) + random.uniform(0, 1)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+def error_details(error):
+    """(status, headers, body) of an HTTP error from praw/prawcore, atproto or googleapiclient"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        # prawcore wraps a requests.Response; atproto its own Response model
+        status = getattr(response, 'status_code', None)
+        headers = getattr(response, 'headers', None) or {}
+        body = getattr(response, 'content', '')
+    else:
+        # googleapiclient's HttpError carries an httplib2 response, which is itself the header dict
+        response = getattr(error, 'resp', None)
+        status = getattr(response, 'status', None)
+        headers = response or {}
+        body = getattr(error, 'content', '')
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    return status, {str(key).lower(): value for key, value in dict(headers).items()}, str(body)
+
+def server_retry_delay(headers):
+    """Seconds the server asked us to wait: Retry-After, or a rate-limit reset once nothing remains"""
+    retry_after = headers.get('retry-after')
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    # Reddit: x-ratelimit-reset is seconds until the window resets
+    if _header_float(headers, 'x-ratelimit-remaining') == 0:
+        return _header_float(headers, 'x-ratelimit-reset')
+    # Bluesky: ratelimit-reset is the epoch second the window resets
+    if _header_float(headers, 'ratelimit-remaining') == 0:
+        reset = _header_float(headers, 'ratelimit-reset')
+        if reset is not None:
+            return max(0.0, reset - time.time())
+    return None
+
+def _header_float(headers, name):
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(platform):
+    """
+    The process-wide RateLimiter for a platform, so every collector and thread shares one budget.
+
+    RATE_LIMIT_<PLATFORM> (requests per second) overrides the published rate.
+    """
+    with _limiters_lock:
+        if platform not in _limiters:
+            rate, burst = PLATFORM_LIMITS.get(platform, (1, 1))
+            rate = float(os.getenv(f"RATE_LIMIT_{platform.upper()}", rate))
+            _limiters[platform] = RateLimiter(platform, rate, burst)
+        return _limiters[platform]
+
+_DONE = object()
+
+def iter_limited(limiter, iterable, page_size):
+    """
+    Iterate a lazily paginated listing (e.g. a praw search), taking one token per page.
+
+    The request for each page happens on the first next() of that page, so
+    only those calls go through the limiter and are retried when throttled.
+    """
+    iterator = iter(iterable)
+    index = 0
+    while True:
+        if index % page_size == 0:
+            item = limiter.call(next, iterator, _DONE)
+        else:
+            item = next(iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+        index += 1
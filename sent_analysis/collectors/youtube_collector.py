@@ -1,71 +1,300 @@
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import re
-import time
+from urllib.parse import parse_qsl, urlsplit
+from zoneinfo import ZoneInfo
+import json
+import os
+import threading
 
-def clean_text(text):
-    """Clean and preprocess text"""
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'[^\w\s.,!?]', '', text)
-    text = ' '.join(text.split())
-    return text.strip()
+from collectors.orchestrator import CollectionIncomplete, collect_available
+from collectors.rate_limit import get_limiter
+from collectors.response_cache import CacheMiss
+from collectors.text_cleaning import clean_many
 
-def collect_youtube_data(api_key, query, max_videos=5, max_comments_per_video=50):
-    """Search YouTube for videos and collect comments"""
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    search_data = []
-
-    print(f"Searching YouTube for videos related to '{query}'...")
-    try:
-        # Search for videos
-        video_response = youtube.search().list(
-            q=query,
-            part='id,snippet',
-            type='video',
-            maxResults=max_videos
-        ).execute()
-
-        video_ids = [item['id']['videoId'] for item in video_response.get('items', [])]
-
-        for video_id in video_ids:
+# Quota units charged per call, from the YouTube Data API v3 quota table
+QUOTA_COSTS = {
+    'search.list': 100,
+    'commentThreads.list': 1,
+}
+DEFAULT_DAILY_QUOTA = 10_000
+
+# Largest maxResults each endpoint accepts
+SEARCH_PAGE_SIZE = 50
+COMMENTS_PAGE_SIZE = 100
+
+class QuotaTracker:
+    """
+    Counts YouTube API quota units spent today and refuses calls that would go over budget.
+
+    The quota resets at midnight Pacific time. With a path, usage is saved to a
+    small JSON file so separate runs on the same day share one budget.
+    """
+
+    def __init__(self, daily_budget=DEFAULT_DAILY_QUOTA, path=None):
+        self.daily_budget = daily_budget
+        self.path = path
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self.used = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    saved = json.load(f)
+                if saved.get('day') == self._day:
+                    self.used = saved.get('used', 0)
+            except (OSError, ValueError) as e:
+                print(f"Could not read YouTube quota file {path}: {e}")
+
+    @staticmethod
+    def _today():
+        return datetime.now(ZoneInfo('America/Los_Angeles')).date().isoformat()
+
+    def reserve(self, method):
+        """Charge one call to `method`; False (and nothing charged) if it would exceed the budget"""
+        cost = QUOTA_COSTS[method]
+        with self._lock:
+            today = self._today()
+            if today != self._day:
+                self._day, self.used = today, 0
+            if self.used + cost > self.daily_budget:
+                return False
+            self.used += cost
+            self._save()
+            return True
+
+    @property
+    def remaining(self):
+        return self.daily_budget - self.used
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({'day': self._day, 'used': self.used}, f)
+        except OSError as e:
+            print(f"Could not write YouTube quota file {self.path}: {e}")
+
+class QuotaExhausted(Exception):
+    """Raised when the next call would exceed the daily YouTube quota budget"""
+
+class YouTubeCollector:
+    """
+    Searches YouTube for videos and collects their top-level comments.
+
+    Search results and comment threads are paginated with nextPageToken,
+    comment threads for different videos are fetched concurrently, and every
+    call is charged against a QuotaTracker so collection stops cleanly before
+    the daily budget runs out.
+    """
+
+    def __init__(self, api_key, quota=None, max_workers=4, dedup_index=None, watermarks=None, limiter=None,
+                 response_cache=None):
+        self.api_key = api_key
+        # Optional storage.dedup_index.DedupIndex; comments already stored are skipped before cleaning
+        self.dedup_index = dedup_index
+        # Optional storage.watermarks.WatermarkStore; when set, comment paging stops at the last run's newest comment
+        self.watermarks = watermarks
+        self.quota = quota or QuotaTracker()
+        # Shared per-platform token bucket; throttled calls are retried with backoff
+        self.limiter = limiter or get_limiter('YouTube')
+        # Optional collectors.response_cache.ResponseCache; cached responses cost no quota
+        self.response_cache = response_cache
+        self.max_workers = max_workers
+        # googleapiclient services are not thread-safe, so each thread builds its own
+        self._local = threading.local()
+
+    def _youtube(self):
+        if not hasattr(self._local, 'youtube'):
+            self._local.youtube = build('youtube', 'v3', developerKey=self.api_key, cache_discovery=False)
+        return self._local.youtube
+
+    def _execute(self, method, request):
+        if self.response_cache is None:
+            return self.limiter.call(self._charge_and_execute, method, request)
+        return self.response_cache.fetch(
+            'YouTube', method, _request_params(request),
+            lambda: self.limiter.call(self._charge_and_execute, method, request)
+        )
+
+    def _charge_and_execute(self, method, request):
+        # Charged per attempt, since throttled calls still count against the quota
+        if not self.quota.reserve(method):
+            raise QuotaExhausted(f"{method} would exceed the daily YouTube quota ({self.quota.remaining} units left)")
+        return request.execute()
+
+    def search_video_ids(self, query, max_videos=5):
+        """Return up to max_videos video IDs for a query, following nextPageToken"""
+        video_ids = []
+        page_token = None
+        while len(video_ids) < max_videos:
             try:
-                print(f"  Collecting comments for video ID: {video_id}")
-                # Get comments for each video
-                comments_response = youtube.commentThreads().list(
+                response = self._execute('search.list', self._youtube().search().list(
+                    q=query,
+                    part='id,snippet',
+                    type='video',
+                    maxResults=min(SEARCH_PAGE_SIZE, max_videos - len(video_ids)),
+                    pageToken=page_token
+                ))
+            except QuotaExhausted as e:
+                if not video_ids:
+                    raise
+                # Keep the videos already found; their comments are cheap
+                print(f"Stopping YouTube search for '{query}' after {len(video_ids)} videos: {e}")
+                break
+            video_ids.extend(item['id']['videoId'] for item in response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        return video_ids[:max_videos]
+
+    def fetch_comments(self, video_id, query, max_comments=50, since=None):
+        """
+        Collect up to max_comments top-level comment records for one video.
+
+        With `since` (epoch seconds), threads are requested newest first and
+        paging stops at the first comment published at or before it.
+        """
+        records, _ = self._fetch_comments(video_id, query, max_comments, since)
+        return records
+
+    def _fetch_comments(self, video_id, query, max_comments, since):
+        """fetch_comments, also returning the error that cut the video's comments short, or None"""
+        print(f"  Collecting comments for video ID: {video_id}")
+        key = _comments_key(query, video_id)
+        records = []
+        fetched = 0
+        page_token = None
+        order = 'time' if since is not None else 'relevance'
+        error = None
+        try:
+            while fetched < max_comments:
+                response = self._execute('commentThreads.list', self._youtube().commentThreads().list(
                     part='snippet',
                     videoId=video_id,
                     textFormat='plainText',
-                    maxResults=max_comments_per_video
-                ).execute()
-
-                for item in comments_response.get('items', []):
-                    comment = item['snippet']['topLevelComment']['snippet']
-                    full_text = comment['textDisplay']
-                    
-                    if len(full_text) > 10:
-                        cleaned_text = clean_text(full_text)
-                        search_data.append({
-                            'source': 'YouTube',
-                            'id': item['id'],
-                            'text': cleaned_text,
-                            'author': comment['authorDisplayName'],
-                            'created_at': datetime.fromisoformat(comment['publishedAt'].replace('Z', '+00:00')),
-                            'source_specific_metrics': {
-                                'video_id': video_id,
-                                'like_count': comment['likeCount'],
-                            },
-                            'query': query
-                        })
-                time.sleep(0.1) # Small delay to respect rate limits
-            except HttpError as e:
-                if e.resp.status == 403 and 'commentsDisabled' in str(e.content):
-                    print(f"  Comments are disabled for video {video_id}. Skipping.")
-                    continue
-                else:
-                    print(f"An HttpError occurred: {e}")
-
-    except Exception as e:
-        print(f"Error collecting YouTube data: {e}")
-
-    return search_data
+                    order=order,
+                    maxResults=min(COMMENTS_PAGE_SIZE, max_comments - fetched),
+                    pageToken=page_token
+                ))
+                page = response.get('items', [])[:max_comments - fetched]
+                fetched += len(page)
+
+                reached_watermark = False
+                if since is not None:
+                    new_items = [item for item in page if _published_epoch(item) > since]
+                    reached_watermark = len(new_items) < len(page)
+                    page = new_items
+                if self.watermarks is not None:
+                    for item in page:
+                        self.watermarks.observe('YouTube', key, _published_epoch(item), item['id'])
+
+                records.extend(self._to_records(page, video_id, query))
+                page_token = response.get('nextPageToken')
+                if not page_token or not page or reached_watermark:
+                    break
+                if fetched >= max_comments:
+                    # Newer comments than the watermark are still on later pages
+                    if self.watermarks is not None and since is not None:
+                        print(f"  Video {video_id} has more than {max_comments} new comments; keeping its watermark")
+                        self.watermarks.hold('YouTube', key)
+                    break
+        except (QuotaExhausted, CacheMiss) as e:
+            print(f"  Stopping comments for video {video_id}: {e}")
+            error = e
+        except HttpError as e:
+            if e.resp.status == 403 and 'commentsDisabled' in str(e.content):
+                print(f"  Comments are disabled for video {video_id}. Skipping.")
+            else:
+                print(f"An HttpError occurred: {e}")
+                error = e
+        return records, error
+
+    def iter_search(self, query, max_videos=5, max_comments_per_video=50):
+        """
+        Search for videos and yield comment records one video at a time, in search order.
+
+        Each video's comments have their own watermark. Once every video's
+        records are yielded, a video cut short by an API error or the quota is
+        raised as CollectionIncomplete.
+        """
+        print(f"Searching YouTube for videos related to '{query}'...")
+        errors = []
+        try:
+            video_ids = self.search_video_ids(query, max_videos)
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='youtube') as executor:
+                futures = [
+                    (video_id, executor.submit(
+                        self._fetch_comments, video_id, query, max_comments_per_video, self._since(query, video_id)
+                    ))
+                    for video_id in video_ids
+                ]
+                for video_id, future in futures:
+                    records, error = future.result()
+                    yield from records
+                    if error is not None:
+                        errors.append(f"video {video_id}: {error}")
+        except QuotaExhausted as e:
+            print(f"Stopping YouTube search for '{query}': {e}")
+            errors.append(str(e))
+        except Exception as e:
+            print(f"Error collecting YouTube data: {e}")
+            errors.append(str(e))
+        if errors:
+            raise CollectionIncomplete(f"YouTube comments for '{query}' are incomplete: {'; '.join(errors)}")
+
+    def _since(self, query, video_id):
+        if self.watermarks is None:
+            return None
+        return self.watermarks.since('YouTube', _comments_key(query, video_id))
+
+    def _to_records(self, items, video_id, query):
+        if self.dedup_index is not None:
+            items = self.dedup_index.drop_seen(items, key=lambda item: ('YouTube', item['id']))
+        items = [
+            item for item in items
+            if len(item['snippet']['topLevelComment']['snippet']['textDisplay']) > 10
+        ]
+        cleaned_texts = clean_many(
+            item['snippet']['topLevelComment']['snippet']['textDisplay'] for item in items
+        )
+
+        records = []
+        for item, cleaned_text in zip(items, cleaned_texts):
+            comment = item['snippet']['topLevelComment']['snippet']
+            records.append({
+                'source': 'YouTube',
+                'id': item['id'],
+                'text': cleaned_text,
+                'author': comment['authorDisplayName'],
+                'created_at': datetime.fromisoformat(comment['publishedAt'].replace('Z', '+00:00')),
+                'source_specific_metrics': {
+                    'video_id': video_id,
+                    'like_count': comment['likeCount'],
+                },
+                'query': query
+            })
+        return records
+
+def _comments_key(query, video_id):
+    """Watermark key for one video's comments; a query-wide key would skip older comments on other videos"""
+    return f"{query}|{video_id}"
+
+def _request_params(request):
+    """A request's query parameters without the API key, for the response cache key"""
+    return {name: value for name, value in parse_qsl(urlsplit(request.uri).query) if name != 'key'}
+
+def _published_epoch(item):
+    published_at = item['snippet']['topLevelComment']['snippet']['publishedAt']
+    return datetime.fromisoformat(published_at.replace('Z', '+00:00')).timestamp()
+
+def collect_youtube_data(api_key, query, max_videos=5, max_comments_per_video=50):
+    """Search YouTube for videos and collect comments"""
+    return collect_available(iter_youtube_data(api_key, query, max_videos, max_comments_per_video))
+
+def iter_youtube_data(api_key, query, max_videos=5, max_comments_per_video=50):
+    """Search YouTube for videos, yielding comment records one video at a time"""
+    collector = YouTubeCollector(api_key)
+    yield from collector.iter_search(query, max_videos, max_comments_per_video)
@@ -1,39 +1,42 @@
+import argparse
 import os
+from datetime import datetime
+from functools import partial
 from dotenv import load_dotenv
-from collectors.reddit_collector import collect_reddit_data
-from collectors.bluesky_collector import collect_bluesky_data
-from collectors.youtube_collector import collect_youtube_data
+from collectors.orchestrator import CollectionJob, iter_job_records
+from collectors.reddit_collector import RedditCollector
+from collectors.response_cache import ResponseCache
+from collectors.bluesky_collector import BlueskyCollector
+from collectors.youtube_collector import QuotaTracker, YouTubeCollector
 
+from processor.cube import SentimentCube
+from processor.instrumentation import get_metrics
+from processor.charts import renderer_from_env
+from processor.near_duplicates import NearDuplicateIndex
+from processor.score_cache import ScoreCache
 from processor.sentiment_analyzer import SentimentProcessor
+from storage.sql_store import SqlResultStore
 
-def main():
-    """Main function to orchestrate the data collection and analysis"""
-    load_dotenv()
+def build_collection_jobs(queries, response_cache=None):
+    """One collection job per configured platform and query"""
+    jobs = []
 
-    # --- Configuration ---
     # Load Reddit credentials from .env file
     REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
     REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
     REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT", "sentiment_analysis_bot_v1.0")
 
-    # Define your search queries
-    queries = ['UAE', 'Qatar']
-    
-    # --- Data Collection ---
-    all_data = []
-    
     # Collect from Reddit
     if REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET:
         print("--- Collecting data from Reddit ---")
+        # One authenticated session shared by every Reddit query
+        reddit = RedditCollector(REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT, response_cache=response_cache)
         for query in queries:
-            reddit_data = collect_reddit_data(
-                client_id=REDDIT_CLIENT_ID, 
-                client_secret=REDDIT_CLIENT_SECRET, 
-                user_agent=REDDIT_USER_AGENT,
+            jobs.append(CollectionJob('Reddit', query, partial(
+                reddit.iter_search,
                 query=query,
                 limit=50 # Limit per query for faster testing
-            )
-            all_data.extend(reddit_data)
+            )))
     else:
         print("Reddit credentials not found. Skipping Reddit.")
 
@@ -43,55 +46,190 @@ def main():
 
     # Collect from Bluesky
     if BLUESKY_HANDLE and BLUESKY_PASSWORD:
-        print("\n--- Collecting data from Bluesky ---")
+        print("--- Collecting data from Bluesky ---")
+        # Logs in once, on the first query, and reuses the session for the rest
+        bluesky = BlueskyCollector(BLUESKY_HANDLE, BLUESKY_PASSWORD, response_cache=response_cache)
         for query in queries:
-            bluesky_data = collect_bluesky_data(
-                bluesky_handle=BLUESKY_HANDLE,
-                bluesky_password=BLUESKY_PASSWORD,
+            jobs.append(CollectionJob('Bluesky', query, partial(
+                bluesky.iter_search,
                 query=query,
                 limit=50 # Limit per query for faster testing
-            )
-            all_data.extend(bluesky_data)
+            )))
     else:
         print("Bluesky credentials not found. Skipping Bluesky.")
 
     # Load YouTube credentials from .env file
     YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+    # Per query; comments are paged 100 at a time, so larger caps cost 1 quota unit per extra page
+    YOUTUBE_MAX_VIDEOS = int(os.getenv("YOUTUBE_MAX_VIDEOS", "10"))
+    YOUTUBE_MAX_COMMENTS_PER_VIDEO = int(os.getenv("YOUTUBE_MAX_COMMENTS_PER_VIDEO", "200"))
 
     # Collect from YouTube
     if YOUTUBE_API_KEY:
-        print("\n--- Collecting data from YouTube ---")
+        print("--- Collecting data from YouTube ---")
+        # Quota spent today is tracked across runs so collection stops before the daily budget runs out
+        quota = QuotaTracker(
+            daily_budget=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+            path=os.getenv("YOUTUBE_QUOTA_PATH", "youtube_quota.json")
+        )
+        youtube = YouTubeCollector(YOUTUBE_API_KEY, quota=quota, response_cache=response_cache)
         for query in queries:
-            youtube_data = collect_youtube_data(
-                api_key=YOUTUBE_API_KEY,
+            jobs.append(CollectionJob('YouTube', query, partial(
+                youtube.iter_search,
                 query=query,
-                max_videos=5,
-                max_comments_per_video=50
-            )
-            all_data.extend(youtube_data)
+                max_videos=YOUTUBE_MAX_VIDEOS,
+                max_comments_per_video=YOUTUBE_MAX_COMMENTS_PER_VIDEO
+            )))
     else:
         print("YouTube API key not found. Skipping YouTube.")
 
+    return jobs
+
+def main():
+    """Main function to orchestrate the data collection and analysis"""
+    parser = argparse.ArgumentParser(description="Collect social media posts and analyze their sentiment.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Score and append records to the output CSV in chunks as they are collected")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Records scored per chunk in --stream mode")
+    parser.add_argument('--cache-only', action='store_true',
+                        help="Work offline: serve every API call from the response cache, whatever its age")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    # --- Configuration ---
+    # Define your search queries
+    queries = ['UAE', 'Qatar']
+
+    # Number of processes used for scoring; 1 keeps everything in-process
+    SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "1"))
+    # Comma-separated analyzer backends, e.g. "vader" for the fast VADER-only mode
+    SENTIMENT_ANALYZERS = os.getenv("SENTIMENT_ANALYZERS", "textblob,vader").split(",")
+    # Scores already computed on earlier runs are reused; set to an empty string to disable
+    SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", "sentiment_score_cache.db")
+    score_cache = ScoreCache(SENTIMENT_CACHE_PATH) if SENTIMENT_CACHE_PATH else None
+    # Off by default; a positive limit clusters cross-posts, reposts and spam (cluster_id) and scores reposts once
+    NEAR_DUP_MAX_ITEMS = int(os.getenv("NEAR_DUP_MAX_ITEMS", "0"))
+    near_duplicates = None
+    if NEAR_DUP_MAX_ITEMS > 0:
+        near_duplicates = NearDuplicateIndex(
+            os.getenv("NEAR_DUP_PATH", "near_duplicates.npz") or None,
+            max_items=NEAR_DUP_MAX_ITEMS
+        )
+    # CHART_MODE=headless saves charts without opening windows, drawing them in CHART_WORKERS processes
+    processor = SentimentProcessor(analyzers=SENTIMENT_ANALYZERS, workers=SENTIMENT_WORKERS, cache=score_cache,
+                                   renderer=renderer_from_env(), near_duplicates=near_duplicates)
+    # SQLAlchemy URL (e.g. sqlite:///sentiment_results.db); when set, results are upserted there instead of a CSV
+    RESULT_STORE_URL = os.getenv("RESULT_STORE_URL")
+    result_store = SqlResultStore(RESULT_STORE_URL) if RESULT_STORE_URL else None
+    # API responses younger than this many seconds are served from disk; 0 turns the cache off
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "0"))
+    RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "api_response_cache.db")
+    RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "256"))
+    response_cache = None
+    if RESPONSE_CACHE_TTL > 0 or args.cache_only:
+        response_cache = ResponseCache(
+            RESPONSE_CACHE_PATH,
+            ttl=RESPONSE_CACHE_TTL,
+            max_bytes=int(RESPONSE_CACHE_MAX_MB * 2 ** 20),
+            offline=args.cache_only
+        )
+    # Per-stage timings are written here when the run ends; set METRICS_PROM_PATH for a Prometheus textfile too
+    METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH", "pipeline_metrics.json")
+    METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH")
+    metrics = get_metrics()
+    metrics.begin_cycle()
+
+    try:
+        if args.stream:
+            run_streaming(processor, queries, args.chunk_size, result_store, response_cache)
+        else:
+            run_batch(processor, queries, result_store, response_cache)
+    finally:
+        processor.close()
+        if result_store is not None:
+            result_store.close()
+        if response_cache is not None:
+            stats = response_cache.stats()
+            print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+            response_cache.close()
+        if score_cache is not None:
+            stats = score_cache.stats()
+            print(f"Score cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+            score_cache.close()
+        if near_duplicates is not None:
+            stats = near_duplicates.stats()
+            print(f"Near-duplicates: {stats['near_duplicates']} of {stats['texts']} texts "
+                  f"({stats['duplicate_rate']:.0%}) joined an existing cluster; "
+                  f"{stats['shared_scores']} reused the scores of an identical text")
+            near_duplicates.close()
+        metrics.export(METRICS_JSON_PATH, METRICS_PROM_PATH, mode='stream' if args.stream else 'batch')
+
+def run_batch(processor, queries, result_store=None, response_cache=None):
+    """Collect everything, then score, chart and save it in one go"""
+    # --- Data Collection ---
+    all_data = list(iter_job_records(build_collection_jobs(queries, response_cache)))
+
     if not all_data:
         print("No data was collected. Exiting.")
         return
 
     # --- Processing and Analysis ---
-    processor = SentimentProcessor()
-    
     # Process the raw data into a DataFrame with sentiment scores
     results_df = processor.process_data(all_data)
-    
-    # Perform the main analysis and generate charts
-    processor.analyze_and_visualize(results_df)
-    processor.create_detailed_trend_chart(results_df)
-    
-    
-    
-    # Save the final results to a CSV
-    processor.save_results(results_df)
-    
-    print("\nAnalysis complete! Check the CSV and PNG files for results.")
+    processor.add_report_columns(results_df)
+
+    # Save the final results to the database, or to a CSV, before anything else can fail
+    if result_store is not None:
+        with get_metrics().timer('write', sink='sql') as timer:
+            result_store.write(results_df)
+            timer.items = len(results_df)
+        print(f"Results saved to {result_store.url}")
+    else:
+        with get_metrics().timer('write', sink='csv') as timer:
+            processor.save_results(results_df)
+            timer.items = len(results_df)
+
+    # Perform the main analysis and generate charts from one aggregation cube (VADER runs only)
+    cube = processor.analyze_and_chart(results_df)
+    if cube is not None:
+        processor.save_summary(cube)
+
+    destination = 'database' if result_store is not None else 'CSV'
+    print(f"\nAnalysis complete! Check the {destination} and PNG files for results.")
+
+def run_streaming(processor, queries, chunk_size, result_store=None, response_cache=None):
+    """Score records in fixed-size chunks and save each chunk as soon as it is scored"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{timestamp}_combined_sentiment.csv" if result_store is None else result_store.url
+
+    total = 0
+    cube = None
+    records = iter_job_records(build_collection_jobs(queries, response_cache))
+    for chunk_df in processor.process_stream(records, chunk_size=chunk_size):
+        with get_metrics().timer('write', sink='sql' if result_store is not None else 'csv') as timer:
+            if result_store is not None:
+                result_store.write(chunk_df)
+            else:
+                processor.append_results(chunk_df, filename)
+            timer.items = len(chunk_df)
+        total += len(chunk_df)
+        print(f"Appended {len(chunk_df)} records to {filename} ({total} so far)")
+        # Reports and charts only need per-day totals, so each chunk is folded into a small cube and then dropped
+        if 'vader_compound' in chunk_df.columns:
+            chunk_cube = SentimentCube.from_frame(chunk_df)
+            cube = chunk_cube if cube is None else cube.merge(chunk_cube)
+
+    if total == 0:
+        print("No data was collected. Exiting.")
+        return
+
+    if cube is not None:
+        processor.analyze_and_chart_cube(cube)
+        processor.save_summary(cube)
+
+    print(f"\nStreaming run complete! {total} records saved to {filename}")
 
 if __name__ == "__main__":
     main()
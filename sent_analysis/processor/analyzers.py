@@ -0,0 +1,64 @@
+from importlib.metadata import PackageNotFoundError, version
+
+# name -> analyzer class. Classes import their backing library in __init__,
+# so a backend that is not selected is never imported.
+ANALYZER_REGISTRY = {}
+
+DEFAULT_ANALYZERS = ('textblob', 'vader')
+
+def register_analyzer(name):
+    """
+    Class decorator that makes a scorer selectable by name, e.g.
+    SentimentProcessor(analyzers=['vader', name]).
+
+    A scorer needs a `columns` list, a `version` string (part of the score
+    cache key) and a `score(text)` method returning one float per column.
+    Worker processes started with `spawn` only see scorers registered at
+    import time of a module they import.
+    """
+    def decorator(cls):
+        cls.name = name
+        ANALYZER_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+def build_analyzers(names):
+    """Instantiate the named analyzers in order"""
+    analyzers = []
+    for name in names:
+        if name not in ANALYZER_REGISTRY:
+            raise ValueError(f"Unknown analyzer '{name}'. Available: {', '.join(sorted(ANALYZER_REGISTRY))}")
+        analyzers.append(ANALYZER_REGISTRY[name]())
+    return analyzers
+
+def package_version(name):
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return 'unknown'
+
+@register_analyzer('textblob')
+class TextBlobAnalyzer:
+    columns = ['textblob_polarity', 'textblob_subjectivity']
+
+    def __init__(self):
+        from textblob import TextBlob
+        self._textblob = TextBlob
+        self.version = package_version('textblob')
+
+    def score(self, text):
+        sentiment = self._textblob(text).sentiment
+        return sentiment.polarity, sentiment.subjectivity
+
+@register_analyzer('vader')
+class VaderAnalyzer:
+    columns = ['vader_positive', 'vader_negative', 'vader_neutral', 'vader_compound']
+
+    def __init__(self):
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        self._polarity_scores = SentimentIntensityAnalyzer().polarity_scores
+        self.version = package_version('vaderSentiment')
+
+    def score(self, text):
+        scores = self._polarity_scores(text)
+        return scores['pos'], scores['neg'], scores['neu'], scores['compound']
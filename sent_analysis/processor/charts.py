@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+
+# Bump when a chart's drawing code changes so cached charts are redrawn
+CHART_REVISION = 1
+
+# Aggregates are hashed at this precision: far finer than any chart shows, but coarse enough that
+# summation order (a streaming cube built chunk by chunk vs a batch one) doesn't change the digest
+DIGEST_FLOAT_FORMAT = '%.10g'
+
+CHART_MODES = ('interactive', 'headless')
+
+def chart_aggregates(cube):
+    """Every aggregate the printed report and the charts use, sliced once from a processor.cube.SentimentCube"""
+    return {
+        'sentiment_by_query': cube.counts('query'),
+        'avg_scores': cube.stats('query')['mean'],
+        'daily_means': cube.daily_means(),
+        'sentiment_by_source': cube.counts('query_source'),
+    }
+
+def draw_summary_chart(aggregates, new_figure):
+    """The 2x2 summary: distribution and average score by query, daily trend, distribution by source"""
+    with matplotlib.style.context('seaborn-v0_8'):
+        fig = new_figure(figsize=(15, 12))
+        axes = fig.subplots(2, 2)
+
+        # 1. Sentiment distribution by query
+        aggregates['sentiment_by_query'].plot(kind='bar', ax=axes[0, 0], color=['red', 'gray', 'green'])
+        axes[0, 0].set_title('Sentiment Distribution by Query')
+        axes[0, 0].set_xlabel('Query')
+        axes[0, 0].set_ylabel('Number of Posts')
+        axes[0, 0].legend(title='Sentiment')
+        axes[0, 0].tick_params(axis='x', rotation=45)
+
+        # 2. Average sentiment scores by query
+        aggregates['avg_scores'].plot(kind='bar', ax=axes[0, 1], color='skyblue')
+        axes[0, 1].set_title('Average Sentiment Score by Query')
+        axes[0, 1].set_xlabel('Query')
+        axes[0, 1].set_ylabel('Average VADER Compound Score')
+        axes[0, 1].tick_params(axis='x', rotation=45)
+
+        # 3. Sentiment over time
+        aggregates['daily_means'].fillna(0).plot(ax=axes[1, 0], marker='o')
+        axes[1, 0].set_title('Sentiment Trend Over Time')
+        axes[1, 0].set_xlabel('Date')
+        axes[1, 0].set_ylabel('Average Sentiment Score')
+        axes[1, 0].legend(title='Query')
+
+        # 4. Sentiment by Source
+        aggregates['sentiment_by_source'].plot(kind='bar', ax=axes[1, 1], colormap='viridis')
+        axes[1, 1].set_title('Sentiment Distribution by Source')
+        axes[1, 1].set_xlabel('Query and Source')
+        axes[1, 1].set_ylabel('Number of Posts')
+        axes[1, 1].legend(title='Sentiment')
+        axes[1, 1].tick_params(axis='x', rotation=45)
+    return fig
+
+def draw_trend_chart(aggregates, new_figure):
+    """Daily mean compound score per query with a 7-day rolling average"""
+    sentiment_over_time = aggregates['daily_means']
+    with matplotlib.style.context('seaborn-v0_8-whitegrid'):
+        fig = new_figure(figsize=(18, 10))
+        ax = fig.subplots()
+
+        # Plot original daily data for each query
+        for query in sentiment_over_time.columns:
+            ax.plot(sentiment_over_time.index, sentiment_over_time[query], marker='o', linestyle='-', alpha=0.5, label=f'{query} (Daily)')
+
+        # Plot 7-day rolling average for each query
+        for query in sentiment_over_time.columns:
+            rolling_avg = sentiment_over_time[query].rolling(window=7, min_periods=1).mean()
+            ax.plot(sentiment_over_time.index, rolling_avg, linestyle='--', linewidth=2.5, label=f'{query} (7-Day Avg)')
+
+        ax.set_title('Detailed Sentiment Trend Over Time', fontsize=20)
+        ax.set_xlabel('Date', fontsize=14)
+        ax.set_ylabel('Average VADER Compound Score', fontsize=14)
+
+        handles, labels = ax.get_legend_handles_labels()
+        ax.legend(handles, labels, title='Query', bbox_to_anchor=(1.05, 1), loc='upper left')
+
+        ax.axhline(0, color='black', linewidth=0.8, linestyle='--') # Add a line for neutral sentiment
+    return fig
+
+# name -> (drawing function, aggregates it reads, file name suffix, label for messages)
+CHARTS = {
+    'summary': (draw_summary_chart, ['sentiment_by_query', 'avg_scores', 'daily_means', 'sentiment_by_source'],
+                'sentiment_charts.png', 'Charts'),
+    'trend': (draw_trend_chart, ['daily_means'], 'detailed_sentiment_trend.png', 'Detailed trend chart'),
+}
+
+def _render_to_file(name, aggregates, filename, dpi):
+    """Draw one chart off-screen and save it; runs in a worker process in headless mode"""
+    draw = CHARTS[name][0]
+    # A bare Figure never touches pyplot or a GUI backend
+    fig = draw(aggregates, Figure)
+    fig.savefig(filename, dpi=dpi, bbox_inches='tight', facecolor='white')
+    return filename
+
+def chart_digest(name, aggregates, dpi):
+    """Content hash of everything that determines a chart's pixels"""
+    digest = hashlib.sha256(f"{name}\0{CHART_REVISION}\0{dpi}".encode('utf-8'))
+    for key in CHARTS[name][1]:
+        digest.update(key.encode('utf-8'))
+        digest.update(aggregates[key].to_csv(float_format=DIGEST_FLOAT_FORMAT).encode('utf-8'))
+    return digest.hexdigest()
+
+class ChartRenderer:
+    """
+    Draws and saves the sentiment charts.
+
+    'interactive' mode draws in-process and opens each chart with plt.show(),
+    as the scripts always have. 'headless' mode never shows anything: charts
+    are drawn on the non-interactive Agg backend, in up to `workers` processes
+    at once. With a cache_path, a headless run skips any chart whose input
+    aggregates hash the same as when its existing PNG was drawn.
+    """
+
+    def __init__(self, mode='interactive', workers=1, cache_path=None, dpi=300):
+        if mode not in CHART_MODES:
+            raise ValueError(f"Unknown chart mode '{mode}'. Available: {', '.join(CHART_MODES)}")
+        self.mode = mode
+        self.workers = workers
+        self.cache_path = cache_path
+        self.dpi = dpi
+        if mode == 'headless':
+            matplotlib.use('Agg')
+
+    def render(self, aggregates, names=None):
+        """Render the named charts (default: all) from chart_aggregates() output; returns {name: PNG path}"""
+        names = list(names or CHARTS)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filenames = {name: f"{timestamp}_{CHARTS[name][2]}" for name in names}
+        if self.mode == 'interactive':
+            return self._render_interactive(aggregates, filenames)
+        return self._render_headless(aggregates, filenames)
+
+    def _render_interactive(self, aggregates, filenames):
+        saved = {}
+        for name, filename in filenames.items():
+            fig = CHARTS[name][0](aggregates, plt.figure)
+            try:
+                fig.savefig(filename, dpi=self.dpi, bbox_inches='tight', facecolor='white')
+                print(f"{CHARTS[name][3]} saved to {filename}")
+                saved[name] = filename
+            except Exception as e:
+                print(f"Error saving {CHARTS[name][3].lower()}: {e}")
+            fig.tight_layout()
+        plt.show()
+        return saved
+
+    def _render_headless(self, aggregates, filenames):
+        manifest = self._load_manifest()
+        saved = {}
+        pending = {}
+        for name, filename in filenames.items():
+            digest = chart_digest(name, aggregates, self.dpi)
+            previous = manifest.get(name, {})
+            if previous.get('digest') == digest and os.path.exists(previous.get('path', '')):
+                print(f"{CHARTS[name][3]} unchanged since the last run: {previous['path']}")
+                saved[name] = previous['path']
+            else:
+                pending[name] = (filename, digest)
+
+        if not pending:
+            return saved
+
+        # Each worker is sent only the aggregates its chart reads
+        jobs = [
+            (name, {key: aggregates[key] for key in CHARTS[name][1]}, filename, self.dpi)
+            for name, (filename, _) in pending.items()
+        ]
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+                futures = {job[0]: executor.submit(_render_to_file, *job) for job in jobs}
+                results = {name: self._result(name, future.result) for name, future in futures.items()}
+        else:
+            results = {job[0]: self._result(job[0], _render_to_file, *job) for job in jobs}
+
+        for name, filename in results.items():
+            if filename is None:
+                continue
+            print(f"{CHARTS[name][3]} saved to {filename}")
+            saved[name] = filename
+            manifest[name] = {'digest': pending[name][1], 'path': filename}
+        self._save_manifest(manifest)
+        return saved
+
+    @staticmethod
+    def _result(name, func, *args):
+        try:
+            return func(*args)
+        except Exception as e:
+            print(f"Error saving {CHARTS[name][3].lower()}: {e}")
+            return None
+
+    def _load_manifest(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable chart cache {self.cache_path}: {e}")
+            return {}
+
+    def _save_manifest(self, manifest):
+        if not self.cache_path:
+            return
+        with open(self.cache_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+def renderer_from_env():
+    """
+    A ChartRenderer configured from the environment:
+    CHART_MODE (interactive or headless), CHART_WORKERS and CHART_CACHE_PATH.
+    """
+    return ChartRenderer(
+        mode=os.getenv("CHART_MODE", "interactive"),
+        workers=int(os.getenv("CHART_WORKERS", "2")),
+        # Empty disables the unchanged-chart check
+        cache_path=os.getenv("CHART_CACHE_PATH", "chart_cache.json"),
+    )
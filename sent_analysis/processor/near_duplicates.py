@@ -0,0 +1,322 @@
+import hashlib
+import os
+import random
+import re
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+TOKEN_RE = re.compile(r'\w+')
+
+# LSH banding of the MinHash signature: two texts land in the same bucket of a band when all
+# ROWS of its hashes agree, which happens for at least one band with probability 1 - (1 - J^ROWS)^BANDS
+# for Jaccard similarity J: about 95% at J = 0.8, 60% at 0.7 and 6% at 0.5
+BANDS = 16
+ROWS = 8
+
+# Fixed so that signatures, bucket keys and cluster ids are the same in every process and run
+MINHASH_SEED = 20250701
+
+# A text joins a cluster only if its estimated Jaccard similarity to the text that started the
+# cluster is at least this; LSH buckets only propose candidates. Comparing against the cluster's
+# first text, not the member that matched, keeps clusters from drifting through chains of edits.
+JOIN_SIMILARITY = 0.8
+
+# Bumped when the saved .npz layout changes; older files are ignored
+INDEX_FORMAT = 2
+
+# Texts with fewer word bigrams than this only match texts with exactly the same words: in a short post
+# one extra word ("the hotel was hot" / "the hotel was hot terrible") can flip the sentiment
+MIN_FEATURES = 5
+
+# Texts hashed per NumPy pass; bounds the per-feature arrays
+SIGNATURE_CHUNK = 2000
+
+_MAX_HASH = np.iinfo(np.uint64).max
+
+def _features(text):
+    """Word bigrams of the lowercased text, or its single word"""
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) < 2:
+        return tokens
+    return [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def _hash_parameters(count, salt):
+    rng = random.Random(f"{MINHASH_SEED}:{salt}")
+    # Odd multipliers make each a * x + b (mod 2^64) a permutation of the 64-bit hashes
+    multipliers = np.array([rng.getrandbits(64) | 1 for _ in range(count)], dtype=np.uint64)
+    offsets = np.array([rng.getrandbits(64) for _ in range(count)], dtype=np.uint64)
+    return multipliers, offsets
+
+class MinHasher:
+    """MinHash signatures over word bigrams, folded into one 64-bit LSH bucket key per band"""
+
+    def __init__(self, bands=BANDS, rows=ROWS, min_features=MIN_FEATURES):
+        self.bands = bands
+        self.rows = rows
+        self.min_features = min_features
+        self.multipliers, self.offsets = _hash_parameters(bands * rows, 'minhash')
+        # Fold a band's rows into one key; a per-band offset keeps bands from sharing keys
+        self.row_weights, _ = _hash_parameters(rows, 'rows')
+        _, self.band_offsets = _hash_parameters(bands, 'bands')
+
+    def sketch(self, texts):
+        """
+        (signatures, keys): a (len(texts), bands * rows) uint32 array of MinHash
+        values and a (len(texts), bands) uint64 array of bucket keys.
+
+        The fraction of positions where two signatures agree estimates the
+        Jaccard similarity of the texts' word bigrams. Texts shorter than
+        min_features get one hash of their words in every band and every
+        signature position, so they only match the same words in the same order.
+        """
+        signatures = np.empty((len(texts), self.bands * self.rows), dtype=np.uint32)
+        keys = np.empty((len(texts), self.bands), dtype=np.uint64)
+        hashes = {}
+        for start in range(0, len(texts), SIGNATURE_CHUNK):
+            chunk_features = [_features(text) for text in texts[start:start + SIGNATURE_CHUNK]]
+            counts = np.array([len(features) for features in chunk_features], dtype=np.int64)
+            flat = []
+            for features in chunk_features:
+                for feature in features:
+                    value = hashes.get(feature)
+                    if value is None:
+                        value = _hash64(feature)
+                        hashes[feature] = value
+                    flat.append(value)
+            # Keep the memo from growing without bound on very large inputs
+            if len(hashes) > 1_000_000:
+                hashes.clear()
+
+            signature = np.full((len(chunk_features), self.bands * self.rows), _MAX_HASH, dtype=np.uint64)
+            has_features = counts > 0
+            if flat:
+                feature_hashes = np.array(flat, dtype=np.uint64)
+                # Offsets of each text's first feature; reduceat needs non-empty segments
+                starts = (np.cumsum(counts) - counts)[has_features]
+                for i, (multiplier, offset) in enumerate(zip(self.multipliers, self.offsets)):
+                    signature[has_features, i] = np.minimum.reduceat(feature_hashes * multiplier + offset, starts)
+
+            banded = signature.reshape(len(chunk_features), self.bands, self.rows)
+            # uint64 arithmetic wraps, which is what a multiplicative hash wants
+            chunk_keys = (banded * self.row_weights).sum(axis=2) + self.band_offsets
+            # The low 32 bits are plenty to compare signatures and halve what the index keeps
+            chunk_signatures = signature.astype(np.uint32)
+            for i in np.flatnonzero(counts < self.min_features):
+                exact = _hash64('\n'.join(chunk_features[i]))
+                chunk_keys[i] = exact
+                chunk_signatures[i] = exact & 0xFFFFFFFF
+            keys[start:start + len(chunk_features)] = chunk_keys
+            signatures[start:start + len(chunk_features)] = chunk_signatures
+        return signatures, keys
+
+def text_key(text):
+    """Key under which a text's scores are shared: its words with whitespace runs collapsed"""
+    return _hash64(' '.join(text.split()))
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index that groups cross-posts, copy-pasted spam and reposts into clusters.
+
+    Each text's MinHash signature is cut into bands and every band hashed to a
+    bucket key. Texts sharing a bucket with the text are candidates; it joins
+    the candidate cluster whose first text's signature it matches best, if
+    their estimated Jaccard similarity is at least join_similarity, and
+    otherwise starts a new cluster, named after its first bucket key. Texts
+    of only a few words need the same words.
+
+    A cluster only groups texts for reporting. A near-duplicate can say the
+    opposite ("the stadium was awful" / "the stadium was beautiful"), so
+    scores are only shared between texts with exactly the same words
+    (text_key()); every other text is scored on its own.
+
+    Memory is bounded by keeping bucket keys and cluster signatures in two
+    generations of at most max_items / 2 texts each: when the newer fills up,
+    the older one is dropped. A text that matches refreshes its cluster into
+    the newer generation, so active clusters survive; the default 100,000
+    texts take about 170 MB. Shared scores are kept for up to max_items texts,
+    least recently used evicted first. With a path, the index is loaded from
+    and saved to a .npz file so one-shot runs see earlier runs' clusters.
+    """
+
+    def __init__(self, path=None, max_items=100_000, bands=BANDS, rows=ROWS, min_features=MIN_FEATURES,
+                 join_similarity=JOIN_SIMILARITY):
+        self.path = path
+        self.max_items = max_items
+        self.hasher = MinHasher(bands, rows, min_features)
+        self.join_similarity = join_similarity
+        self.texts = 0
+        self.near_duplicates = 0
+        self.shared_scores = 0
+        self._lock = threading.Lock()
+        # bucket key -> cluster, for the texts of the current and the previous generation
+        self._current = {}
+        self._previous = {}
+        # cluster -> signature of the text that started it, for the same two generations
+        self._current_signatures = {}
+        self._previous_signatures = {}
+        self._current_texts = 0
+        # text_key() -> score dict for the analyzer version in self._version
+        self._scores = OrderedDict()
+        self._version = None
+        if path and os.path.exists(path):
+            self._load()
+
+    def _signature(self, cluster):
+        signature = self._current_signatures.get(cluster)
+        if signature is None:
+            signature = self._previous_signatures.get(cluster)
+        return signature
+
+    def _lookup(self, keys, signature):
+        """(cluster, its first text's signature) of the closest candidate cluster, or (None, None)"""
+        candidates = set()
+        for key in keys:
+            cluster = self._current.get(key)
+            if cluster is None:
+                cluster = self._previous.get(key)
+            if cluster is not None:
+                candidates.add(cluster)
+        best, best_signature, best_similarity = None, None, -1.0
+        for cluster in sorted(candidates):
+            representative = self._signature(cluster)
+            if representative is None:
+                continue
+            similarity = np.count_nonzero(representative == signature) / len(signature)
+            if similarity > best_similarity:
+                best, best_signature, best_similarity = cluster, representative, similarity
+        if best_similarity < self.join_similarity:
+            return None, None
+        return best, best_signature
+
+    def _remember(self, keys, cluster, signature):
+        for key in keys:
+            self._current.setdefault(key, cluster)
+        self._current_signatures.setdefault(cluster, signature)
+        self._current_texts += 1
+        if self._current_texts >= max(1, self.max_items // 2):
+            self._previous, self._previous_signatures = self._current, self._current_signatures
+            self._current, self._current_signatures = {}, {}
+            self._current_texts = 0
+
+    def assign(self, texts):
+        """Cluster ids (16 hex digits) for texts, remembering them for later calls"""
+        signatures, band_keys = self.hasher.sketch(texts)
+        band_keys = band_keys.tolist()
+        clusters = []
+        with self._lock:
+            for keys, signature in zip(band_keys, signatures):
+                cluster, representative = self._lookup(keys, signature)
+                if cluster is None:
+                    cluster, representative = keys[0], signature.copy()
+                else:
+                    self.near_duplicates += 1
+                self._remember(keys, cluster, representative)
+                clusters.append(f"{cluster:016x}")
+            self.texts += len(texts)
+        return clusters
+
+    def get_scores(self, texts, version):
+        """Return a list aligned with texts holding the score dict shared by each text's key, or None"""
+        with self._lock:
+            if version != self._version:
+                return [None] * len(texts)
+            found = []
+            for text in texts:
+                key = text_key(text)
+                scores = self._scores.get(key)
+                if scores is not None:
+                    self._scores.move_to_end(key)
+                    self.shared_scores += 1
+                found.append(scores)
+            return found
+
+    def put_scores(self, texts, rows, version):
+        """Remember the score dict of each text, produced by analyzer version `version`"""
+        with self._lock:
+            if version != self._version:
+                self._scores.clear()
+                self._version = version
+            for text, row in zip(texts, rows):
+                key = text_key(text)
+                self._scores[key] = row
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_items:
+                self._scores.popitem(last=False)
+
+    def stats(self):
+        """Texts seen, how many joined an existing cluster or reused shared scores, and current size"""
+        return {
+            'texts': self.texts,
+            'near_duplicates': self.near_duplicates,
+            'duplicate_rate': self.near_duplicates / self.texts if self.texts else 0.0,
+            'shared_scores': self.shared_scores,
+            'buckets': len(self._current) + len(self._previous),
+            'scored_texts': len(self._scores),
+        }
+
+    def save(self):
+        """Write the buckets, cluster signatures and shared scores to path, replacing it atomically"""
+        if not self.path:
+            return
+        signature_width = self.hasher.bands * self.hasher.rows
+        with self._lock:
+            score_columns = sorted(next(iter(self._scores.values()))) if self._scores else []
+            arrays = {
+                'previous_keys': np.array(list(self._previous), dtype=np.uint64),
+                'previous_clusters': np.array(list(self._previous.values()), dtype=np.uint64),
+                'current_keys': np.array(list(self._current), dtype=np.uint64),
+                'current_clusters': np.array(list(self._current.values()), dtype=np.uint64),
+                'current_texts': np.array(self._current_texts),
+                'scored_texts': np.array(list(self._scores), dtype=np.uint64),
+                'score_columns': np.array(score_columns, dtype=str),
+                'scores': np.array(
+                    [[row[column] for column in score_columns] for row in self._scores.values()], dtype=np.float64
+                ).reshape(len(self._scores), len(score_columns)),
+                'version': np.array(self._version or ''),
+                'shape': np.array([
+                    self.hasher.bands, self.hasher.rows, self.hasher.min_features, MINHASH_SEED, INDEX_FORMAT
+                ]),
+            }
+            for generation, signatures in (('previous', self._previous_signatures), ('current', self._current_signatures)):
+                arrays[f'{generation}_signature_clusters'] = np.array(list(signatures), dtype=np.uint64)
+                arrays[f'{generation}_signatures'] = np.array(
+                    list(signatures.values()), dtype=np.uint32
+                ).reshape(len(signatures), signature_width)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, self.path)
+
+    def _load(self):
+        try:
+            with np.load(self.path) as saved:
+                shape = [self.hasher.bands, self.hasher.rows, self.hasher.min_features, MINHASH_SEED, INDEX_FORMAT]
+                if saved['shape'].tolist() != shape:
+                    print(f"Ignoring near-duplicate index {self.path}: saved with different LSH settings or format")
+                    return
+                self._previous = dict(zip(saved['previous_keys'].tolist(), saved['previous_clusters'].tolist()))
+                self._current = dict(zip(saved['current_keys'].tolist(), saved['current_clusters'].tolist()))
+                self._previous_signatures = dict(zip(
+                    saved['previous_signature_clusters'].tolist(), saved['previous_signatures']
+                ))
+                self._current_signatures = dict(zip(
+                    saved['current_signature_clusters'].tolist(), saved['current_signatures']
+                ))
+                self._current_texts = int(saved['current_texts'])
+                columns = saved['score_columns'].tolist()
+                for key, values in zip(saved['scored_texts'].tolist(), saved['scores'].tolist()):
+                    self._scores[key] = dict(zip(columns, values))
+                self._version = str(saved['version']) or None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable near-duplicate index {self.path}: {e}")
+            self._previous, self._current, self._current_texts = {}, {}, 0
+            self._previous_signatures, self._current_signatures = {}, {}
+            self._scores.clear()
+
+    def close(self):
+        self.save()
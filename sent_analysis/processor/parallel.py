@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Below this many texts per worker, process start-up and pickling cost more
+# than the scoring itself, so we stay in-process.
+MIN_CHUNK_SIZE = 500
+
+# Per-process SentimentProcessor, built once by the pool initializer
+_worker_processor = None
+
+def _init_worker(processor_config):
+    """Build the analyzers once per worker process"""
+    global _worker_processor
+    from processor.sentiment_analyzer import SentimentProcessor
+    _worker_processor = SentimentProcessor(**processor_config)
+
+def _score_chunk(texts):
+    """Score one chunk of texts inside a worker process"""
+    return _worker_processor.score_batch(texts)
+
+def split_chunks(texts, n_chunks):
+    """Split a list into n_chunks contiguous slices, preserving order"""
+    bounds = np.linspace(0, len(texts), n_chunks + 1, dtype=int)
+    return [texts[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def should_parallelize(n_texts, workers, min_chunk_size=MIN_CHUNK_SIZE):
+    """True if there is enough work to give at least two workers a full chunk"""
+    return workers > 1 and n_texts >= 2 * min_chunk_size
+
+class ScoringPool:
+    """A lazily started process pool whose workers each hold a warm SentimentProcessor"""
+
+    def __init__(self, workers, processor_config=None, min_chunk_size=MIN_CHUNK_SIZE):
+        self.workers = workers
+        self.processor_config = processor_config or {}
+        self.min_chunk_size = min_chunk_size
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.processor_config,)
+            )
+        return self._executor
+
+    def score_batch(self, texts):
+        """Score texts across the pool and merge the per-chunk arrays in original order"""
+        texts = list(texts)
+        # A few chunks per worker keeps the pool busy when chunk costs are uneven
+        n_chunks = max(1, min(self.workers * 4, len(texts) // self.min_chunk_size))
+        chunks = split_chunks(texts, n_chunks)
+
+        results = list(self._get_executor().map(_score_chunk, chunks))
+        return {
+            column: np.concatenate([result[column] for result in results])
+            for column in results[0]
+        }
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -1,162 +1,296 @@
+import os
+from itertools import islice
+
+import numpy as np
 import pandas as pd
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 
+from processor.analyzers import DEFAULT_ANALYZERS, build_analyzers
+from processor.charts import ChartRenderer, chart_aggregates
+from processor.compact import compact_frame, created_at_utc
+from processor.cube import SentimentCube
+from processor.instrumentation import get_metrics
+from processor.near_duplicates import text_key
+from processor.rollups import summarize
+from processor.parallel import MIN_CHUNK_SIZE, ScoringPool, should_parallelize
+
+# Bump when the scoring logic changes so cached scores are recomputed
+SCORER_REVISION = 1
+
 class SentimentProcessor:
-    def __init__(self):
-        self.vader = SentimentIntensityAnalyzer()
+    def __init__(self, analyzers=DEFAULT_ANALYZERS, workers=1, min_chunk_size=MIN_CHUNK_SIZE, cache=None,
+                 renderer=None, near_duplicates=None):
+        self.analyzer_names = list(analyzers)
+        self.analyzers = build_analyzers(self.analyzer_names)
+        self.score_columns = [column for analyzer in self.analyzers for column in analyzer.columns]
+        self.workers = workers
+        self.min_chunk_size = min_chunk_size
+        self.cache = cache
+        # processor.charts.ChartRenderer; the default draws and shows charts in-process
+        self.renderer = renderer or ChartRenderer()
+        # processor.near_duplicates.NearDuplicateIndex; when set, rows get a cluster_id and reposts are scored once
+        self.near_duplicates = near_duplicates
+        self._pool = None
+        self.version_tag = f"r{SCORER_REVISION}+" + '+'.join(
+            f"{analyzer.name}-{analyzer.version}" for analyzer in self.analyzers
+        )
+
+    def _worker_config(self):
+        """Constructor arguments used to rebuild this processor inside a worker process"""
+        return {'analyzers': self.analyzer_names, 'workers': 1}
+
+    def close(self):
+        """Release the scoring process pool, if one was started"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
 
     def analyze_sentiment(self, text):
-        """Analyze sentiment using both TextBlob and VADER"""
-        blob = TextBlob(text)
-        textblob_polarity = blob.sentiment.polarity
-        textblob_subjectivity = blob.sentiment.subjectivity
-        
-        vader_scores = self.vader.polarity_scores(text)
-        
-        return {
-            'textblob_polarity': textblob_polarity,
-            'textblob_subjectivity': textblob_subjectivity,
-            'vader_positive': vader_scores['pos'],
-            'vader_negative': vader_scores['neg'],
-            'vader_neutral': vader_scores['neu'],
-            'vader_compound': vader_scores['compound']
-        }
+        """Analyze sentiment with every selected analyzer"""
+        if self.cache is not None:
+            cached = self.cache.get(text, self.version_tag)
+            if cached is not None:
+                return cached
+            scores = self._analyze_uncached(text)
+            self.cache.put(text, scores, self.version_tag)
+            return scores
+        return self._analyze_uncached(text)
+
+    def _analyze_uncached(self, text):
+        scores = {}
+        for analyzer in self.analyzers:
+            scores.update(zip(analyzer.columns, analyzer.score(text)))
+        return scores
+
+    def score_batch(self, texts):
+        """Score a sequence of texts into a dict of NumPy arrays, one per score column"""
+        if self.cache is None:
+            return self._score_uncached(texts)
+
+        texts = list(texts)
+        cached = self.cache.get_many(texts, self.version_tag)
+        scores = {column: np.empty(len(texts), dtype=np.float64) for column in self.score_columns}
+
+        # Score each distinct missing text once, even if it repeats in the batch
+        missing = {}
+        for i, (text, hit) in enumerate(zip(texts, cached)):
+            if hit is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                for column in self.score_columns:
+                    scores[column][i] = hit[column]
+
+        if missing:
+            missing_texts = list(missing)
+            fresh = self._score_uncached(missing_texts)
+            fresh_rows = []
+            for j, text in enumerate(missing_texts):
+                row = {column: float(fresh[column][j]) for column in self.score_columns}
+                fresh_rows.append(row)
+                for i in missing[text]:
+                    for column in self.score_columns:
+                        scores[column][i] = row[column]
+            self.cache.put_many(missing_texts, fresh_rows, self.version_tag)
+
+        return scores
+
+    def score_clustered(self, texts):
+        """
+        Score texts and assign each its near-duplicate cluster.
+
+        Returns (scores, cluster ids). Scores are only shared between texts
+        with the same words (reposts, cross-posts, copy-pasted spam), including
+        ones scored in earlier batches; a near-duplicate that differs by even
+        one word is scored on its own.
+        """
+        with get_metrics().timer('near_duplicates') as timer:
+            clusters = self.near_duplicates.assign(texts)
+            timer.items = len(texts)
+        known = self.near_duplicates.get_scores(texts, self.version_tag)
+
+        # The first text with each key that has no scores yet stands in for the others
+        representatives = {}
+        for i, (text, hit) in enumerate(zip(texts, known)):
+            if hit is None:
+                representatives.setdefault(text_key(text), i)
+        fresh_rows = {}
+        if representatives:
+            fresh = self.score_batch([texts[i] for i in representatives.values()])
+            fresh_rows = {
+                key: {column: float(fresh[column][j]) for column in self.score_columns}
+                for j, key in enumerate(representatives)
+            }
+            self.near_duplicates.put_scores(
+                [texts[i] for i in representatives.values()], list(fresh_rows.values()), self.version_tag
+            )
+
+        scores = {column: np.empty(len(texts), dtype=np.float64) for column in self.score_columns}
+        for i, (text, hit) in enumerate(zip(texts, known)):
+            row = hit if hit is not None else fresh_rows[text_key(text)]
+            for column in self.score_columns:
+                scores[column][i] = row[column]
+        return scores, clusters
+
+    def _score_uncached(self, texts):
+        """Score texts in-process or across the worker pool"""
+        if should_parallelize(len(texts), self.workers, self.min_chunk_size):
+            if self._pool is None:
+                self._pool = ScoringPool(self.workers, self._worker_config(), self.min_chunk_size)
+            return self._pool.score_batch(texts)
+        return self._score_batch_serial(texts)
+
+    def _score_batch_serial(self, texts):
+        """Score texts in the current process"""
+        n = len(texts)
+        scores = {}
+        for analyzer in self.analyzers:
+            arrays = [np.empty(n, dtype=np.float64) for _ in analyzer.columns]
+            score = analyzer.score
+            for i, text in enumerate(texts):
+                for array, value in zip(arrays, score(text)):
+                    array[i] = value
+            scores.update(zip(analyzer.columns, arrays))
+        return scores
 
     def categorize_sentiment(self, compound_score):
-        """Categorize sentiment based on compound score"""
-        if compound_score >= 0.05:
-            return 'Positive'
-        elif compound_score <= -0.05:
-            return 'Negative'
-        else:
-            return 'Neutral'
-
-    def process_data(self, data):
-        """Process a list of dictionaries into a DataFrame with sentiment scores"""
+        """Categorize sentiment based on compound score (a scalar or an array of scores)"""
+        scores = np.asarray(compound_score, dtype=np.float64)
+        categories = np.select(
+            [scores >= 0.05, scores <= -0.05],
+            ['Positive', 'Negative'],
+            default='Neutral'
+        )
+        if categories.ndim == 0:
+            return str(categories)
+        return categories
+
+    def process_data(self, data, compact=False):
+        """
+        Process a list of dictionaries into a DataFrame with sentiment scores.
+
+        With a near-duplicate index, each row also gets the cluster_id of its
+        near-duplicate cluster, and texts with the same words are scored once.
+
+        With compact=True the result goes through compact_frame(): categorical
+        labels, float32 scores, int64 UTC epoch-millisecond timestamps and
+        flattened metric_<key> columns instead of the nested metrics dict.
+        """
         df = pd.DataFrame(data)
         if df.empty:
             return df
 
-        sentiment_df = df['text'].apply(lambda text: pd.Series(self.analyze_sentiment(text)))
-        df = pd.concat([df, sentiment_df], axis=1)
-        df['sentiment_category'] = df['vader_compound'].apply(self.categorize_sentiment)
+        metrics = get_metrics()
+        with metrics.timer('score') as timer, metrics.profile():
+            if self.near_duplicates is None:
+                scores = self.score_batch(df['text'].tolist())
+            else:
+                scores, clusters = self.score_clustered(df['text'].tolist())
+                df['cluster_id'] = clusters
+            timer.items = len(df)
+        sentiment_df = pd.DataFrame(scores, index=df.index)
+        if 'vader_compound' in scores:
+            sentiment_df['sentiment_category'] = self.categorize_sentiment(scores['vader_compound'])
+        results = pd.concat([df, sentiment_df], axis=1)
+        return compact_frame(results) if compact else results
+
+    def process_stream(self, records, chunk_size=1000, compact=False):
+        """Score an iterable of records in fixed-size chunks, yielding one DataFrame per chunk"""
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            yield self.process_data(chunk, compact=compact)
+
+    def add_report_columns(self, df):
+        """Add the date and query_source columns the reports group by; save_results() has always written them out"""
+        df['date'] = created_at_utc(df['created_at']).dt.date
+        df['query_source'] = df['query'].astype(str) + ' - ' + df['source'].astype(str)
         return df
 
+    @staticmethod
+    def _has_report_scores(df):
+        """Reports and charts are built on VADER's compound score; say so and skip them when it wasn't computed"""
+        if 'vader_compound' in df.columns:
+            return True
+        print("No VADER scores (SENTIMENT_ANALYZERS does not include vader). Skipping analysis and charts.")
+        return False
+
     def analyze_and_visualize(self, df):
         """Perform and print main analysis and generate visualizations"""
         if df.empty:
             print("DataFrame is empty. No analysis to perform.")
             return
+        if not self._has_report_scores(df):
+            return
+        self.add_report_columns(df)
+        self.analyze_and_visualize_rollup(summarize(df))
 
-        print("\n=== SENTIMENT ANALYSIS RESULTS ===")
-        print(f"Total posts analyzed: {len(df)}")
-        
-        print("\n--- Sentiment Distribution by Query ---")
-        sentiment_by_query = df.groupby(['query', 'sentiment_category']).size().unstack(fill_value=0)
-        print(sentiment_by_query)
-
-        plt.style.use('seaborn-v0_8')
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-
-        # 1. Sentiment distribution by query
-        sentiment_counts = df.groupby(['query', 'sentiment_category']).size().unstack(fill_value=0)
-        sentiment_counts.plot(kind='bar', ax=axes[0, 0], color=['red', 'gray', 'green'])
-        axes[0, 0].set_title('Sentiment Distribution by Query')
-        axes[0, 0].set_xlabel('Query')
-        axes[0, 0].set_ylabel('Number of Posts')
-        axes[0, 0].legend(title='Sentiment')
-        axes[0, 0].tick_params(axis='x', rotation=45)
-
-        # 2. Average sentiment scores by query
-        avg_scores = df.groupby('query')['vader_compound'].mean()
-        avg_scores.plot(kind='bar', ax=axes[0, 1], color='skyblue')
-        axes[0, 1].set_title('Average Sentiment Score by Query')
-        axes[0, 1].set_xlabel('Query')
-        axes[0, 1].set_ylabel('Average VADER Compound Score')
-        axes[0, 1].tick_params(axis='x', rotation=45)
-
-        # 3. Sentiment over time
-        df['date'] = pd.to_datetime(df['created_at'], utc=True).dt.date
-        sentiment_over_time = df.groupby(['date', 'query'])['vader_compound'].mean().unstack(fill_value=0)
-        sentiment_over_time.plot(ax=axes[1, 0], marker='o')
-        axes[1, 0].set_title('Sentiment Trend Over Time')
-        axes[1, 0].set_xlabel('Date')
-        axes[1, 0].set_ylabel('Average Sentiment Score')
-        axes[1, 0].legend(title='Query')
-
-        # 4. Sentiment by Source
-        df['query_source'] = df['query'] + ' - ' + df['source']
-        sentiment_by_source = df.groupby(['query_source', 'sentiment_category']).size().unstack(fill_value=0)
-        sentiment_by_source.plot(kind='bar', ax=axes[1, 1], colormap='viridis')
-        axes[1, 1].set_title('Sentiment Distribution by Source')
-        axes[1, 1].set_xlabel('Query and Source')
-        axes[1, 1].set_ylabel('Number of Posts')
-        axes[1, 1].legend(title='Sentiment')
-        axes[1, 1].tick_params(axis='x', rotation=45)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        chart_filename = f"{timestamp}_sentiment_charts.png"
-        
-        fig.savefig(chart_filename, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"Charts saved to {chart_filename}")
-
-        plt.tight_layout()
-        plt.show()
+    def analyze_and_visualize_rollup(self, rollup):
+        """Print the main analysis and chart it from (day, query, source) rollups instead of raw rows"""
+        if rollup.empty:
+            print("Rollup is empty. No analysis to perform.")
+            return
+        cube = SentimentCube(rollup)
+        aggregates = chart_aggregates(cube)
+        self._print_analysis(cube, aggregates)
+        self.renderer.render(aggregates, ['summary'])
 
     def create_detailed_trend_chart(self, df):
         """Create a more detailed sentiment trend chart with a rolling average."""
         if df.empty or 'created_at' not in df.columns:
             return
+        if not self._has_report_scores(df):
+            return
+        self.create_detailed_trend_chart_from_rollup(summarize(df))
 
-        plt.style.use('seaborn-v0_8-whitegrid')
-        fig, ax = plt.subplots(figsize=(18, 10))
-
-        # Ensure 'date' column exists
-        if 'date' not in df.columns:
-            df['date'] = pd.to_datetime(df['created_at'], utc=True).dt.date
-        
-        sentiment_over_time = df.groupby(['date', 'query'])['vader_compound'].mean().unstack()
-
-        if sentiment_over_time.empty:
+    def create_detailed_trend_chart_from_rollup(self, rollup):
+        """Detailed trend chart with a 7-day rolling average, read from (day, query, source) rollups"""
+        if rollup.empty:
             print("No time-series data to plot for detailed trend chart.")
             return
+        self.renderer.render(chart_aggregates(SentimentCube(rollup)), ['trend'])
 
-        # Plot original daily data for each query
-        for query in sentiment_over_time.columns:
-            ax.plot(sentiment_over_time.index, sentiment_over_time[query], marker='o', linestyle='-', alpha=0.5, label=f'{query} (Daily)')
+    def analyze_and_chart_rollup(self, rollup):
+        """analyze_and_chart_cube() for a (day, query, source) rollup"""
+        self.analyze_and_chart_cube(SentimentCube(rollup))
 
-        # Plot 7-day rolling average for each query
-        for query in sentiment_over_time.columns:
-            rolling_avg = sentiment_over_time[query].rolling(window=7, min_periods=1).mean()
-            ax.plot(sentiment_over_time.index, rolling_avg, linestyle='--', linewidth=2.5, label=f'{query} (7-Day Avg)')
+    def analyze_and_chart_cube(self, cube):
+        """
+        The analysis report plus both charts from one SentimentCube.
 
-        ax.set_title('Detailed Sentiment Trend Over Time', fontsize=20)
-        ax.set_xlabel('Date', fontsize=14)
-        ax.set_ylabel('Average VADER Compound Score', fontsize=14)
-        
-        # Improve legend
-        handles, labels = ax.get_legend_handles_labels()
-        ax.legend(handles, labels, title='Query', bbox_to_anchor=(1.05, 1), loc='upper left')
+        Every aggregate is sliced from the cube once and shared by the report
+        and the charts, which a headless renderer then draws in parallel.
+        """
+        if cube.empty:
+            print("Rollup is empty. No analysis to perform.")
+            return
+        aggregates = chart_aggregates(cube)
+        self._print_analysis(cube, aggregates)
+        self.renderer.render(aggregates)
 
-        ax.axhline(0, color='black', linewidth=0.8, linestyle='--') # Add a line for neutral sentiment
+    def analyze_and_chart(self, df):
+        """
+        analyze_and_chart_cube() for a DataFrame of scored rows; returns the cube it built.
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        chart_filename = f"{timestamp}_detailed_sentiment_trend.png"
-        
-        try:
-            fig.savefig(chart_filename, dpi=300, bbox_inches='tight', facecolor='white')
-            print(f"Detailed trend chart saved to {chart_filename}")
-        except Exception as e:
-            print(f"Error saving detailed trend chart: {e}")
+        Returns None, without a report, when the frame is empty or has no VADER scores.
+        """
+        if df.empty:
+            print("DataFrame is empty. No analysis to perform.")
+            return None
+        if not self._has_report_scores(df):
+            return None
+        self.add_report_columns(df)
+        cube = SentimentCube.from_frame(df)
+        self.analyze_and_chart_cube(cube)
+        return cube
 
-        plt.tight_layout()
-        plt.show()
+    def _print_analysis(self, cube, aggregates):
+        print("\n=== SENTIMENT ANALYSIS RESULTS ===")
+        print(f"Total posts analyzed: {cube.total}")
 
-    
+        print("\n--- Sentiment Distribution by Query ---")
+        print(aggregates['sentiment_by_query'])
 
     def save_results(self, df, filename=None):
         """Save results to CSV with timestamp"""
@@ -166,3 +300,27 @@ class SentimentProcessor:
         
         df.to_csv(filename, index=False)
         print(f"Results saved to {filename}")
+
+    def save_summary(self, cube, filename=None):
+        """Save the (day, query, source, sentiment_category) counts of a SentimentCube to CSV"""
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{timestamp}_sentiment_summary.csv"
+
+        cube.to_long().to_csv(filename, index=False)
+        print(f"Summary saved to {filename}")
+
+    def append_results(self, df, filename):
+        """
+        Append results to a CSV, writing the header only when the file is new.
+
+        Rows appended to an existing file are lined up with its header:
+        columns it doesn't have (e.g. cluster_id on a file started before
+        near-duplicate detection) are dropped, and ones it has are kept in place.
+        """
+        is_new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        if not is_new:
+            header = pd.read_csv(filename, nrows=0).columns.tolist()
+            df = df.reindex(columns=header)
+        df.to_csv(filename, index=False, mode='a', header=is_new)
+        return is_new
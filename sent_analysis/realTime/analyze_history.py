@@ -0,0 +1,129 @@
+import argparse
+import os
+
+import pandas as pd
+import pyarrow as pa
+from dotenv import load_dotenv
+
+from processor.cube import SentimentCube
+from storage.history_store import HistoryStore
+from storage.sql_store import SqlResultStore
+
+# Only these columns are needed for the aggregates, so nothing else is parsed
+ANALYSIS_COLUMNS = ['created_at', 'query', 'source', 'vader_compound', 'sentiment_category']
+
+def iter_csv_chunks(csv_path, chunk_size):
+    """The CSV history in chunks of chunk_size rows, reading only the analysis columns"""
+    yield from pd.read_csv(csv_path, usecols=ANALYSIS_COLUMNS, chunksize=chunk_size)
+
+def iter_parquet_chunks(root, chunk_size):
+    """The Parquet history store in chunks of about chunk_size rows"""
+    if not os.path.isdir(root):
+        return
+    dataset = HistoryStore(root).dataset()
+    # Every (date, source) partition file yields its own small batches, so they are regrouped into full chunks
+    pending, pending_rows = [], 0
+    for batch in dataset.to_batches(columns=ANALYSIS_COLUMNS, batch_size=chunk_size):
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= chunk_size:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, pending_rows = [], 0
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+def iter_sql_chunks(url, chunk_size):
+    """The SQL result store in chunks of chunk_size rows, selecting only the analysis columns"""
+    store = SqlResultStore(url)
+    try:
+        yield from store.iter_chunks(chunk_size, columns=ANALYSIS_COLUMNS)
+    finally:
+        store.close()
+
+def aggregate_history(chunks):
+    """
+    Fold chunks of scored rows into one SentimentCube.
+
+    Each chunk is reduced to its partial cube and merged into the running
+    total, so memory depends on the number of days, queries and sources, not
+    on the number of rows.
+    """
+    cube = SentimentCube()
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        cube = cube.merge(SentimentCube.from_frame(chunk))
+        print(f"Aggregated {rows} rows...")
+    return cube
+
+def print_history_report(cube):
+    """Print the distributions, averages and daily trends analyze_and_visualize reports"""
+    if cube.empty:
+        print("History is empty. No analysis to perform.")
+        return
+
+    print("\n=== SENTIMENT HISTORY ANALYSIS ===")
+    print(f"Total posts analyzed: {cube.total}")
+    print(f"Days covered: {cube.rollup['day'].min()} to {cube.rollup['day'].max()}")
+
+    print("\n--- Sentiment Distribution by Query ---")
+    print(cube.counts('query'))
+
+    print("\n--- Average Sentiment Score by Query ---")
+    print(cube.stats('query'))
+
+    print("\n--- Sentiment Distribution by Source ---")
+    print(cube.counts('query_source'))
+
+    print("\n--- Average Sentiment Score by Source ---")
+    print(cube.stats(['query', 'source']))
+
+    print("\n--- Daily Sentiment Trend ---")
+    print(cube.daily_means())
+
+def main():
+    """Analyze the accumulated real-time history without loading it into memory"""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Analyze the accumulated real-time sentiment history in fixed-size chunks.")
+    parser.add_argument('--backend', choices=['csv', 'parquet', 'sql'], default=os.getenv("HISTORY_BACKEND", "csv"),
+                        help="Where the history lives (default: HISTORY_BACKEND, else csv)")
+    parser.add_argument('--path', help="CSV file, Parquet store directory or database URL (default: the collector's output)")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Rows read per chunk")
+    parser.add_argument('--charts', action='store_true', help="Also draw the summary and trend charts")
+    parser.add_argument('--export', metavar='CSV', help="Write the (day, query, source, category) counts to a CSV")
+    args = parser.parse_args()
+
+    if args.backend == 'parquet':
+        path = args.path or os.getenv("HISTORY_STORE_PATH", "sentiment_history")
+        chunks = iter_parquet_chunks(path, args.chunk_size)
+    elif args.backend == 'sql':
+        path = args.path or os.getenv("RESULT_STORE_URL", "sqlite:///sentiment_results.db")
+        chunks = iter_sql_chunks(path, args.chunk_size)
+    else:
+        if args.path:
+            path = args.path
+        else:
+            # Imported only when needed: it pulls in every collector client library
+            from real_time_collector import OUTPUT_CSV_PATH
+            path = OUTPUT_CSV_PATH
+        if not os.path.exists(path):
+            print(f"No history found at {path}. Exiting.")
+            return
+        chunks = iter_csv_chunks(path, args.chunk_size)
+
+    print(f"--- Analyzing {args.backend} history at {path} ---")
+    cube = aggregate_history(chunks)
+    print_history_report(cube)
+
+    if args.export:
+        cube.to_long().to_csv(args.export, index=False)
+        print(f"Summary saved to {args.export}")
+
+    if args.charts and not cube.empty:
+        from processor.charts import renderer_from_env
+        from processor.sentiment_analyzer import SentimentProcessor
+        processor = SentimentProcessor(analyzers=[], renderer=renderer_from_env())
+        processor.analyze_and_chart_cube(cube)
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,134 @@
 from atproto import Client
-from datetime import datetime
-import re
-import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import threading
 
-def clean_text(text):
-    """Clean and preprocess text"""
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'[^\w\s.,!?]', '', text)
-    text = ' '.join(text.split())
-    return text.strip()
+from collectors.orchestrator import CollectionIncomplete, collect_available
+from collectors.rate_limit import get_limiter
+from collectors.text_cleaning import clean_many
 
-def collect_bluesky_data(bluesky_handle, bluesky_password, query, limit=100):
-    """Search Bluesky for posts"""
-    client = Client()
-    try:
-        client.login(bluesky_handle, bluesky_password)
-    except Exception as e:
-        print(f"Error logging into Bluesky: {e}")
-        return []
-
-    search_data = []
-    print(f"Searching Bluesky for '{query}'...")
-    
-    try:
-        response = client.app.bsky.feed.search_posts(params={'q': query, 'limit': limit})
-        for post in response.posts:
-            cleaned_text = clean_text(post.record.text)
+# app.bsky.feed.searchPosts returns at most 100 posts per call
+PAGE_SIZE = 100
+
+class BlueskyCollector:
+    """
+    Holds one logged-in Bluesky session and reuses it across queries.
+
+    Searches follow the response cursor until `limit` posts have been read,
+    fetching the next page in the background while the current one is cleaned.
+    """
+
+    def __init__(self, bluesky_handle, bluesky_password, dedup_index=None, watermarks=None, limiter=None,
+                 response_cache=None):
+        self.client = Client()
+        # Optional storage.dedup_index.DedupIndex; posts already stored are skipped before cleaning
+        self.dedup_index = dedup_index
+        # Optional storage.watermarks.WatermarkStore; when set, only posts newer than the last run are fetched
+        self.watermarks = watermarks
+        # Shared per-platform token bucket; login and every search page go through it
+        self.limiter = limiter or get_limiter('Bluesky')
+        # Optional collectors.response_cache.ResponseCache; search pages are cached per query and cursor
+        self.response_cache = response_cache
+        self._handle = bluesky_handle
+        self._password = bluesky_password
+        self._logged_in = False
+        self._login_lock = threading.Lock()
+
+    def login(self):
+        """Log in once; later calls reuse the session"""
+        with self._login_lock:
+            if not self._logged_in:
+                self.limiter.call(self.client.login, self._handle, self._password)
+                self._logged_in = True
+
+    def _fetch_page(self, query, page_limit, cursor, since=None):
+        params = {'q': query, 'limit': page_limit}
+        if cursor:
+            params['cursor'] = cursor
+        if since is not None:
+            params['sort'] = 'latest'
+            params['since'] = datetime.fromtimestamp(since, tz=timezone.utc).isoformat()
+        if self.response_cache is None:
+            return self._search_posts(params)
+        page = self.response_cache.fetch(
+            'Bluesky', 'app.bsky.feed.searchPosts', params, lambda: _page_to_dict(self._search_posts(params))
+        )
+        return _page_from_dict(page)
+
+    def _search_posts(self, params):
+        self.login()
+        return self.limiter.call(self.client.app.bsky.feed.search_posts, params=params)
+
+    def iter_search(self, query, limit=100):
+        """
+        Search Bluesky for up to `limit` posts, yielding records a page at a time.
+
+        A failed login or page is raised as CollectionIncomplete once the posts
+        fetched before it have been yielded.
+        """
+        # With a response cache, login waits until a page actually has to be fetched
+        if self.response_cache is None:
+            try:
+                self.login()
+            except Exception as e:
+                print(f"Error logging into Bluesky: {e}")
+                raise CollectionIncomplete(f"Bluesky login failed: {e}") from e
+
+        print(f"Searching Bluesky for '{query}'...")
+
+        since = self.watermarks.since('Bluesky', query) if self.watermarks is not None else None
+
+        remaining = limit
+        capped = False
+        error = None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='bluesky-prefetch') as prefetcher:
+            try:
+                next_page = prefetcher.submit(self._fetch_page, query, min(PAGE_SIZE, remaining), None, since)
+                while next_page is not None:
+                    response = next_page.result()
+                    posts = response.posts[:remaining]
+                    remaining -= len(posts)
+
+                    reached_watermark = False
+                    if since is not None:
+                        # Results are newest first; anything at or before the watermark was collected last time
+                        new_posts = [post for post in posts if _indexed_epoch(post) > since]
+                        reached_watermark = len(new_posts) < len(posts)
+                        posts = new_posts
+                    if self.watermarks is not None:
+                        for post in posts:
+                            self.watermarks.observe('Bluesky', query, _indexed_epoch(post), post.uri)
+
+                    next_page = None
+                    if response.cursor and posts and not reached_watermark:
+                        if remaining > 0:
+                            next_page = prefetcher.submit(
+                                self._fetch_page, query, min(PAGE_SIZE, remaining), response.cursor, since
+                            )
+                        else:
+                            capped = True
+
+                    yield from self._to_records(posts, query)
+            except Exception as e:
+                print(f"Error searching Bluesky: {e}")
+                error = e
+
+        if error is not None:
+            raise CollectionIncomplete(f"Bluesky search for '{query}' stopped after {limit - remaining} posts: {error}") from error
+        # Stopping at the limit with more pages left before the watermark would skip the posts on them
+        if self.watermarks is not None and since is not None and capped:
+            print(f"Bluesky search for '{query}' hit its limit of {limit} before the last run's newest post; "
+                  f"keeping the watermark")
+            self.watermarks.hold('Bluesky', query)
+
+    def _to_records(self, posts, query):
+        if self.dedup_index is not None:
+            posts = self.dedup_index.drop_seen(posts, key=lambda post: ('Bluesky', post.uri))
+        cleaned_texts = clean_many(post.record.text for post in posts)
+        for post, cleaned_text in zip(posts, cleaned_texts):
             if len(cleaned_text) > 10:
-                search_data.append({
+                yield {
                     'source': 'Bluesky',
                     'id': post.uri,
                     'text': cleaned_text,
@@ -39,8 +140,53 @@ def collect_bluesky_data(bluesky_handle, bluesky_password, query, limit=100):
                         'like_count': post.like_count,
                     },
                     'query': query
-                })
-    except Exception as e:
-        print(f"Error searching Bluesky: {e}")
-        
-    return search_data
+                }
+
+def _indexed_epoch(post):
+    indexed_at = datetime.fromisoformat(post.indexed_at.replace('Z', '+00:00'))
+    if indexed_at.tzinfo is None:
+        indexed_at = indexed_at.replace(tzinfo=timezone.utc)
+    return indexed_at.timestamp()
+
+def _page_to_dict(response):
+    """The searchPosts fields the collector reads, as plain JSON"""
+    return {
+        'cursor': response.cursor,
+        'posts': [
+            {
+                'uri': post.uri,
+                'indexed_at': post.indexed_at,
+                'text': post.record.text,
+                'author_handle': post.author.handle,
+                'reply_count': post.reply_count,
+                'repost_count': post.repost_count,
+                'like_count': post.like_count,
+            }
+            for post in response.posts
+        ],
+    }
+
+def _page_from_dict(page):
+    """A cached page with the same attributes as a searchPosts response"""
+    posts = [
+        SimpleNamespace(
+            uri=post['uri'],
+            indexed_at=post['indexed_at'],
+            record=SimpleNamespace(text=post['text']),
+            author=SimpleNamespace(handle=post['author_handle']),
+            reply_count=post['reply_count'],
+            repost_count=post['repost_count'],
+            like_count=post['like_count'],
+        )
+        for post in page['posts']
+    ]
+    return SimpleNamespace(cursor=page['cursor'], posts=posts)
+
+def collect_bluesky_data(bluesky_handle, bluesky_password, query, limit=100):
+    """Search Bluesky for posts"""
+    return collect_available(iter_bluesky_data(bluesky_handle, bluesky_password, query, limit))
+
+def iter_bluesky_data(bluesky_handle, bluesky_password, query, limit=100):
+    """Search Bluesky for posts, yielding records a page at a time"""
+    collector = BlueskyCollector(bluesky_handle, bluesky_password)
+    yield from collector.iter_search(query, limit)
@@ -1,65 +1,189 @@
 import praw
 from datetime import datetime
-import re
+from types import SimpleNamespace
 import time
 
-def clean_text(text):
-    """Clean and preprocess text"""
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'[^\w\s.,!?]', '', text)
-    text = ' '.join(text.split())
-    return text.strip()
+from collectors.orchestrator import CollectionIncomplete, collect_available
+from collectors.rate_limit import get_limiter, iter_limited
+from collectors.text_cleaning import clean_many
 
-def collect_reddit_data(client_id, client_secret, user_agent, query, subreddit_list=None, limit=100, time_filter='month'):
-    """Search Reddit for posts and comments"""
-    reddit = praw.Reddit(
-        client_id=client_id,
-        client_secret=client_secret,
-        user_agent=user_agent
-    )
-    
-    if subreddit_list is None:
-        subreddit_list = [
-            'worldnews', 'news', 'travel', 'soccer', 'football', 
-            'politics', 'geopolitics', 'UAE', 'Qatar', 'MiddleEast',
-            'dubai', 'AskReddit', 'todayilearned'
-        ]
-    
-    search_data = []
-    
-    for sub_name in subreddit_list:
+DEFAULT_SUBREDDITS = [
+    'worldnews', 'news', 'travel', 'soccer', 'football',
+    'politics', 'geopolitics', 'UAE', 'Qatar', 'MiddleEast',
+    'dubai', 'AskReddit', 'todayilearned'
+]
+
+# Reddit listings return at most 100 items per request
+PAGE_SIZE = 100
+
+# Search time filters from narrowest to widest, with the age (seconds) each covers
+TIME_FILTERS = [
+    ('hour', 3600),
+    ('day', 86400),
+    ('week', 7 * 86400),
+    ('month', 31 * 86400),
+    ('year', 366 * 86400),
+    ('all', float('inf')),
+]
+
+def narrowest_time_filter(since, widest='month'):
+    """Smallest search window that still reaches back to `since`, never wider than `widest`"""
+    age = time.time() - since
+    for name, span in TIME_FILTERS:
+        if age <= span or name == widest:
+            return name
+    return widest
+
+class RedditCollector:
+    """
+    Holds one authenticated Reddit session and reuses it across queries.
+
+    Each query is a single paginated search over the combined multireddit
+    (r/worldnews+news+...) instead of one search per subreddit; the posts are
+    attributed back to the subreddit they were actually posted in.
+    """
+
+    def __init__(self, client_id, client_secret, user_agent, subreddit_list=None, dedup_index=None, watermarks=None,
+                 limiter=None, response_cache=None):
+        self.reddit = praw.Reddit(
+            client_id=client_id,
+            client_secret=client_secret,
+            user_agent=user_agent
+        )
+        self.subreddit_list = list(subreddit_list or DEFAULT_SUBREDDITS)
+        # Optional storage.dedup_index.DedupIndex; posts already stored are skipped before cleaning
+        self.dedup_index = dedup_index
+        # Optional storage.watermarks.WatermarkStore; when set, only posts newer than the last run are fetched
+        self.watermarks = watermarks
+        # Shared per-platform token bucket; every page request goes through it
+        self.limiter = limiter or get_limiter('Reddit')
+        # Optional collectors.response_cache.ResponseCache; whole search results are cached per query and options
+        self.response_cache = response_cache
+
+    def iter_search(self, query, limit=100, time_filter='month'):
+        """
+        Search all subreddits for posts in one paginated request, yielding records a page at a time.
+
+        An error partway through is raised as CollectionIncomplete once the
+        posts fetched before it have been yielded.
+        """
+        print(f"Searching {len(self.subreddit_list)} subreddits for '{query}'...")
+
+        since = self.watermarks.since('Reddit', query) if self.watermarks is not None else None
+        search_options = {'limit': limit, 'time_filter': time_filter}
+        if since is not None:
+            # Newest first, in the narrowest window that reaches the watermark,
+            # so we can stop at the first post we have already collected
+            search_options = {'limit': limit, 'sort': 'new', 'time_filter': narrowest_time_filter(since, time_filter)}
+
+        posts = []
+        full_texts = []
+        listed = 0
+        reached_watermark = False
+        error = None
         try:
-            subreddit = reddit.subreddit(sub_name)
-            print(f"Searching r/{sub_name} for '{query}'...")
-            
-            for post in subreddit.search(query, limit=limit//len(subreddit_list), time_filter=time_filter):
+            for post in self._search(query, search_options):
+                if since is not None and post.created_utc <= since:
+                    reached_watermark = True
+                    break
+                listed += 1
+                if self.watermarks is not None:
+                    self.watermarks.observe('Reddit', query, post.created_utc, post.id)
+
                 if post.selftext == '[removed]' or post.selftext == '[deleted]':
                     continue
-                
+
                 full_text = f"{post.title} {post.selftext}".strip()
-                
+
                 if len(full_text) > 10:
-                    cleaned_text = clean_text(full_text)
-                    
-                    search_data.append({
-                        'source': 'Reddit',
-                        'id': post.id,
-                        'text': cleaned_text,
-                        'author': post.author.name if post.author else '[deleted]',
-                        'created_at': datetime.fromtimestamp(post.created_utc),
-                        'source_specific_metrics': {
-                            'score': post.score,
-                            'upvote_ratio': post.upvote_ratio,
-                            'num_comments': post.num_comments,
-                            'subreddit': sub_name
-                        },
-                        'query': query
-                    })
-            
-            time.sleep(0.1)
-            
+                    posts.append(post)
+                    full_texts.append(full_text)
+
+                if len(posts) >= PAGE_SIZE:
+                    yield from self._to_records(posts, full_texts, query)
+                    posts, full_texts = [], []
         except Exception as e:
-            print(f"Error searching r/{sub_name}: {e}")
-            continue
-            
-    return search_data
+            print(f"Error searching Reddit for '{query}': {e}")
+            error = e
+
+        yield from self._to_records(posts, full_texts, query)
+        if error is not None:
+            raise CollectionIncomplete(f"Reddit search for '{query}' stopped after {listed} posts: {error}") from error
+        # A full listing that never got back to the watermark may have left older new posts unfetched
+        if self.watermarks is not None and since is not None and not reached_watermark and listed >= limit:
+            print(f"Reddit search for '{query}' hit its limit of {limit} before the last run's newest post; "
+                  f"keeping the watermark")
+            self.watermarks.hold('Reddit', query)
+
+    def _search(self, query, search_options):
+        """Posts for one multireddit search, from the response cache when there is one"""
+        listing = self.reddit.subreddit('+'.join(self.subreddit_list)).search(query, **search_options)
+        if self.response_cache is None:
+            return iter_limited(self.limiter, listing, PAGE_SIZE)
+        params = dict(search_options, q=query, subreddits=sorted(self.subreddit_list))
+        posts = self.response_cache.fetch('Reddit', 'search', params, lambda: [
+            _post_to_dict(post) for post in iter_limited(self.limiter, listing, PAGE_SIZE)
+        ])
+        return (_post_from_dict(post) for post in posts)
+
+    def search(self, query, limit=100, time_filter='month'):
+        """Search all subreddits and return the records grouped by subreddit"""
+        return split_by_subreddit(collect_available(self.iter_search(query, limit, time_filter)))
+
+    def _to_records(self, posts, full_texts, query):
+        if self.dedup_index is not None:
+            pairs = self.dedup_index.drop_seen(zip(posts, full_texts), key=lambda pair: ('Reddit', pair[0].id))
+            posts = [post for post, _ in pairs]
+            full_texts = [full_text for _, full_text in pairs]
+        for post, cleaned_text in zip(posts, clean_many(full_texts)):
+            yield {
+                'source': 'Reddit',
+                'id': post.id,
+                'text': cleaned_text,
+                'author': post.author.name if post.author else '[deleted]',
+                'created_at': datetime.fromtimestamp(post.created_utc),
+                'source_specific_metrics': {
+                    'score': post.score,
+                    'upvote_ratio': post.upvote_ratio,
+                    'num_comments': post.num_comments,
+                    'subreddit': post.subreddit.display_name
+                },
+                'query': query
+            }
+
+def _post_to_dict(post):
+    """The submission fields the collector reads, as plain JSON"""
+    return {
+        'id': post.id,
+        'title': post.title,
+        'selftext': post.selftext,
+        'author': post.author.name if post.author else None,
+        'created_utc': post.created_utc,
+        'score': post.score,
+        'upvote_ratio': post.upvote_ratio,
+        'num_comments': post.num_comments,
+        'subreddit': post.subreddit.display_name,
+    }
+
+def _post_from_dict(data):
+    """A cached post with the same attributes as a praw Submission"""
+    post = SimpleNamespace(**data)
+    post.author = SimpleNamespace(name=data['author']) if data['author'] else None
+    post.subreddit = SimpleNamespace(display_name=data['subreddit'])
+    return post
+
+def split_by_subreddit(records):
+    """Group Reddit records by the subreddit each post came from"""
+    by_subreddit = {}
+    for record in records:
+        by_subreddit.setdefault(record['source_specific_metrics']['subreddit'], []).append(record)
+    return by_subreddit
+
+def collect_reddit_data(client_id, client_secret, user_agent, query, subreddit_list=None, limit=100, time_filter='month'):
+    """Search Reddit for posts and comments"""
+    return collect_available(iter_reddit_data(client_id, client_secret, user_agent, query, subreddit_list, limit, time_filter))
+
+def iter_reddit_data(client_id, client_secret, user_agent, query, subreddit_list=None, limit=100, time_filter='month'):
+    """Search Reddit for posts, yielding records a page at a time"""
+    collector = RedditCollector(client_id, client_secret, user_agent, subreddit_list)
+    yield from collector.iter_search(query, limit, time_filter)
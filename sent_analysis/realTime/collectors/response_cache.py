@@ -0,0 +1,124 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a request has no cached response"""
+
+class ResponseCache:
+    """
+    On-disk cache of collector API responses, keyed by platform, endpoint and parameters.
+
+    Responses are stored as compressed JSON in a local SQLite file. Entries
+    older than ttl seconds are refetched; once the file holds more than
+    max_bytes of responses the least recently used ones are evicted. With
+    offline=True every cached entry is served regardless of age and anything
+    missing raises CacheMiss instead of touching the network.
+    """
+
+    def __init__(self, path='api_response_cache.db', ttl=3600, max_bytes=256 * 2 ** 20, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # Collectors call in from worker threads; the lock serializes access
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key BLOB PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self.conn.commit()
+        self._bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(platform, endpoint, params):
+        """Hash of the platform, endpoint and canonical JSON of the parameters"""
+        canonical = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.blake2b(f"{platform}\0{endpoint}\0{canonical}".encode('utf-8'), digest_size=16).digest()
+
+    def get(self, platform, endpoint, params):
+        """The cached response, or None if there is none (or it has expired and we're online)"""
+        key = self.make_key(platform, endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT body, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (not self.offline and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, platform, endpoint, params, response):
+        """Store a JSON-serializable response"""
+        key = self.make_key(platform, endpoint, params)
+        body = zlib.compress(json.dumps(response, default=str).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, body, size, fetched_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, f"{platform}:{endpoint}", body, len(body), now, now)
+            )
+            self.conn.commit()
+            self._bytes += len(body) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def fetch(self, platform, endpoint, params, fetch):
+        """
+        Serve from the cache, or call fetch() and store what it returns.
+
+        fetch must return something JSON-serializable. Offline, a miss raises
+        CacheMiss.
+        """
+        cached = self.get(platform, endpoint, params)
+        if cached is not None:
+            return cached
+        if self.offline:
+            raise CacheMiss(f"No cached {platform} {endpoint} response for {params}")
+        response = fetch()
+        self.put(platform, endpoint, params, response)
+        return response
+
+    def _evict(self):
+        """Drop least recently used responses until the file is back under 90% of max_bytes"""
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if self._bytes - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.conn.commit()
+        self._bytes -= freed
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'bytes': self._bytes,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,33 @@
+import re
+
+from processor.instrumentation import get_metrics
+
+# Matches the old `re.sub(r'http\S+|www\S+|https\S+', ...)` pass
+_URL_PATTERN = re.compile(r'(?:http|www)\S+')
+
+# Runs of anything that is not a word character, whitespace or basic punctuation
+_SYMBOL_PATTERN = re.compile(r'[^\w\s.,!?]+')
+
+# The same symbol filter as a str.translate table. Most posts are pure ASCII
+# and translate() strips them far faster than the regex engine does.
+_ASCII_SYMBOLS = {
+    code: None for code in range(128)
+    if not re.match(r'[\w\s.,!?]', chr(code))
+}
+
+def clean_text(text):
+    """Clean and preprocess text"""
+    if 'http' in text or 'www' in text:
+        text = _URL_PATTERN.sub('', text)
+    if text.isascii():
+        text = text.translate(_ASCII_SYMBOLS)
+    else:
+        text = _SYMBOL_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+def clean_many(texts):
+    """Clean an iterable of texts, returning a list in the same order"""
+    with get_metrics().timer('clean') as timer:
+        cleaned = [clean_text(text) for text in texts]
+        timer.items = len(cleaned)
+    return cleaned
@@ -0,0 +1,144 @@
+import argparse
+import ast
+import json
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns stored as categoricals
+CATEGORICAL_COLUMNS = ['source', 'query', 'author', 'sentiment_category']
+
+# Timestamp columns stored as int64 milliseconds since the Unix epoch, UTC
+TIMESTAMP_COLUMNS = ['created_at', 'collection_timestamp_utc']
+UNIX_EPOCH = pd.Timestamp(0, tz='UTC')
+
+# Analyzer output columns, stored as float32
+SCORE_COLUMNS = [
+    'textblob_polarity', 'textblob_subjectivity',
+    'vader_positive', 'vader_negative', 'vader_neutral', 'vader_compound',
+]
+
+# Every key the collectors put in source_specific_metrics, with the nullable
+# dtype of its flattened metric_<key> column. Platforms that don't report a
+# metric leave it <NA> instead of an empty dict entry.
+METRIC_DTYPES = {
+    'score': 'Int32',
+    'upvote_ratio': 'Float32',
+    'num_comments': 'Int32',
+    'subreddit': 'category',
+    'reply_count': 'Int32',
+    'repost_count': 'Int32',
+    'like_count': 'Int32',
+    'video_id': 'category',
+}
+
+def compact_frame(df):
+    """
+    Normalize a scored DataFrame into a compact, typed layout.
+
+    source/query/author/sentiment_category become categoricals, scores become
+    float32, timestamps become int64 UTC epoch milliseconds (naive values are
+    taken as UTC, as the charts always have), and source_specific_metrics is
+    flattened into nullable metric_<key> columns. Other columns pass through.
+    """
+    compact = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        if column == 'source_specific_metrics':
+            for name, values in flatten_metrics(df[column]).items():
+                compact[name] = values
+        elif column in CATEGORICAL_COLUMNS:
+            compact[column] = df[column].astype('category')
+        elif column in TIMESTAMP_COLUMNS:
+            compact[column] = to_epoch_ms(df[column])
+        elif column in SCORE_COLUMNS:
+            compact[column] = df[column].astype(np.float32)
+        else:
+            compact[column] = df[column]
+    return compact
+
+def to_epoch_ms(values):
+    """Datetimes (naive, tz-aware, mixed or ISO strings) as int64 UTC epoch milliseconds"""
+    timestamps = pd.to_datetime(values, utc=True, format='mixed')
+    epoch_ms = (timestamps - UNIX_EPOCH) // pd.Timedelta(milliseconds=1)
+    if timestamps.isna().any():
+        # Missing timestamps stay <NA> rather than forcing the column to float
+        return epoch_ms.astype('Int64')
+    return epoch_ms.astype(np.int64)
+
+def created_at_utc(values):
+    """UTC datetimes from either layout: epoch milliseconds or the original datetime values"""
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return pd.to_datetime(values, unit='ms', utc=True)
+    return pd.to_datetime(values, utc=True, format='mixed')
+
+def flatten_metrics(metrics):
+    """Spread a column of metric dicts (or their JSON/repr strings) into typed metric_<key> columns"""
+    dicts = [_as_dict(value) for value in metrics]
+    keys = sorted({key for value in dicts for key in value})
+    columns = {}
+    for key in keys:
+        values = pd.Series([value.get(key) for value in dicts], index=metrics.index, dtype=object)
+        dtype = METRIC_DTYPES.get(key)
+        if dtype is None:
+            # A metric added to a collector but not listed above still comes through, just untyped
+            columns[f'metric_{key}'] = values
+        elif dtype == 'category':
+            columns[f'metric_{key}'] = values.astype('category')
+        else:
+            columns[f'metric_{key}'] = pd.to_numeric(values, errors='coerce').astype(dtype)
+    return columns
+
+def nest_metrics(df):
+    """The source_specific_metrics dicts back from a compact frame's metric_<key> columns, leaving out <NA>s"""
+    columns = [column for column in df.columns if column.startswith('metric_')]
+    values = {column[len('metric_'):]: df[column].tolist() for column in columns}
+    return pd.Series([
+        {key: column[i] for key, column in values.items() if not pd.isna(column[i])}
+        for i in range(len(df))
+    ], index=df.index, dtype=object)
+
+def _as_dict(value):
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str):
+        return {}
+    try:
+        # Parquet history stores JSON; the CSV holds the Python repr
+        return json.loads(value)
+    except ValueError:
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return {}
+
+def memory_report(df, compact=None):
+    """Deep memory use per column of the original and compact layouts, with a total row"""
+    if compact is None:
+        compact = compact_frame(df)
+    report = pd.DataFrame({
+        'original_bytes': df.memory_usage(deep=True, index=False),
+        'compact_bytes': compact.memory_usage(deep=True, index=False),
+        'original_dtype': df.dtypes.astype(str),
+        'compact_dtype': compact.dtypes.astype(str),
+    })
+    report.loc['TOTAL', ['original_bytes', 'compact_bytes']] = [
+        report['original_bytes'].sum(), report['compact_bytes'].sum()
+    ]
+    report['ratio'] = report['original_bytes'] / report['compact_bytes']
+    return report
+
+def print_memory_report(df, compact=None):
+    """Print memory_report() in MiB"""
+    report = memory_report(df, compact)
+    for column in ['original_bytes', 'compact_bytes']:
+        report[column] = report[column] / 2 ** 20
+    report = report.rename(columns={'original_bytes': 'original_mib', 'compact_bytes': 'compact_mib'})
+    with pd.option_context('display.float_format', '{:.2f}'.format, 'display.width', 120, 'display.max_columns', None):
+        print(report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the memory used by a sentiment CSV in the default and compact layouts.")
+    parser.add_argument('csv_path', help="Scored CSV, e.g. realTime/sentiment_data.csv")
+    parser.add_argument('--nrows', type=int, help="Only read the first N rows")
+    args = parser.parse_args()
+    print_memory_report(pd.read_csv(args.csv_path, nrows=args.nrows))
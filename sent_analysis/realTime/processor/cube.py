@@ -0,0 +1,92 @@
+import pandas as pd
+
+from processor.rollups import (
+    CATEGORY_COLUMNS, ROLLUP_KEYS, category_counts, compound_stats, daily_means, empty_rollup, merge_rollups, summarize,
+)
+
+class SentimentCube:
+    """
+    Sentiment counts and compound totals over (day, query, source, category), built in one pass.
+
+    The cube is stored as a rollup: one row per (day, query, source) with the
+    category as count columns, so it is small enough that every report, chart
+    and export is a cheap slice of it instead of another scan of the rows.
+    """
+
+    def __init__(self, rollup=None):
+        self.rollup = empty_rollup() if rollup is None else rollup
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the cube from scored rows with a single groupby"""
+        return cls(summarize(df))
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Build the cube from an iterable of scored DataFrames, one chunk in memory at a time"""
+        cube = cls()
+        for chunk in chunks:
+            cube = cube.merge(cls.from_frame(chunk))
+        return cube
+
+    def merge(self, other):
+        """A cube covering the rows of both"""
+        return SentimentCube(merge_rollups([self.rollup, other.rollup]))
+
+    @property
+    def empty(self):
+        return self.rollup.empty
+
+    @property
+    def total(self):
+        """Number of rows counted"""
+        return int(self.rollup['n'].sum())
+
+    def slice(self, query=None, source=None, start=None, end=None):
+        """
+        The sub-cube for some queries and sources and a day range.
+
+        query and source take a value or a list; start and end are
+        'YYYY-MM-DD' days, both inclusive as in RollupStore.read().
+        """
+        mask = pd.Series(True, index=self.rollup.index)
+        if query is not None:
+            mask &= self.rollup['query'].isin(_as_list(query))
+        if source is not None:
+            mask &= self.rollup['source'].isin(_as_list(source))
+        if start is not None:
+            mask &= self.rollup['day'] >= str(start)[:10]
+        if end is not None:
+            mask &= self.rollup['day'] <= str(end)[:10]
+        return SentimentCube(self.rollup[mask].reset_index(drop=True))
+
+    def with_query_source(self):
+        """The rollup with the 'query - source' label the reports group by"""
+        return self.rollup.assign(query_source=self.rollup['query'] + ' - ' + self.rollup['source'])
+
+    def counts(self, by):
+        """Rows per sentiment category for each group in `by` (any of day, query, source, query_source)"""
+        rollup = self.with_query_source() if 'query_source' in _as_list(by) else self.rollup
+        return category_counts(rollup, by)
+
+    def stats(self, by):
+        """Count, mean and standard deviation of vader_compound for each group in `by`"""
+        rollup = self.with_query_source() if 'query_source' in _as_list(by) else self.rollup
+        return compound_stats(rollup, by)
+
+    def daily_means(self):
+        """Mean vader_compound per day (rows) and query (columns)"""
+        return daily_means(self.rollup)
+
+    def to_long(self):
+        """The cube as one row per (day, query, source, sentiment_category) with its count, for export"""
+        long = self.rollup.melt(
+            id_vars=ROLLUP_KEYS, value_vars=list(CATEGORY_COLUMNS.values()),
+            var_name='sentiment_category', value_name='count'
+        )
+        long['sentiment_category'] = long['sentiment_category'].map({v: k for k, v in CATEGORY_COLUMNS.items()})
+        long = long[long['count'] > 0]
+        return long.sort_values(ROLLUP_KEYS + ['sentiment_category']).reset_index(drop=True)
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
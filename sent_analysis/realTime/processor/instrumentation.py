@@ -0,0 +1,240 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Prefix of every exported Prometheus metric
+METRIC_PREFIX = 'sentiment_pipeline'
+
+class StageStats:
+    """Running totals for one (stage, labels) series: calls, seconds, items handled and errors"""
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        # Slowest call since the current cycle began
+        self.cycle_max_seconds = 0.0
+        self.items = 0
+        self.errors = 0
+
+    def add(self, seconds, items=0, error=False):
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.cycle_max_seconds = max(self.cycle_max_seconds, seconds)
+        self.items += items
+        self.errors += int(error)
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'max_seconds': round(self.max_seconds, 6),
+            'cycle_max_seconds': round(self.cycle_max_seconds, 6),
+            'items': self.items,
+            'errors': self.errors,
+            'seconds_per_call': round(self.seconds / self.calls, 6) if self.calls else None,
+            'seconds_per_item': round(self.seconds / self.items, 9) if self.items else None,
+        }
+
+class Timer:
+    """Handed out by Instrumentation.timer(); set .items to the number of things the block handled"""
+
+    def __init__(self):
+        self.items = 0
+        self.error = False
+
+class Instrumentation:
+    """
+    Thread-safe per-stage timings for collection cycles.
+
+    Stages are free-form names ('request', 'collect', 'clean', 'score',
+    'write', ...) with optional labels such as platform or sink. Totals are
+    cumulative for the life of the process, which is what Prometheus expects
+    of counters; begin_cycle() marks where the current cycle started so
+    cycle_summary() can report just that cycle.
+
+    With a profile_path, profile() blocks run under cProfile and
+    dump_profile() writes the accumulated stats for pstats or snakeviz.
+    """
+
+    def __init__(self, profile_path=None):
+        self._stats = {}
+        self._cycle_start = {}
+        self._cycle_started_at = time.time()
+        self._lock = threading.Lock()
+        self.profile_path = profile_path
+        self._profiler = cProfile.Profile() if profile_path else None
+        self._profiling = threading.Lock()
+
+    @staticmethod
+    def _key(stage, labels):
+        return stage, tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def record(self, stage, seconds, items=0, error=False, **labels):
+        """Add one timed call to a stage"""
+        key = self._key(stage, labels)
+        with self._lock:
+            if key not in self._stats:
+                self._stats[key] = StageStats()
+            self._stats[key].add(seconds, items, error)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """
+        Time a block as one call to `stage`.
+
+        An exception escaping the block is counted as an error and re-raised.
+        """
+        timer = Timer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        except Exception:
+            timer.error = True
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, timer.items, timer.error, **labels)
+
+    @contextmanager
+    def profile(self):
+        """Run a block under cProfile when profiling is on; a no-op otherwise"""
+        # cProfile can only profile one thread at a time, so concurrent blocks run unprofiled
+        if self._profiler is None or not self._profiling.acquire(blocking=False):
+            yield
+            return
+        self._profiler.enable()
+        try:
+            yield
+        finally:
+            self._profiler.disable()
+            self._profiling.release()
+
+    def dump_profile(self):
+        """Write the profile gathered so far to profile_path"""
+        if self._profiler is None:
+            return
+        with self._profiling:
+            self._profiler.dump_stats(self.profile_path)
+        print(f"Scoring profile written to {self.profile_path}")
+
+    def begin_cycle(self):
+        """Mark the start of a cycle for cycle_summary()"""
+        with self._lock:
+            self._cycle_start = {key: stats.as_dict() for key, stats in self._stats.items()}
+            self._cycle_started_at = time.time()
+            for stats in self._stats.values():
+                stats.cycle_max_seconds = 0.0
+
+    def snapshot(self):
+        """{(stage, labels): totals dict} for the life of the process"""
+        with self._lock:
+            return {key: stats.as_dict() for key, stats in self._stats.items()}
+
+    def cycle_summary(self, **extra):
+        """JSON-ready summary of everything recorded since begin_cycle(), plus any extra fields"""
+        current = self.snapshot()
+        with self._lock:
+            start = dict(self._cycle_start)
+            started_at = self._cycle_started_at
+
+        stages = []
+        for (stage, labels), totals in sorted(current.items()):
+            totals = _difference(totals, start.get((stage, labels)))
+            if totals['calls'] == 0:
+                continue
+            stages.append(dict({'stage': stage, 'labels': dict(labels)}, **totals))
+        return dict({
+            'started_at': datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'stages': stages,
+        }, **extra)
+
+    def write_json(self, path, **extra):
+        """Write cycle_summary() to path as JSON"""
+        _write_atomic(path, json.dumps(self.cycle_summary(**extra), indent=2))
+
+    def write_prometheus(self, path):
+        """
+        Write the cumulative totals as a Prometheus textfile (for node_exporter's textfile collector).
+
+        The file is replaced atomically so the exporter never reads half of it.
+        """
+        snapshot = self.snapshot()
+        series = [
+            ('calls_total', 'counter', 'Timed calls per stage', 'calls'),
+            ('seconds_total', 'counter', 'Seconds spent per stage', 'seconds'),
+            ('items_total', 'counter', 'Items (requests, records) handled per stage', 'items'),
+            ('errors_total', 'counter', 'Failed calls per stage', 'errors'),
+            ('max_seconds', 'gauge', 'Slowest single call per stage', 'max_seconds'),
+        ]
+        lines = []
+        for suffix, kind, help_text, field in series:
+            name = f"{METRIC_PREFIX}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (stage, labels), totals in sorted(snapshot.items()):
+                label_text = ','.join(
+                    f'{label}="{_escape(value)}"' for label, value in (('stage', stage),) + labels
+                )
+                lines.append(f"{name}{{{label_text}}} {totals[field]}")
+        lines.append(f"# HELP {METRIC_PREFIX}_last_export_timestamp_seconds Unix time of the last export")
+        lines.append(f"# TYPE {METRIC_PREFIX}_last_export_timestamp_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}_last_export_timestamp_seconds {time.time():.3f}")
+        _write_atomic(path, '\n'.join(lines) + '\n')
+
+    def export(self, json_path=None, prometheus_path=None, **extra):
+        """Write whichever of the JSON summary and Prometheus textfile are configured, plus the profile"""
+        try:
+            if json_path:
+                self.write_json(json_path, **extra)
+                print(f"Cycle metrics written to {json_path}")
+            if prometheus_path:
+                self.write_prometheus(prometheus_path)
+            self.dump_profile()
+        except Exception as e:
+            print(f"Error exporting metrics: {e}")
+
+def _difference(totals, before=None):
+    """A series' totals since `before` (its totals when the cycle began), with per-cycle max"""
+    before = before or {'calls': 0, 'seconds': 0.0, 'items': 0, 'errors': 0}
+    calls = totals['calls'] - before['calls']
+    seconds = totals['seconds'] - before['seconds']
+    items = totals['items'] - before['items']
+    return {
+        'calls': calls,
+        'seconds': round(seconds, 6),
+        'max_seconds': totals['cycle_max_seconds'],
+        'items': items,
+        'errors': totals['errors'] - before['errors'],
+        'seconds_per_call': round(seconds / calls, 6) if calls else None,
+        'seconds_per_item': round(seconds / items, 9) if items else None,
+    }
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _write_atomic(path, text):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """
+    The process-wide Instrumentation every stage records into.
+
+    PROFILE_SCORING_PATH, when set, turns on cProfile capture of the scoring hot path.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Instrumentation(profile_path=os.getenv("PROFILE_SCORING_PATH") or None)
+        return _metrics
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from processor.compact import created_at_utc
+
+# Rollup rows are keyed by UTC day, query and source
+ROLLUP_KEYS = ['day', 'query', 'source']
+
+# sentiment_category value -> rollup count column
+CATEGORY_COLUMNS = {
+    'Positive': 'positive',
+    'Neutral': 'neutral',
+    'Negative': 'negative',
+}
+
+# Additive measures, so partial rollups merge by summing
+ROLLUP_MEASURES = ['n', 'compound_sum', 'compound_sumsq'] + list(CATEGORY_COLUMNS.values())
+
+def summarize(df):
+    """
+    Collapse scored rows into one rollup row per (day, query, source).
+
+    Each row holds the count, sum and sum of squares of vader_compound and the
+    number of rows in each sentiment category. All measures are additive, so
+    rollups of separate chunks combine exactly with merge_rollups().
+    """
+    if df.empty:
+        return empty_rollup()
+
+    compound = df['vader_compound'].to_numpy(dtype=np.float64)
+    parts = pd.DataFrame({
+        # Grouped as datetimes and formatted once per group, not once per row
+        'day': created_at_utc(df['created_at']).dt.floor('D').to_numpy(),
+        'query': df['query'].astype(str).to_numpy(),
+        'source': df['source'].astype(str).to_numpy(),
+        'n': 1,
+        'compound_sum': compound,
+        'compound_sumsq': compound * compound,
+    })
+    categories = df['sentiment_category'].astype(str).to_numpy()
+    for category, column in CATEGORY_COLUMNS.items():
+        parts[column] = (categories == category).astype(np.int64)
+
+    rollup = parts.groupby(ROLLUP_KEYS, as_index=False, sort=True)[ROLLUP_MEASURES].sum()
+    rollup['day'] = rollup['day'].dt.strftime('%Y-%m-%d')
+    return rollup
+
+def empty_rollup():
+    """A rollup frame with no rows"""
+    frame = pd.DataFrame({key: pd.Series(dtype=object) for key in ROLLUP_KEYS})
+    for measure in ROLLUP_MEASURES:
+        frame[measure] = pd.Series(dtype=np.float64 if measure.startswith('compound') else np.int64)
+    return frame
+
+def merge_rollups(rollups):
+    """Combine partial rollups (e.g. one per chunk) into one"""
+    rollups = [rollup for rollup in rollups if not rollup.empty]
+    if not rollups:
+        return empty_rollup()
+    combined = pd.concat(rollups, ignore_index=True)
+    return combined.groupby(ROLLUP_KEYS, as_index=False, sort=True)[ROLLUP_MEASURES].sum()
+
+def compound_stats(rollup, by):
+    """Count, mean and sample standard deviation of vader_compound for each group in `by`"""
+    totals = rollup.groupby(by)[['n', 'compound_sum', 'compound_sumsq']].sum()
+    n = totals['n']
+    mean = totals['compound_sum'] / n
+    variance = (totals['compound_sumsq'] - n * mean * mean) / (n - 1)
+    return pd.DataFrame({
+        'n': n,
+        'mean': mean,
+        # Rounding can push a near-zero variance slightly negative
+        'std': np.sqrt(variance.clip(lower=0)).where(n > 1),
+    })
+
+def category_counts(rollup, by):
+    """Rows per sentiment category for each group in `by`, with categories as columns"""
+    counts = rollup.groupby(by)[list(CATEGORY_COLUMNS.values())].sum()
+    counts.columns = pd.Index(list(CATEGORY_COLUMNS.keys()), name='sentiment_category')
+    # Same column order groupby().size().unstack() produced on raw rows
+    return counts[sorted(counts.columns)]
+
+def daily_means(rollup):
+    """Mean vader_compound per day (rows, as dates) and query (columns)"""
+    means = compound_stats(rollup, ['day', 'query'])['mean'].unstack()
+    means.index = pd.to_datetime(means.index).date
+    means.index.name = 'date'
+    return means
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+# Hits whose last_used update is held back until this many have piled up
+TOUCH_BATCH = 1000
+
+class ScoreCache:
+    """
+    Content-addressed cache of sentiment scores.
+
+    Entries are keyed on a hash of the cleaned text plus an analyzer-version tag,
+    so upgrading an analyzer never serves stale scores. Scores live in a local
+    SQLite file with an in-memory LRU in front of it; once the file holds more
+    than max_entries rows the least recently used ones are evicted. Hits on
+    either tier refresh a row's last_used, written in batches.
+    """
+
+    def __init__(self, path='sentiment_score_cache.db', max_entries=1_000_000, memory_entries=50_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        # key -> time of its latest hit, not yet written to last_used
+        self._touched = {}
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scores (
+                key BLOB PRIMARY KEY,
+                scores TEXT NOT NULL,
+                last_used INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_last_used ON scores (last_used)")
+        self.conn.commit()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    @staticmethod
+    def make_key(text, version):
+        """Hash of the analyzer-version tag and the text"""
+        return hashlib.blake2b(f"{version}\0{text}".encode('utf-8'), digest_size=16).digest()
+
+    def _remember(self, key, scores):
+        self._memory[key] = scores
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts, version):
+        """Return a list aligned with texts holding cached score dicts, or None for misses"""
+        keys = [self.make_key(text, version) for text in texts]
+        results = [None] * len(keys)
+        pending = {}
+        now = int(time.time())
+
+        for i, key in enumerate(keys):
+            scores = self._memory.get(key)
+            if scores is not None:
+                self._memory.move_to_end(key)
+                results[i] = scores
+                # Memory hits count as uses too, or evict() would drop the hottest rows first
+                self._touched[key] = now
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            found = []
+            pending_keys = list(pending)
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(pending_keys), 500):
+                batch = pending_keys[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                found.extend(self.conn.execute(
+                    f"SELECT key, scores FROM scores WHERE key IN ({placeholders})", batch
+                ).fetchall())
+
+            for key, payload in found:
+                scores = json.loads(payload)
+                self._remember(key, scores)
+                self._touched[key] = now
+                for i in pending[key]:
+                    results[i] = scores
+
+        if len(self._touched) >= TOUCH_BATCH:
+            self._flush_touched()
+            self.conn.commit()
+
+        n_hits = sum(result is not None for result in results)
+        self.hits += n_hits
+        self.misses += len(results) - n_hits
+        return results
+
+    def put_many(self, texts, scores_list, version):
+        """Store one score dict per text"""
+        now = int(time.time())
+        rows = []
+        for text, scores in zip(texts, scores_list):
+            key = self.make_key(text, version)
+            self._remember(key, scores)
+            rows.append((key, json.dumps(scores), now))
+
+        cursor = self.conn.executemany(
+            "INSERT OR IGNORE INTO scores (key, scores, last_used) VALUES (?, ?, ?)", rows
+        )
+        self._count += max(cursor.rowcount, 0)
+        self._flush_touched()
+        self.conn.commit()
+        if self._count > self.max_entries:
+            self.evict()
+
+    def get(self, text, version):
+        """Return the cached score dict for a single text, or None"""
+        return self.get_many([text], version)[0]
+
+    def put(self, text, scores, version):
+        """Store the score dict for a single text"""
+        self.put_many([text], [scores], version)
+
+    def _flush_touched(self):
+        """Write the pending last_used updates; the caller commits"""
+        if self._touched:
+            self.conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?",
+                                  [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def evict(self):
+        """Drop least recently used rows until the file is back under 90% of max_entries"""
+        target = int(self.max_entries * 0.9)
+        excess = self._count - target
+        if excess <= 0:
+            return
+        self._flush_touched()
+        self.conn.execute(
+            "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self.conn.commit()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self._count,
+        }
+
+    def close(self):
+        self._flush_touched()
+        self.conn.commit()
+        self.conn.close()
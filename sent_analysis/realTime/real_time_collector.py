@@ -1,24 +1,32 @@
-
+import argparse
 import os
+import signal
+import threading
 import pandas as pd
 from datetime import datetime
+from functools import partial
 from dotenv import load_dotenv
 
 # It's better to import from the copied collectors and processor
-from collectors.reddit_collector import collect_reddit_data
-from collectors.bluesky_collector import collect_bluesky_data
-from collectors.youtube_collector import collect_youtube_data
+from collectors.orchestrator import CollectionJob, iter_job_records
+from collectors.reddit_collector import RedditCollector
+from collectors.bluesky_collector import BlueskyCollector
+from collectors.youtube_collector import QuotaTracker, YouTubeCollector
+from processor.instrumentation import get_metrics
+from processor.near_duplicates import NearDuplicateIndex
+from processor.score_cache import ScoreCache
 from processor.sentiment_analyzer import SentimentProcessor
+from scheduler import IntervalScheduler
+from storage.dedup_index import DedupIndex
+from storage.history_store import HistoryStore
+from storage.rollup_store import RollupStore
+from storage.sql_store import SqlResultStore
+from storage.watermarks import WatermarkStore
 
-def run_collection_cycle():
-    """
-    Runs a single cycle of data collection, processing, and saving.
-    This function is designed to be called by a scheduler (like a cron job or GitHub Actions).
-    """
-    load_dotenv()
-    print(f"--- Running data collection cycle at {datetime.utcnow().isoformat()} UTC ---")
+OUTPUT_CSV_PATH = "/home/dev1/dev/sentimentAnalyis/sent_analysis/realTime/sentiment_data.csv"
 
-    # --- Configuration ---
+def build_collection_jobs(queries, dedup_index=None, watermarks=None):
+    """One collection job per configured platform and query"""
     # Load credentials from .env file or GitHub secrets
     REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
     REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
@@ -26,92 +34,336 @@ def run_collection_cycle():
     BLUESKY_HANDLE = os.getenv("BLUESKY_HANDLE")
     BLUESKY_PASSWORD = os.getenv("BLUESKY_PASSWORD")
     YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+    # Per query; comments are paged 100 at a time, so larger caps cost 1 quota unit per extra page
+    YOUTUBE_MAX_VIDEOS = int(os.getenv("YOUTUBE_MAX_VIDEOS", "10"))
+    YOUTUBE_MAX_COMMENTS_PER_VIDEO = int(os.getenv("YOUTUBE_MAX_COMMENTS_PER_VIDEO", "200"))
 
-    queries = ['UAE', 'Qatar']
-    all_data = []
+    jobs = []
 
-    # --- Data Collection ---
     # Collect from Reddit
     if REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET:
         print("--- Collecting data from Reddit ---")
+        # One authenticated session shared by every Reddit query
+        reddit = RedditCollector(
+            REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT,
+            dedup_index=dedup_index, watermarks=watermarks
+        )
         for query in queries:
-            try:
-                reddit_data = collect_reddit_data(
-                    client_id=REDDIT_CLIENT_ID,
-                    client_secret=REDDIT_CLIENT_SECRET,
-                    user_agent=REDDIT_USER_AGENT,
-                    query=query,
-                    limit=50
-                )
-                all_data.extend(reddit_data)
-            except Exception as e:
-                print(f"Error collecting from Reddit for query '{query}': {e}")
+            jobs.append(CollectionJob('Reddit', query, partial(
+                reddit.iter_search,
+                query=query,
+                limit=50
+            )))
     else:
         print("Reddit credentials not found. Skipping Reddit.")
 
     # Collect from Bluesky
     if BLUESKY_HANDLE and BLUESKY_PASSWORD:
         print("--- Collecting data from Bluesky ---")
+        # Logs in once, on the first query, and reuses the session for the rest
+        bluesky = BlueskyCollector(BLUESKY_HANDLE, BLUESKY_PASSWORD, dedup_index=dedup_index, watermarks=watermarks)
         for query in queries:
-            try:
-                bluesky_data = collect_bluesky_data(
-                    bluesky_handle=BLUESKY_HANDLE,
-                    bluesky_password=BLUESKY_PASSWORD,
-                    query=query,
-                    limit=50
-                )
-                all_data.extend(bluesky_data)
-            except Exception as e:
-                print(f"Error collecting from Bluesky for query '{query}': {e}")
+            jobs.append(CollectionJob('Bluesky', query, partial(
+                bluesky.iter_search,
+                query=query,
+                limit=50
+            )))
     else:
         print("Bluesky credentials not found. Skipping Bluesky.")
 
     # Collect from YouTube
     if YOUTUBE_API_KEY:
         print("--- Collecting data from YouTube ---")
+        # Quota spent today is tracked across runs so collection stops before the daily budget runs out
+        quota = QuotaTracker(
+            daily_budget=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+            path=os.getenv("YOUTUBE_QUOTA_PATH", "youtube_quota.json")
+        )
+        youtube = YouTubeCollector(YOUTUBE_API_KEY, quota=quota, dedup_index=dedup_index, watermarks=watermarks)
         for query in queries:
-            try:
-                youtube_data = collect_youtube_data(
-                    api_key=YOUTUBE_API_KEY,
-                    query=query,
-                    max_videos=5,
-                    max_comments_per_video=50
-                )
-                all_data.extend(youtube_data)
-            except Exception as e:
-                print(f"Error collecting from YouTube for query '{query}': {e}")
+            jobs.append(CollectionJob('YouTube', query, partial(
+                youtube.iter_search,
+                query=query,
+                max_videos=YOUTUBE_MAX_VIDEOS,
+                max_comments_per_video=YOUTUBE_MAX_COMMENTS_PER_VIDEO
+            )))
     else:
         print("YouTube API key not found. Skipping YouTube.")
 
-    if not all_data:
-        print("No data was collected in this cycle. Exiting.")
-        return
+    return jobs
 
-    # --- Processing and Analysis ---
-    processor = SentimentProcessor()
-    results_df = processor.process_data(all_data)
+def add_collection_timestamp(results_df, collection_time):
+    """Add the cycle's timestamp as the first column"""
+    results_df['collection_timestamp_utc'] = collection_time
+    cols = ['collection_timestamp_utc'] + [col for col in results_df.columns if col != 'collection_timestamp_utc']
+    return results_df[cols]
 
-    # --- Save Results ---
-    output_csv_path = "/home/dev1/dev/sentimentAnalyis/sent_analysis/realTime/sentiment_data.csv"
-    # Add a timestamp to the new data
-    results_df['collection_timestamp_utc'] = datetime.utcnow()
+class CollectionRuntime:
+    """
+    Everything a collection cycle needs, opened once: the scoring processor and
+    its cache, the history, dedup, watermark and rollup stores, and the
+    platform collectors with their logged-in sessions.
 
-    # Reorder columns to have the timestamp first
-    cols = ['collection_timestamp_utc'] + [col for col in results_df.columns if col != 'collection_timestamp_utc']
-    results_df = results_df[cols]
+    run_collection_cycle() builds one for a single cold run; daemon mode keeps
+    one warm across cycles so nothing is re-imported, rebuilt or logged in again.
+    """
 
-    # Append to CSV, creating it with a header if it doesn't exist
-    try:
-        if not os.path.exists(output_csv_path):
-            results_df.to_csv(output_csv_path, index=False, mode='w', header=True)
-            print(f"Created new data file at {output_csv_path}")
+    def __init__(self):
+        load_dotenv()
+
+        # --- Configuration ---
+        SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "1"))
+        SENTIMENT_ANALYZERS = os.getenv("SENTIMENT_ANALYZERS", "textblob,vader").split(",")
+        SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", "sentiment_score_cache.db")
+        # "csv" appends to OUTPUT_CSV_PATH; "parquet" writes date/source partitions under HISTORY_STORE_PATH;
+        # "sql" upserts into the database at RESULT_STORE_URL
+        HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "csv")
+        HISTORY_STORE_PATH = os.getenv("HISTORY_STORE_PATH", "sentiment_history")
+        # A Parquet partition is merged into one file once a cycle leaves it with this many; 0 never merges
+        HISTORY_COMPACT_FILES = int(os.getenv("HISTORY_COMPACT_FILES", "16"))
+        RESULT_STORE_URL = os.getenv("RESULT_STORE_URL", "sqlite:///sentiment_results.db")
+        # (source, id) pairs already stored; items seen in earlier cycles are dropped before scoring
+        DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", "dedup_index.db")
+        # Per-(source, query) high-water marks; collectors only request content newer than the last cycle
+        WATERMARK_PATH = os.getenv("WATERMARK_PATH", "watermarks.db")
+        # Per-(day, query, source) sentiment totals, updated as each chunk is saved, for reports and charts
+        ROLLUP_PATH = os.getenv("ROLLUP_PATH", "sentiment_rollups.db")
+        # Near-duplicate clusters (cross-posts, reposts, spam) get a cluster_id and reposts are scored once;
+        # off unless NEAR_DUP_MAX_ITEMS is set
+        NEAR_DUP_PATH = os.getenv("NEAR_DUP_PATH", "near_duplicates.npz")
+        NEAR_DUP_MAX_ITEMS = int(os.getenv("NEAR_DUP_MAX_ITEMS", "0"))
+        # Per-stage timings of the last cycle as JSON, and cumulative totals as a Prometheus textfile
+        self.metrics_json_path = os.getenv("METRICS_JSON_PATH", "pipeline_metrics.json")
+        self.metrics_prom_path = os.getenv("METRICS_PROM_PATH")
+
+        self.queries = ['UAE', 'Qatar']
+
+        self.score_cache = ScoreCache(SENTIMENT_CACHE_PATH) if SENTIMENT_CACHE_PATH else None
+        self.near_duplicates = None
+        if NEAR_DUP_MAX_ITEMS > 0:
+            self.near_duplicates = NearDuplicateIndex(NEAR_DUP_PATH or None, max_items=NEAR_DUP_MAX_ITEMS)
+        self.processor = SentimentProcessor(analyzers=SENTIMENT_ANALYZERS, workers=SENTIMENT_WORKERS, cache=self.score_cache,
+                                            near_duplicates=self.near_duplicates)
+        self.history_store = None
+        self.history_backend = HISTORY_BACKEND
+        if HISTORY_BACKEND == "parquet":
+            self.history_store = HistoryStore(HISTORY_STORE_PATH, compact_files=HISTORY_COMPACT_FILES)
+        elif HISTORY_BACKEND == "sql":
+            self.history_store = SqlResultStore(RESULT_STORE_URL)
+        self.history_location = RESULT_STORE_URL if HISTORY_BACKEND == "sql" else HISTORY_STORE_PATH
+        self.dedup_index = DedupIndex(DEDUP_INDEX_PATH) if DEDUP_INDEX_PATH else None
+        self.watermarks = WatermarkStore(WATERMARK_PATH) if WATERMARK_PATH else None
+        self.rollups = RollupStore(ROLLUP_PATH) if ROLLUP_PATH else None
+
+        # Jobs hold the collectors, so their sessions and clients live as long as the runtime
+        self.jobs = build_collection_jobs(self.queries, self.dedup_index, self.watermarks)
+        # Held for the length of a cycle; a cycle that finds it taken is skipped, never run alongside
+        self._cycle_lock = threading.Lock()
+
+    @property
+    def platforms(self):
+        """Platforms with at least one configured job"""
+        return sorted({job.platform for job in self.jobs})
+
+    def run_cycle(self, platforms=None, stream=False, chunk_size=1000):
+        """
+        Collect, score and save once, for all platforms or just the given ones.
+
+        Returns the number of new records saved, or None if another cycle was
+        still running and this one was skipped.
+        """
+        if not self._cycle_lock.acquire(blocking=False):
+            print("Previous collection cycle is still running. Skipping this one.")
+            return None
+        metrics = get_metrics()
+        metrics.begin_cycle()
+        total = None
+        try:
+            total = self._run_cycle(platforms, stream, chunk_size)
+            return total
+        finally:
+            if self.near_duplicates is not None:
+                try:
+                    # Saved every cycle so a daemon that dies keeps the clusters it has seen
+                    self.near_duplicates.save()
+                except Exception as e:
+                    print(f"Error saving near-duplicate index: {e}")
+            metrics.export(
+                self.metrics_json_path, self.metrics_prom_path,
+                platforms=platforms or self.platforms, records_saved=total
+            )
+            self._cycle_lock.release()
+
+    def _run_cycle(self, platforms, stream, chunk_size):
+        collection_time = datetime.utcnow()
+        print(f"--- Running data collection cycle at {collection_time.isoformat()} UTC ---")
+
+        jobs = [job for job in self.jobs if platforms is None or job.platform in platforms]
+        job_results = []
+        records = iter_job_records(jobs, results=job_results)
+        if self.dedup_index is not None:
+            records = self.dedup_index.iter_new(records)
+        if stream:
+            chunks = self.processor.process_stream(records, chunk_size=chunk_size)
         else:
-            results_df.to_csv(output_csv_path, index=False, mode='a', header=False)
-            print(f"Appended {len(results_df)} new records to {output_csv_path}")
-    except Exception as e:
-        print(f"Error saving data to CSV: {e}")
+            all_data = list(records)
+            chunks = [self.processor.process_data(all_data)] if all_data else []
+
+        total = 0
+        save_failed = False
+        for results_df in chunks:
+            results_df = add_collection_timestamp(results_df, collection_time)
+            saved = False
+            if self.history_store is not None:
+                try:
+                    with get_metrics().timer('write', sink=self.history_backend) as timer:
+                        self.history_store.write(results_df)
+                        timer.items = len(results_df)
+                    saved = True
+                    print(f"Wrote {len(results_df)} new records to {self.history_location}")
+                except Exception as e:
+                    print(f"Error saving data to history store: {e}")
+            else:
+                # Append to CSV, creating it with a header if it doesn't exist
+                try:
+                    with get_metrics().timer('write', sink='csv') as timer:
+                        is_new = self.processor.append_results(results_df, OUTPUT_CSV_PATH)
+                        timer.items = len(results_df)
+                    if is_new:
+                        print(f"Created new data file at {OUTPUT_CSV_PATH}")
+                    else:
+                        print(f"Appended {len(results_df)} new records to {OUTPUT_CSV_PATH}")
+                    saved = True
+                except Exception as e:
+                    print(f"Error saving data to CSV: {e}")
+            # Only rows that made it to disk count as seen, so a failed write is retried next cycle
+            if saved and self.dedup_index is not None:
+                self.dedup_index.add_many(zip(results_df['source'], results_df['id']))
+            if saved and self.rollups is not None:
+                try:
+                    with get_metrics().timer('write', sink='rollups') as timer:
+                        self.rollups.update(results_df)
+                        timer.items = len(results_df)
+                except Exception as e:
+                    print(f"Error updating sentiment rollups: {e}")
+            save_failed = save_failed or not saved
+            total += len(results_df)
+
+        # Advance the watermarks only when every job finished cleanly and everything it fetched was saved
+        if self.watermarks is not None:
+            failed_jobs = [result.job.name for result in job_results if not result.ok]
+            if save_failed or failed_jobs:
+                reason = 'a save failed' if save_failed else f"incomplete jobs: {', '.join(sorted(failed_jobs))}"
+                print(f"Keeping the previous watermarks ({reason}); the same window is fetched again next cycle")
+                self.watermarks.discard()
+            else:
+                self.watermarks.commit()
+
+        if self.dedup_index is not None:
+            print(f"Suppressed {self.dedup_index.take_suppressed()} duplicates already stored or repeated in this cycle")
 
-    print(f"--- Data collection cycle finished at {datetime.utcnow().isoformat()} UTC ---")
+        if total == 0:
+            print("No data was collected in this cycle.")
+            return 0
+
+        print(f"--- Data collection cycle finished at {datetime.utcnow().isoformat()} UTC ---")
+        return total
+
+    def close(self):
+        """Release the process pool and every store"""
+        self.processor.close()
+        if self.dedup_index is not None:
+            self.dedup_index.close()
+        if self.watermarks is not None:
+            self.watermarks.close()
+        if self.rollups is not None:
+            self.rollups.close()
+        if isinstance(self.history_store, SqlResultStore):
+            self.history_store.close()
+        if self.score_cache is not None:
+            stats = self.score_cache.stats()
+            print(f"Score cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+            self.score_cache.close()
+        if self.near_duplicates is not None:
+            stats = self.near_duplicates.stats()
+            print(f"Near-duplicates: {stats['near_duplicates']} of {stats['texts']} texts "
+                  f"({stats['duplicate_rate']:.0%}) joined an existing cluster; "
+                  f"{stats['shared_scores']} reused the scores of an identical text")
+
+def run_collection_cycle(stream=False, chunk_size=1000):
+    """
+    Runs a single cycle of data collection, processing, and saving.
+    This function is designed to be called by a scheduler (like a cron job or GitHub Actions).
+
+    With stream=True, records are scored in chunks of chunk_size and each chunk
+    is appended to the CSV as soon as it is scored, so memory stays bounded and
+    a run that dies partway keeps what it already wrote.
+    """
+    runtime = CollectionRuntime()
+    try:
+        runtime.run_cycle(stream=stream, chunk_size=chunk_size)
+    finally:
+        runtime.close()
+
+def collection_intervals(platforms):
+    """Seconds between cycles per platform: COLLECT_INTERVAL_<PLATFORM>, else COLLECT_INTERVAL, else hourly"""
+    default = float(os.getenv("COLLECT_INTERVAL", "3600"))
+    return {
+        platform: float(os.getenv(f"COLLECT_INTERVAL_{platform.upper()}", default))
+        for platform in platforms
+    }
+
+def run_daemon(stream=False, chunk_size=1000):
+    """
+    Keep one warm CollectionRuntime and run cycles on per-platform intervals until SIGINT or SIGTERM.
+
+    A signal lets the cycle in progress finish and save before shutting down;
+    a second one stops immediately.
+    """
+    runtime = CollectionRuntime()
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        print(f"Received {signal.Signals(signum).name}; stopping after the current cycle (send again to stop now)")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    intervals = collection_intervals(runtime.platforms)
+    if not intervals:
+        print("No platforms are configured. Exiting.")
+        runtime.close()
+        return
+    print("Daemon intervals: " + ", ".join(f"{platform} every {seconds:g}s" for platform, seconds in intervals.items()))
+
+    try:
+        scheduler = IntervalScheduler(
+            intervals,
+            lambda platforms: runtime.run_cycle(platforms=platforms, stream=stream, chunk_size=chunk_size)
+        )
+    except ValueError:
+        # e.g. COLLECT_INTERVAL=0
+        runtime.close()
+        raise
+    try:
+        scheduler.run(stop)
+    finally:
+        runtime.close()
+        print("Daemon stopped.")
 
 if __name__ == "__main__":
-    run_collection_cycle()
+    parser = argparse.ArgumentParser(description="Run one real-time sentiment collection cycle.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Score and append records in chunks as they are collected")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Records scored per chunk in --stream mode")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Keep running, collecting each platform on its COLLECT_INTERVAL schedule")
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(stream=args.stream, chunk_size=args.chunk_size)
+    else:
+        run_collection_cycle(stream=args.stream, chunk_size=args.chunk_size)
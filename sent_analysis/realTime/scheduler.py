@@ -0,0 +1,51 @@
+import time
+
+class IntervalScheduler:
+    """
+    Runs tasks on fixed per-task intervals, on the calling thread.
+
+    Every task is due immediately, then every `interval` seconds after its
+    previous slot. Tasks that come due together are handed to `run` in one
+    call. If a run overruns and a task misses one or more slots, the missed
+    slots are skipped instead of being run back to back, so a slow cycle can
+    never pile up behind itself.
+    """
+
+    def __init__(self, intervals, run, clock=time.monotonic):
+        self.intervals = dict(intervals)
+        for name, interval in self.intervals.items():
+            # Also rejects NaN; slots are found by dividing by the interval
+            if not interval > 0:
+                raise ValueError(f"Interval for {name} must be greater than 0 seconds, got {interval!r}")
+        self.run_tasks = run
+        self.clock = clock
+
+    def run(self, stop_event):
+        """Run due tasks until stop_event is set; waits between runs on the event, so a stop is noticed at once"""
+        start = self.clock()
+        next_due = {name: start for name in self.intervals}
+        while not stop_event.is_set():
+            now = self.clock()
+            due = sorted(name for name, when in next_due.items() if when <= now)
+            if not due:
+                stop_event.wait(min(next_due.values()) - now)
+                continue
+
+            try:
+                self.run_tasks(due)
+            except Exception as e:
+                # One bad cycle shouldn't take the daemon down; the next slot tries again
+                print(f"Error running scheduled collection for {', '.join(due)}: {e}")
+
+            finished = self.clock()
+            for name in due:
+                next_due[name] = self._next_slot(name, next_due[name], finished)
+
+    def _next_slot(self, name, previous, finished):
+        interval = self.intervals[name]
+        following = previous + interval
+        if following > finished:
+            return following
+        missed = int((finished - following) // interval) + 1
+        print(f"{name} collection overran its {interval:g}s interval; skipping {missed} missed run(s)")
+        return following + missed * interval
@@ -0,0 +1,136 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, about `fp_rate` false positives"""
+
+    def __init__(self, expected_items=1_000_000, fp_rate=0.01):
+        self.size = max(8, int(-expected_items * math.log(fp_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class DedupIndex:
+    """
+    Persistent set of (source, id) pairs that have already been stored.
+
+    Backed by a WITHOUT ROWID SQLite table, optionally fronted by an in-memory
+    Bloom filter so that the common case (a new item) never touches disk.
+    Safe to share between collector threads.
+    """
+
+    def __init__(self, path='dedup_index.db', use_bloom=True, expected_items=1_000_000):
+        self.path = path
+        self.suppressed = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                source TEXT NOT NULL,
+                id TEXT NOT NULL,
+                first_seen INTEGER NOT NULL,
+                PRIMARY KEY (source, id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+        self.bloom = None
+        if use_bloom:
+            self.bloom = BloomFilter(expected_items)
+            for source, item_id in self.conn.execute("SELECT source, id FROM seen"):
+                self.bloom.add(_bloom_key(source, item_id))
+
+    def seen_mask(self, keys):
+        """For a list of (source, id) pairs, return a list of bools: True if already stored"""
+        keys = [(source, str(item_id)) for source, item_id in keys]
+        mask = [False] * len(keys)
+        candidates = [
+            i for i, (source, item_id) in enumerate(keys)
+            if self.bloom is None or _bloom_key(source, item_id) in self.bloom
+        ]
+        with self._lock:
+            for i in candidates:
+                source, item_id = keys[i]
+                row = self.conn.execute(
+                    "SELECT 1 FROM seen WHERE source = ? AND id = ?", (source, item_id)
+                ).fetchone()
+                mask[i] = row is not None
+        return mask
+
+    def is_seen(self, source, item_id):
+        return self.seen_mask([(source, item_id)])[0]
+
+    def drop_seen(self, items, key):
+        """Return the items whose key(item) is not stored yet, counting the rest as suppressed"""
+        items = list(items)
+        mask = self.seen_mask([key(item) for item in items])
+        kept = [item for item, seen in zip(items, mask) if not seen]
+        with self._lock:
+            self.suppressed += len(items) - len(kept)
+        return kept
+
+    def iter_new(self, records, chunk_size=500):
+        """
+        Yield records that are neither stored already nor repeated earlier in this stream.
+
+        Records are only marked as stored by add_many, once they have been written.
+        """
+        pending = set()
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield from self._new_in_chunk(chunk, pending)
+                chunk = []
+        yield from self._new_in_chunk(chunk, pending)
+
+    def _new_in_chunk(self, chunk, pending):
+        for record in self.drop_seen(chunk, key=record_key):
+            key = record_key(record)
+            if key in pending:
+                with self._lock:
+                    self.suppressed += 1
+                continue
+            pending.add(key)
+            yield record
+
+    def add_many(self, keys):
+        """Mark (source, id) pairs as stored"""
+        rows = [(source, str(item_id), int(time.time())) for source, item_id in keys]
+        with self._lock:
+            self.conn.executemany("INSERT OR IGNORE INTO seen (source, id, first_seen) VALUES (?, ?, ?)", rows)
+            self.conn.commit()
+            if self.bloom is not None:
+                for source, item_id, _ in rows:
+                    self.bloom.add(_bloom_key(source, item_id))
+
+    def take_suppressed(self):
+        """Return the duplicates suppressed since the last call and reset the counter"""
+        with self._lock:
+            count, self.suppressed = self.suppressed, 0
+        return count
+
+    def close(self):
+        self.conn.close()
+
+def record_key(record):
+    return record['source'], str(record['id'])
+
+def _bloom_key(source, item_id):
+    return f"{source}\0{item_id}"
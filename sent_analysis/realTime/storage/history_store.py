@@ -0,0 +1,278 @@
+import argparse
+import ast
+import glob
+import json
+import os
+import uuid
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from processor.compact import created_at_utc, nest_metrics
+
+# Column types for every stored row. Rows are conformed to this schema on
+# write (missing columns become nulls, unknown ones are dropped) so every
+# partition file reads back with the same types.
+HISTORY_SCHEMA = pa.schema([
+    ('collection_timestamp_utc', pa.timestamp('us', tz='UTC')),
+    ('id', pa.string()),
+    ('query', pa.string()),
+    ('text', pa.string()),
+    ('author', pa.string()),
+    ('created_at', pa.timestamp('us', tz='UTC')),
+    # JSON object, so it reads back with json.loads instead of re-parsing a Python repr
+    ('source_specific_metrics', pa.string()),
+    ('textblob_polarity', pa.float64()),
+    ('textblob_subjectivity', pa.float64()),
+    ('vader_positive', pa.float64()),
+    ('vader_negative', pa.float64()),
+    ('vader_neutral', pa.float64()),
+    ('vader_compound', pa.float64()),
+    ('sentiment_category', pa.string()),
+    # Near-duplicate cluster (processor.near_duplicates); null in files written before it existed
+    ('cluster_id', pa.string()),
+])
+
+# Directory levels: <root>/date=YYYY-MM-DD/source=Reddit/part-*.parquet
+PARTITION_SCHEMA = pa.schema([
+    ('date', pa.string()),
+    ('source', pa.string()),
+])
+
+STORE_SCHEMA = pa.unify_schemas([HISTORY_SCHEMA, PARTITION_SCHEMA])
+
+# A partition is merged into one file once a write leaves it with this many
+DEFAULT_COMPACT_FILES = 16
+
+# Written next to a compacted file until the files it replaces are deleted; pyarrow skips '_' names
+COMPACTION_MARKER = '_compaction.json'
+
+class HistoryStore:
+    """
+    Typed, zstd-compressed Parquet history of scored records, partitioned by day and source.
+
+    Reads prune whole partitions by date and source, push the remaining
+    predicates down into the Parquet files, and only decode the requested
+    columns, e.g.:
+
+        store.read(columns=['created_at', 'vader_compound'], query='Qatar', start=date(2025, 7, 1))
+
+    Every write adds a new file to each partition it touches. So that hot
+    partitions don't fill up with small files on an hourly schedule, a
+    partition left with compact_files or more files is merged into one
+    file right after the write (0 turns this off; compact() merges on demand).
+    """
+
+    def __init__(self, root, compact_files=DEFAULT_COMPACT_FILES):
+        self.root = root
+        self.compact_files = compact_files
+        self._partitioning = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+        self._file_options = ds.ParquetFileFormat().make_write_options(compression='zstd')
+        # Finish any compaction a crash interrupted, so its rows aren't read twice
+        for marker in glob.glob(os.path.join(self.root, '*', '*', COMPACTION_MARKER)):
+            _finish_compaction(os.path.dirname(marker))
+
+    def _to_table(self, df):
+        df = df.copy()
+        # Compact frames (processor.compact) hold epoch milliseconds and flattened metric_<key> columns
+        df['created_at'] = created_at_utc(df['created_at'])
+        if 'collection_timestamp_utc' in df.columns:
+            df['collection_timestamp_utc'] = created_at_utc(df['collection_timestamp_utc'])
+        if 'source_specific_metrics' not in df.columns and any(column.startswith('metric_') for column in df.columns):
+            df['source_specific_metrics'] = nest_metrics(df)
+        if 'source_specific_metrics' in df.columns:
+            df['source_specific_metrics'] = df['source_specific_metrics'].map(_metrics_to_json)
+        df['date'] = df['created_at'].dt.strftime('%Y-%m-%d')
+
+        columns = {}
+        for field in HISTORY_SCHEMA:
+            if field.name in df.columns:
+                # cast() also covers values the CSV reader inferred differently, like numeric ids
+                columns[field.name] = pa.array(df[field.name], from_pandas=True).cast(field.type)
+            else:
+                columns[field.name] = pa.nulls(len(df), type=field.type)
+        for field in PARTITION_SCHEMA:
+            columns[field.name] = pa.array(df[field.name].astype(str), type=field.type)
+        return pa.table(columns)
+
+    def write(self, df):
+        """Append scored rows as new files in their (date, source) partitions"""
+        if df.empty:
+            return 0
+        table = self._to_table(df)
+        ds.write_dataset(
+            table,
+            self.root,
+            format='parquet',
+            partitioning=self._partitioning,
+            # Unique per write, so appends never overwrite earlier files
+            basename_template=f"part-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+            file_options=self._file_options,
+        )
+        if self.compact_files:
+            partitions = table.select(['date', 'source']).group_by(['date', 'source']).aggregate([]).to_pylist()
+            for partition in partitions:
+                directory = self._partition_dir(partition['date'], partition['source'])
+                if len(_data_files(directory)) >= self.compact_files:
+                    self.compact_partition(directory)
+        return table.num_rows
+
+    def _partition_dir(self, day, source):
+        return os.path.join(self.root, f"date={day}", f"source={source}")
+
+    def compact_partition(self, directory):
+        """
+        Merge every file of one partition directory into a single file; returns how many were replaced.
+
+        The merged file is written under a hidden name and a marker listing
+        the files it replaces is written before it is renamed into place, so a
+        crash at any point leaves either the old files or the merged one, never both.
+        """
+        _finish_compaction(directory)
+        files = _data_files(directory)
+        if len(files) < 2:
+            return 0
+        table = ds.dataset(files, format='parquet', schema=HISTORY_SCHEMA).to_table()
+        name = f"part-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}-compacted.parquet"
+        pq.write_table(table, os.path.join(directory, f"_{name}"), compression='zstd')
+        _write_marker(directory, {'merged': name, 'replaced': [os.path.basename(path) for path in files]})
+        os.replace(os.path.join(directory, f"_{name}"), os.path.join(directory, name))
+        _finish_compaction(directory)
+        return len(files)
+
+    def compact(self, min_files=2):
+        """Compact every partition with at least min_files files; returns the number of partitions compacted"""
+        compacted = 0
+        for directory in sorted(glob.glob(os.path.join(self.root, 'date=*', 'source=*'))):
+            if len(_data_files(directory)) >= min_files:
+                replaced = self.compact_partition(directory)
+                print(f"Compacted {replaced} files in {os.path.relpath(directory, self.root)}")
+                compacted += 1
+        return compacted
+
+    def dataset(self):
+        """The store as a pyarrow dataset with the full schema, including partition columns"""
+        return ds.dataset(self.root, format='parquet', partitioning=self._partitioning, schema=STORE_SCHEMA)
+
+    def read(self, columns=None, query=None, source=None, start=None, end=None, filter=None):
+        """
+        Read rows as a DataFrame.
+
+        start/end are inclusive dates (date objects or 'YYYY-MM-DD'); query and
+        source take a single value or a list. `filter` is an extra pyarrow
+        expression ANDed with the others.
+        """
+        if not os.path.isdir(self.root):
+            return STORE_SCHEMA.empty_table().select(columns or STORE_SCHEMA.names).to_pandas()
+
+        expression = _build_filter(query=query, source=source, start=start, end=end)
+        if filter is not None:
+            expression = filter if expression is None else expression & filter
+
+        table = self.dataset().to_table(columns=columns, filter=expression)
+        return table.to_pandas()
+
+    def import_csv(self, csv_path, chunksize=100_000):
+        """One-time import of an existing append-only CSV (e.g. realTime/sentiment_data.csv)"""
+        total = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            if 'source_specific_metrics' in chunk.columns:
+                chunk['source_specific_metrics'] = chunk['source_specific_metrics'].map(_parse_metrics_repr)
+            total += self.write(chunk)
+            print(f"Imported {total} rows from {csv_path}")
+        return total
+
+def _data_files(directory):
+    """The Parquet files a dataset read would see in a partition directory"""
+    return sorted(
+        path for path in glob.glob(os.path.join(directory, '*.parquet'))
+        if not os.path.basename(path).startswith(('_', '.'))
+    )
+
+def _write_marker(directory, contents):
+    temporary = os.path.join(directory, f"{COMPACTION_MARKER}.tmp")
+    with open(temporary, 'w') as f:
+        json.dump(contents, f)
+    os.replace(temporary, os.path.join(directory, COMPACTION_MARKER))
+
+def _finish_compaction(directory):
+    """
+    Complete or roll back a compaction recorded by its marker.
+
+    If the merged file made it into place the replaced files are deleted,
+    otherwise the half-written merged file is; either way the marker goes.
+    """
+    marker = os.path.join(directory, COMPACTION_MARKER)
+    if not os.path.exists(marker):
+        return
+    with open(marker) as f:
+        contents = json.load(f)
+    if os.path.exists(os.path.join(directory, contents['merged'])):
+        for name in contents['replaced']:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+    else:
+        hidden = os.path.join(directory, f"_{contents['merged']}")
+        if os.path.exists(hidden):
+            os.remove(hidden)
+    os.remove(marker)
+
+def _as_list(value):
+    return value if isinstance(value, (list, tuple, set)) else [value]
+
+def _as_date_string(value):
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+def _build_filter(query=None, source=None, start=None, end=None):
+    """AND together the predicates that were given; None means no filter"""
+    predicates = []
+    if start is not None:
+        predicates.append(ds.field('date') >= _as_date_string(start))
+    if end is not None:
+        predicates.append(ds.field('date') <= _as_date_string(end))
+    if source is not None:
+        predicates.append(ds.field('source').isin(_as_list(source)))
+    if query is not None:
+        predicates.append(ds.field('query').isin(_as_list(query)))
+
+    expression = None
+    for predicate in predicates:
+        expression = predicate if expression is None else expression & predicate
+    return expression
+
+def _metrics_to_json(metrics):
+    if metrics is None or (isinstance(metrics, float) and pd.isna(metrics)):
+        return None
+    if isinstance(metrics, str):
+        return metrics
+    return json.dumps(metrics, default=str)
+
+def _parse_metrics_repr(value):
+    """Turn a CSV cell holding a Python dict repr back into a dict"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import an append-only sentiment CSV into the partitioned history store.")
+    parser.add_argument('csv_path', nargs='?', help="CSV written by real_time_collector.py")
+    parser.add_argument('--root', default='sentiment_history', help="History store directory")
+    parser.add_argument('--compact', action='store_true', help="Merge each partition's files into one")
+    args = parser.parse_args()
+    if not args.csv_path and not args.compact:
+        parser.error("give a CSV to import and/or --compact")
+    store = HistoryStore(args.root)
+    if args.csv_path:
+        store.import_csv(args.csv_path)
+    if args.compact:
+        print(f"Compacted {store.compact()} partitions in {args.root}")
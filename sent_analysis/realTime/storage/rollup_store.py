@@ -0,0 +1,134 @@
+import argparse
+import sqlite3
+import threading
+
+import pandas as pd
+
+from processor.cube import SentimentCube
+from processor.rollups import ROLLUP_KEYS, ROLLUP_MEASURES, empty_rollup, summarize
+
+class RollupStore:
+    """
+    Sentiment rollups per (day, query, source), kept up to date as each cycle's rows are saved.
+
+    Every row stores the count, sum and sum of squares of vader_compound and
+    the count of each sentiment category. update() folds a chunk of scored
+    rows into the existing totals, so reports and charts read a few rows per
+    day instead of re-aggregating the whole history.
+    """
+
+    def __init__(self, path='sentiment_rollups.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rollups (
+                day TEXT NOT NULL,
+                query TEXT NOT NULL,
+                source TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                compound_sum REAL NOT NULL,
+                compound_sumsq REAL NOT NULL,
+                positive INTEGER NOT NULL,
+                neutral INTEGER NOT NULL,
+                negative INTEGER NOT NULL,
+                PRIMARY KEY (day, query, source)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def update(self, df):
+        """Add a chunk of scored rows to the rollups; returns the number of rollup rows touched"""
+        if df.empty or 'vader_compound' not in df.columns:
+            return 0
+        return self.add_rollup(summarize(df))
+
+    def add_rollup(self, rollup):
+        """Add an already summarized rollup frame to the stored totals"""
+        if rollup.empty:
+            return 0
+        columns = ROLLUP_KEYS + ROLLUP_MEASURES
+        increments = ', '.join(f"{measure} = {measure} + excluded.{measure}" for measure in ROLLUP_MEASURES)
+        rows = [
+            (day, query, source, int(n), float(total), float(sumsq), int(positive), int(neutral), int(negative))
+            for day, query, source, n, total, sumsq, positive, neutral, negative
+            in rollup[columns].itertuples(index=False, name=None)
+        ]
+        with self._lock:
+            self.conn.executemany(f"""
+                INSERT INTO rollups ({', '.join(columns)})
+                VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT (day, query, source) DO UPDATE SET {increments}
+            """, rows)
+            self.conn.commit()
+        return len(rows)
+
+    def read(self, start=None, end=None, query=None, source=None):
+        """Rollup rows, optionally limited to a day range (inclusive, YYYY-MM-DD) and a query or source"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(str(start))
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(str(end))
+        if query is not None:
+            clauses.append("query = ?")
+            params.append(query)
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rollup = pd.read_sql_query(
+                f"SELECT {', '.join(ROLLUP_KEYS + ROLLUP_MEASURES)} FROM rollups{where} ORDER BY day, query, source",
+                self.conn, params=params
+            )
+        return rollup if not rollup.empty else empty_rollup()
+
+    def read_cube(self, start=None, end=None, query=None, source=None):
+        """read() wrapped in a processor.cube.SentimentCube for reports, charts and exports"""
+        return SentimentCube(self.read(start=start, end=end, query=query, source=source))
+
+    def rebuild_from_csv(self, csv_path, chunksize=100_000):
+        """Replace the rollups with totals recomputed from an append-only sentiment CSV"""
+        with self._lock:
+            self.conn.execute("DELETE FROM rollups")
+            self.conn.commit()
+        total = 0
+        usecols = ['created_at', 'query', 'source', 'vader_compound', 'sentiment_category']
+        for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+            self.update(chunk)
+            total += len(chunk)
+        print(f"Rebuilt rollups from {total} rows in {csv_path}")
+        return total
+
+    def close(self):
+        self.conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on, chart or rebuild the sentiment rollup tables.")
+    parser.add_argument('--path', default='sentiment_rollups.db', help="Rollup database")
+    parser.add_argument('--rebuild-from-csv', metavar='CSV', help="Recompute the rollups from a sentiment CSV first")
+    parser.add_argument('--start', help="First day to report (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last day to report (YYYY-MM-DD)")
+    parser.add_argument('--charts', action='store_true', help="Also draw the summary and trend charts")
+    parser.add_argument('--export', metavar='CSV', help="Write the (day, query, source, category) counts to a CSV")
+    args = parser.parse_args()
+
+    store = RollupStore(args.path)
+    try:
+        if args.rebuild_from_csv:
+            store.rebuild_from_csv(args.rebuild_from_csv)
+        cube = store.read_cube(start=args.start, end=args.end)
+        print(cube.stats(['query', 'source']))
+        if args.export:
+            cube.to_long().to_csv(args.export, index=False)
+            print(f"Summary saved to {args.export}")
+        if args.charts:
+            from processor.charts import renderer_from_env
+            from processor.sentiment_analyzer import SentimentProcessor
+            processor = SentimentProcessor(analyzers=[], renderer=renderer_from_env())
+            processor.analyze_and_chart_cube(cube)
+    finally:
+        store.close()
@@ -6,10 +6,12 @@ from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
-import re
 import json
 from collections import Counter
-import time
+
+from collectors import text_cleaning
+from collectors.rate_limit import get_limiter, iter_limited
+from processor.cube import SentimentCube
 
 class RedditSentimentAnalyzer:
     def __init__(self, client_id, client_secret, user_agent):
@@ -20,17 +22,14 @@ class RedditSentimentAnalyzer:
             user_agent=user_agent
         )
         self.vader = SentimentIntensityAnalyzer()
+        self.limiter = get_limiter('Reddit')
         self.data = []
+        # (date, country, subreddit, sentiment_category) aggregates built by analyze_data()
+        self.cube = None
         
     def clean_text(self, text):
         """Clean and preprocess text"""
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,!?]', '', text)
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        return text.strip()
+        return text_cleaning.clean_text(text)
     
     def analyze_sentiment(self, text):
         """Analyze sentiment using both TextBlob and VADER"""
@@ -71,7 +70,8 @@ class RedditSentimentAnalyzer:
                 print(f"Searching r/{sub_name}...")
                 
                 # Search posts
-                for post in subreddit.search(query, limit=limit//len(subreddit_list), time_filter=time_filter):
+                posts = subreddit.search(query, limit=limit//len(subreddit_list), time_filter=time_filter)
+                for post in iter_limited(self.limiter, posts, 100):
                     # Skip if post is removed or deleted
                     if post.selftext == '[removed]' or post.selftext == '[deleted]':
                         continue
@@ -98,9 +98,6 @@ class RedditSentimentAnalyzer:
                             **sentiment
                         })
                 
-                # Add a small delay to respect rate limits
-                time.sleep(0.1)
-                
             except Exception as e:
                 print(f"Error searching r/{sub_name}: {e}")
                 continue
@@ -128,9 +125,6 @@ class RedditSentimentAnalyzer:
                     item['country'] = country
                 
                 all_data.extend(data)
-                
-                # Rate limiting
-                time.sleep(1)
         
         self.data = all_data
         return pd.DataFrame(all_data)
@@ -154,6 +148,10 @@ class RedditSentimentAnalyzer:
         
         # Add sentiment categories
         df['sentiment_category'] = df['vader_compound'].apply(self.categorize_sentiment)
+        df['date'] = df['created_utc'].dt.date
+
+        # One pass over the posts; every report and chart below is a slice of this
+        self.cube = build_cube(df)
         
         # Basic statistics
         print("\n=== SENTIMENT ANALYSIS RESULTS ===")
@@ -162,28 +160,33 @@ class RedditSentimentAnalyzer:
         
         # Sentiment distribution by country
         print("\n--- Sentiment Distribution by Country ---")
-        sentiment_by_country = df.groupby(['country', 'sentiment_category']).size().unstack(fill_value=0)
-        print(sentiment_by_country)
+        print(self.cube.counts('query').rename_axis('country'))
         
-        # Average sentiment scores
+        # Average sentiment scores (TextBlob isn't a cube measure)
         print("\n--- Average Sentiment Scores ---")
-        avg_sentiment = df.groupby('country')[['vader_compound', 'textblob_polarity']].mean()
+        avg_sentiment = pd.DataFrame({
+            'vader_compound': self.cube.stats('query')['mean'],
+            'textblob_polarity': df.groupby('country')['textblob_polarity'].mean(),
+        }).rename_axis('country')
         print(avg_sentiment)
         
         # Top subreddits
         print("\n--- Top Subreddits by Posts ---")
-        top_subreddits = df['subreddit'].value_counts().head(10)
-        print(top_subreddits)
+        print(top_subreddits(self.cube, 10))
         
         return df
     
     def visualize_results(self, df):
-        """Create visualizations"""
+        """Create visualizations of the posts in df"""
+        if 'sentiment_category' not in df.columns:
+            df['sentiment_category'] = df['vader_compound'].apply(self.categorize_sentiment)
+        cube = build_cube(df)
+
         plt.style.use('seaborn-v0_8')
         fig, axes = plt.subplots(2, 2, figsize=(15, 12))
         
         # 1. Sentiment distribution by country
-        sentiment_counts = df.groupby(['country', 'sentiment_category']).size().unstack(fill_value=0)
+        sentiment_counts = cube.counts('query').rename_axis('country')
         sentiment_counts.plot(kind='bar', ax=axes[0,0], color=['red', 'gray', 'green'])
         axes[0,0].set_title('Sentiment Distribution by Country')
         axes[0,0].set_xlabel('Country')
@@ -192,7 +195,7 @@ class RedditSentimentAnalyzer:
         axes[0,0].tick_params(axis='x', rotation=45)
         
         # 2. Average sentiment scores
-        avg_scores = df.groupby('country')['vader_compound'].mean()
+        avg_scores = cube.stats('query')['mean']
         avg_scores.plot(kind='bar', ax=axes[0,1], color='skyblue')
         axes[0,1].set_title('Average Sentiment Score by Country')
         axes[0,1].set_xlabel('Country')
@@ -200,8 +203,7 @@ class RedditSentimentAnalyzer:
         axes[0,1].tick_params(axis='x', rotation=45)
         
         # 3. Sentiment over time
-        df['date'] = df['created_utc'].dt.date
-        sentiment_over_time = df.groupby(['date', 'country'])['vader_compound'].mean().unstack(fill_value=0)
+        sentiment_over_time = cube.daily_means().fillna(0)
         sentiment_over_time.plot(ax=axes[1,0], marker='o')
         axes[1,0].set_title('Sentiment Trend Over Time')
         axes[1,0].set_xlabel('Date')
@@ -209,7 +211,7 @@ class RedditSentimentAnalyzer:
         axes[1,0].legend(title='Country')
         
         # 4. Top subreddits
-        top_subs = df['subreddit'].value_counts().head(8)
+        top_subs = top_subreddits(cube, 8)
         top_subs.plot(kind='barh', ax=axes[1,1], color='lightcoral')
         axes[1,1].set_title('Top Subreddits by Number of Posts')
         axes[1,1].set_xlabel('Number of Posts')
@@ -254,6 +256,21 @@ class RedditSentimentAnalyzer:
         
         return sample
 
+def build_cube(df):
+    """A SentimentCube over the posts, with each country as the query and each subreddit as the source"""
+    return SentimentCube.from_frame(pd.DataFrame({
+        'created_at': df['created_utc'],
+        'query': df['country'],
+        'source': df['subreddit'],
+        'vader_compound': df['vader_compound'],
+        'sentiment_category': df['sentiment_category'],
+    }))
+
+def top_subreddits(cube, n):
+    """Post counts of the n subreddits with the most posts"""
+    counts = cube.rollup.groupby('source')['n'].sum().sort_values(ascending=False).head(n)
+    return counts.rename('count').rename_axis('subreddit')
+
 # Example usage and setup
 def main():
     """Main function to run the sentiment analysis"""
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+import time
+
+class WatermarkStore:
+    """
+    Per-(source, query) high-water marks: the newest created_at (epoch seconds) and id collected so far.
+
+    Collectors read since() to request only newer content and call observe()
+    for every item they fetch. Observations stay pending until commit(), which
+    the caller runs once the cycle's rows are safely written and every job
+    finished cleanly, so a failed cycle is simply fetched again.
+
+    A watermark may only move forward when everything newer than it was
+    fetched: the listing reached the old watermark or ran out. A collector
+    that stops at its limit first calls hold(), which keeps that key where it
+    was for this cycle instead of skipping the items it never got to.
+    """
+
+    def __init__(self, path='watermarks.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._held = set()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                source TEXT NOT NULL,
+                query TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_id TEXT,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (source, query)
+            )
+        """)
+        self.conn.commit()
+
+    def since(self, source, query):
+        """Epoch seconds of the newest committed item for (source, query), or None on the first run"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT created_at FROM watermarks WHERE source = ? AND query = ?", (source, query)
+            ).fetchone()
+        return row[0] if row else None
+
+    def observe(self, source, query, created_at, item_id):
+        """Note an item fetched this cycle; the watermark only ever moves forward"""
+        with self._lock:
+            current = self._pending.get((source, query))
+            if current is None or created_at > current[0]:
+                self._pending[(source, query)] = (created_at, str(item_id))
+
+    def hold(self, source, query):
+        """Keep (source, query) at its committed watermark this cycle: items newer than it are still unfetched"""
+        with self._lock:
+            self._held.add((source, query))
+
+    def commit(self):
+        """Persist this cycle's observations, except for held keys"""
+        now = int(time.time())
+        with self._lock:
+            rows = [
+                (source, query, created_at, item_id, now)
+                for (source, query), (created_at, item_id) in self._pending.items()
+                if (source, query) not in self._held
+            ]
+            self.conn.executemany("""
+                INSERT INTO watermarks (source, query, created_at, last_id, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (source, query) DO UPDATE SET
+                    created_at = excluded.created_at,
+                    last_id = excluded.last_id,
+                    updated_at = excluded.updated_at
+                WHERE excluded.created_at > watermarks.created_at
+            """, rows)
+            self.conn.commit()
+            self._pending.clear()
+            self._held.clear()
+        return len(rows)
+
+    def discard(self):
+        """Forget this cycle's observations, e.g. after a failed save, so the same window is fetched again"""
+        with self._lock:
+            self._pending.clear()
+            self._held.clear()
+
+    def close(self):
+        self.conn.close()
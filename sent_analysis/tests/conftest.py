@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts import their packages as top-level modules (from processor.x import ...), run from sent_analysis/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from processor.charts import CHARTS, chart_aggregates, chart_digest
+from processor.cube import SentimentCube
+
+def scored_rows(n=3000):
+    rng = np.random.default_rng(7)
+    compound = rng.uniform(-1, 1, n)
+    return pd.DataFrame({
+        'created_at': pd.Timestamp('2025-07-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 14 * 24, n), unit='h'),
+        'query': rng.choice(['UAE', 'Qatar'], n),
+        'source': rng.choice(['Reddit', 'Bluesky', 'YouTube'], n),
+        'vader_compound': compound,
+        'sentiment_category': np.select([compound >= 0.05, compound <= -0.05], ['Positive', 'Negative'], 'Neutral'),
+    })
+
+def test_streaming_and_batch_cubes_give_the_same_chart_digests():
+    df = scored_rows()
+    batch = chart_aggregates(SentimentCube.from_frame(df))
+    streaming = chart_aggregates(SentimentCube.from_chunks(df.iloc[start:start + 70] for start in range(0, len(df), 70)))
+    for name in CHARTS:
+        assert chart_digest(name, streaming, 300) == chart_digest(name, batch, 300)
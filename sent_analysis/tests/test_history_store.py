@@ -0,0 +1,96 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from processor.compact import compact_frame
+from storage.history_store import COMPACTION_MARKER, HistoryStore, _data_files
+
+def rows(start, n=3, source='Reddit'):
+    return pd.DataFrame({
+        'source': [source] * n,
+        'id': [f"{source}-{start + i}" for i in range(n)],
+        'query': ['UAE'] * n,
+        'text': ['some text'] * n,
+        'created_at': ['2025-07-01T12:00:00Z'] * n,
+        'vader_compound': [0.5] * n,
+    })
+
+def partition(root, source='Reddit'):
+    return os.path.join(root, 'date=2025-07-01', f"source={source}")
+
+def test_hot_partitions_are_compacted_once_they_reach_the_threshold(tmp_path):
+    store = HistoryStore(str(tmp_path), compact_files=4)
+    for i in range(3):
+        store.write(rows(i * 3))
+    assert len(_data_files(partition(str(tmp_path)))) == 3
+
+    store.write(rows(9))
+    assert len(_data_files(partition(str(tmp_path)))) == 1
+    store.write(rows(12))
+
+    df = store.read()
+    assert sorted(df['id']) == sorted(f"Reddit-{i}" for i in range(15))
+    assert not os.path.exists(os.path.join(partition(str(tmp_path)), COMPACTION_MARKER))
+
+def test_compaction_leaves_other_partitions_alone(tmp_path):
+    store = HistoryStore(str(tmp_path), compact_files=0)
+    for i in range(3):
+        store.write(rows(i * 3))
+    store.write(rows(0, source='Bluesky'))
+    assert store.compact() == 1
+    assert len(_data_files(partition(str(tmp_path)))) == 1
+    assert len(_data_files(partition(str(tmp_path), 'Bluesky'))) == 1
+    assert len(store.read()) == 12
+
+def test_an_interrupted_compaction_is_finished_on_open(tmp_path):
+    store = HistoryStore(str(tmp_path), compact_files=0)
+    for i in range(3):
+        store.write(rows(i * 3))
+    directory = partition(str(tmp_path))
+    old = [os.path.basename(path) for path in _data_files(directory)]
+    # Crash after the merged file was renamed into place, before the old files were deleted
+    merged = 'part-merged.parquet'
+    pq.write_table(ds.dataset(_data_files(directory), format='parquet').to_table(), os.path.join(directory, merged))
+    with open(os.path.join(directory, COMPACTION_MARKER), 'w') as f:
+        json.dump({'merged': merged, 'replaced': old}, f)
+
+    reopened = HistoryStore(str(tmp_path), compact_files=0)
+    assert _data_files(directory) == [os.path.join(directory, merged)]
+    assert len(reopened.read()) == 9
+
+def test_an_unfinished_merge_is_rolled_back_on_open(tmp_path):
+    store = HistoryStore(str(tmp_path), compact_files=0)
+    store.write(rows(0))
+    store.write(rows(3))
+    directory = partition(str(tmp_path))
+    # Crash before the merged file was renamed into place
+    with open(os.path.join(directory, '_part-merged.parquet'), 'wb') as f:
+        f.write(b'partial')
+    with open(os.path.join(directory, COMPACTION_MARKER), 'w') as f:
+        json.dump({'merged': 'part-merged.parquet', 'replaced': []}, f)
+
+    reopened = HistoryStore(str(tmp_path), compact_files=0)
+    assert sorted(os.listdir(directory)) == [os.path.basename(path) for path in _data_files(directory)]
+    assert len(reopened.read()) == 6
+
+def test_compact_frames_keep_their_timestamps_and_metrics(tmp_path):
+    df = rows(0, n=2)
+    df['created_at'] = ['2025-07-01T12:00:00Z', '2025-07-01T23:30:00+02:00']
+    df['collection_timestamp_utc'] = pd.Timestamp('2025-07-02 08:00:00')
+    df['source_specific_metrics'] = [{'score': 5, 'subreddit': 'news'}, {'score': 7}]
+    store = HistoryStore(str(tmp_path / 'original'))
+    store.write(df)
+    compact_store = HistoryStore(str(tmp_path / 'compact'))
+    compact_store.write(compact_frame(df))
+
+    columns = ['id', 'created_at', 'collection_timestamp_utc', 'source_specific_metrics']
+    expected = store.read(columns=columns).sort_values('id').reset_index(drop=True)
+    stored = compact_store.read(columns=columns).sort_values('id').reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, expected)
+    assert list(stored['created_at'].astype(str)) == ['2025-07-01 12:00:00+00:00', '2025-07-01 21:30:00+00:00']
+    assert [json.loads(value) for value in stored['source_specific_metrics']] == [
+        {'score': 5, 'subreddit': 'news'}, {'score': 7}
+    ]
@@ -0,0 +1,78 @@
+import numpy as np
+
+from processor.near_duplicates import NearDuplicateIndex
+from processor.sentiment_analyzer import SentimentProcessor
+
+BEAUTIFUL = "The stadium in Doha was beautiful and the people were very friendly to every visitor we met"
+AWFUL = "The stadium in Doha was awful and the people were very friendly to every visitor we met"
+
+def test_reposts_and_cross_posts_share_a_cluster_and_one_score():
+    index = NearDuplicateIndex()
+    processor = SentimentProcessor(analyzers=['vader'], near_duplicates=index)
+    repost = "The  stadium in Doha was beautiful and the people were very friendly to every visitor we met\n"
+    scores, clusters = processor.score_clustered([BEAUTIFUL, repost])
+    assert clusters[0] == clusters[1]
+    assert scores['vader_compound'][0] == scores['vader_compound'][1]
+
+    # A cross-post in a later batch reuses the stored scores instead of scoring again
+    processor.score_batch = None
+    scores, clusters = processor.score_clustered([BEAUTIFUL])
+    assert index.stats()['shared_scores'] == 1
+
+def test_a_one_word_polarity_flip_is_scored_on_its_own():
+    processor = SentimentProcessor(analyzers=['vader'], near_duplicates=NearDuplicateIndex())
+    scores, clusters = processor.score_clustered([BEAUTIFUL, AWFUL])
+    expected = processor.score_batch([BEAUTIFUL, AWFUL])
+    assert scores['vader_compound'][0] > 0.05
+    assert scores['vader_compound'][1] != scores['vader_compound'][0]
+    np.testing.assert_array_equal(scores['vader_compound'], expected['vader_compound'])
+
+def test_score_clustered_matches_score_batch_on_unique_texts():
+    texts = [
+        "Dubai airport was chaotic and the staff were rude",
+        "Loved the food markets in Doha, would go back tomorrow",
+        "Qatar weather today",
+        "Nothing much happening in Abu Dhabi this week honestly",
+    ]
+    processor = SentimentProcessor(analyzers=['textblob', 'vader'], near_duplicates=NearDuplicateIndex())
+    scores, clusters = processor.score_clustered(texts)
+    expected = processor.score_batch(texts)
+    assert len(set(clusters)) == len(texts)
+    for column in processor.score_columns:
+        np.testing.assert_array_equal(scores[column], expected[column])
+
+def test_clusters_join_on_the_first_text_and_do_not_chain():
+    words = [f"word{i}" for i in range(40)]
+    index = NearDuplicateIndex()
+    original = ' '.join(words)
+    # Each edit changes one more word of the original, so neighbours stay close while the chain drifts away
+    edits = [' '.join(words[:40 - i] + [f"other{j}" for j in range(i)]) for i in range(1, 20)]
+    clusters = index.assign([original] + edits)
+    assert clusters[1] == clusters[0]
+    assert clusters[-1] != clusters[0]
+    assert index.assign(["completely different words that share nothing with the rest"])[0] not in clusters
+
+def test_short_texts_only_match_the_same_words():
+    index = NearDuplicateIndex()
+    clusters = index.assign(["the hotel was hot", "the hotel was hot terrible", "the hotel was hot"])
+    assert clusters[0] == clusters[2] != clusters[1]
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'near_duplicates.npz')
+    index = NearDuplicateIndex(path)
+    processor = SentimentProcessor(analyzers=['vader'], near_duplicates=index)
+    _, clusters = processor.score_clustered([BEAUTIFUL, AWFUL])
+    index.save()
+
+    loaded = NearDuplicateIndex(path)
+    assert loaded.assign([BEAUTIFUL, AWFUL]) == clusters
+    [shared] = loaded.get_scores([BEAUTIFUL], processor.version_tag)
+    assert shared == index.get_scores([BEAUTIFUL], processor.version_tag)[0]
+
+def test_a_new_analyzer_version_invalidates_shared_scores():
+    index = NearDuplicateIndex()
+    index.put_scores([BEAUTIFUL], [{'vader_compound': 0.8}], 'r1+vader-3.3.2')
+    assert index.get_scores([BEAUTIFUL], 'r1+vader-3.3.2') == [{'vader_compound': 0.8}]
+    assert index.get_scores([BEAUTIFUL], 'r2+vader-3.3.2') == [None]
+    index.put_scores([AWFUL], [{'vader_compound': -0.4}], 'r2+vader-3.3.2')
+    assert index.get_scores([BEAUTIFUL, AWFUL], 'r2+vader-3.3.2') == [None, {'vader_compound': -0.4}]
@@ -0,0 +1,66 @@
+import itertools
+import threading
+
+from collectors.orchestrator import CollectionJob, iter_job_records, run_jobs
+
+def test_records_reach_the_consumer_while_the_job_is_still_running():
+    consumed = threading.Event()
+
+    def fetch():
+        for i in range(250):
+            yield {'i': i}
+        # Only finishes once the consumer has had records from it
+        if not consumed.wait(5):
+            raise RuntimeError("no records were handed on before the job finished")
+        yield {'i': 'last'}
+
+    records = iter_job_records([CollectionJob('Reddit', 'UAE', fetch)])
+    first = next(records)
+    consumed.set()
+    rest = list(records)
+    assert first == {'i': 0}
+    assert len(rest) == 250
+
+def test_collection_waits_for_a_slow_consumer():
+    produced = itertools.count()
+    counts = {'produced': 0}
+
+    def fetch():
+        for i in range(2000):
+            counts['produced'] = next(produced) + 1
+            yield {'i': i}
+
+    consumed = 0
+    most_ahead = 0
+    for kind, payload in run_jobs([CollectionJob('Bluesky', 'UAE', fetch)], chunk_size=10, max_queued=2):
+        if kind == 'records':
+            consumed += len(payload)
+            most_ahead = max(most_ahead, counts['produced'] - consumed)
+    assert consumed == 2000
+    # Two queued chunks, one being filled and one waiting to be queued
+    assert most_ahead <= 10 * 4
+
+def test_a_failing_job_keeps_its_records_and_reports_the_error():
+    def fetch():
+        yield {'i': 0}
+        yield {'i': 1}
+        raise ValueError("page 2 failed")
+
+    records = []
+    results = []
+    for kind, payload in run_jobs([CollectionJob('YouTube', 'UAE', fetch)], chunk_size=10):
+        (records.extend if kind == 'records' else results.append)(payload)
+    assert len(records) == 2
+    [result] = results
+    assert not result.ok and isinstance(result.error, ValueError)
+    assert result.record_count == 2
+
+def test_closing_early_stops_the_jobs():
+    def fetch():
+        for i in itertools.count():
+            yield {'i': i}
+
+    records = iter_job_records([CollectionJob('Reddit', 'UAE', fetch)])
+    assert next(records) == {'i': 0}
+    # Returns only once the job thread has stopped
+    records.close()
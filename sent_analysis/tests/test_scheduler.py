@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+REAL_TIME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'realTime')
+
+@pytest.mark.parametrize('interval', [0, -60, float('nan')])
+def test_intervals_must_be_positive(monkeypatch, interval):
+    monkeypatch.syspath_prepend(REAL_TIME_DIR)
+    from scheduler import IntervalScheduler
+    with pytest.raises(ValueError, match='Reddit'):
+        IntervalScheduler({'Reddit': interval, 'YouTube': 3600}, lambda due: None)
@@ -0,0 +1,36 @@
+import time
+
+from processor.score_cache import ScoreCache
+
+def test_hits_misses_and_a_new_version(tmp_path):
+    cache = ScoreCache(str(tmp_path / 'scores.db'))
+    cache.put_many(['good day', 'bad day'], [{'vader_compound': 0.4}, {'vader_compound': -0.5}], 'v1')
+    assert cache.get_many(['good day', 'unknown', 'bad day'], 'v1') == [
+        {'vader_compound': 0.4}, None, {'vader_compound': -0.5}
+    ]
+    assert cache.get('good day', 'v2') is None
+    assert (cache.hits, cache.misses) == (2, 2)
+    cache.close()
+
+    # A new process starts with an empty memory LRU and reads the rows back from disk
+    reopened = ScoreCache(str(tmp_path / 'scores.db'))
+    assert reopened.get('bad day', 'v1') == {'vader_compound': -0.5}
+    assert reopened.stats()['entries'] == 2
+
+def test_memory_hits_keep_entries_from_being_evicted(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(time, 'time', lambda: next(clock))
+    cache = ScoreCache(str(tmp_path / 'scores.db'), max_entries=5)
+    cache.put_many(['hot', 'cold'], [{'s': 1.0}, {'s': 2.0}], 'v1')
+    cache.put_many(['a', 'b', 'c'], [{'s': 3.0}, {'s': 4.0}, {'s': 5.0}], 'v1')
+    for _ in range(3):
+        # Served from the in-memory LRU, never re-read from SQLite
+        assert cache.get('hot', 'v1') == {'s': 1.0}
+    # Over max_entries: evicts down to 4 rows, dropping the two least recently used
+    cache.put('d', {'s': 6.0}, 'v1')
+    assert cache.stats()['entries'] == 4
+    cache.close()
+
+    reopened = ScoreCache(str(tmp_path / 'scores.db'), max_entries=5)
+    assert reopened.get('hot', 'v1') == {'s': 1.0}
+    assert reopened.get('cold', 'v1') is None
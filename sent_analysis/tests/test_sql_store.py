@@ -0,0 +1,52 @@
+import sqlite3
+
+import pandas as pd
+
+from storage.sql_store import SqlResultStore
+
+def scored_rows():
+    return pd.DataFrame({
+        'source': ['Reddit', 'YouTube'],
+        'id': ['r1', 'y1'],
+        'query': ['UAE', 'Qatar'],
+        'author': ['someone', 'someone else'],
+        'text': ['great trip to dubai', 'doha was too hot'],
+        'created_at': ['2025-07-01T12:00:00Z', '2025-07-02T08:30:00Z'],
+        'source_specific_metrics': [
+            {'score': 12, 'upvote_ratio': 0.93, 'num_comments': 0, 'subreddit': 'travel'},
+            {'video_id': 'abc123', 'like_count': 3_000_000_000},
+        ],
+        'vader_compound': [0.62, -0.3],
+        'sentiment_category': ['Positive', 'Negative'],
+        'cluster_id': ['00000000000000aa', None],
+    })
+
+def test_metrics_and_cluster_ids_round_trip(tmp_path):
+    store = SqlResultStore(f"sqlite:///{tmp_path / 'results.db'}")
+    store.write(scored_rows())
+    df = store.read(with_metrics=True).set_index('id')
+
+    reddit = df.loc['r1', 'source_specific_metrics']
+    assert reddit == {'score': 12, 'upvote_ratio': 0.93, 'num_comments': 0, 'subreddit': 'travel'}
+    assert type(reddit['score']) is int and type(reddit['upvote_ratio']) is float
+    assert df.loc['y1', 'source_specific_metrics'] == {'video_id': 'abc123', 'like_count': 3_000_000_000}
+    assert df.loc['r1', 'cluster_id'] == '00000000000000aa'
+    assert df.loc['y1', 'cluster_id'] is None
+
+def test_databases_from_before_the_new_columns_are_upgraded(tmp_path):
+    path = tmp_path / 'results.db'
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE items (source VARCHAR(32), id VARCHAR(255), query VARCHAR(255) NOT NULL, author VARCHAR(255),
+                            text TEXT NOT NULL, created_at DATETIME NOT NULL, collected_at DATETIME,
+                            PRIMARY KEY (source, id));
+        CREATE TABLE metrics (source VARCHAR(32), id VARCHAR(255), name VARCHAR(64), value_num FLOAT,
+                              value_text TEXT, PRIMARY KEY (source, id, name));
+    """)
+    conn.close()
+
+    store = SqlResultStore(f"sqlite:///{path}")
+    store.write(scored_rows())
+    df = store.read(with_metrics=True).set_index('id')
+    assert df.loc['r1', 'source_specific_metrics']['score'] == 12
+    assert df.loc['r1', 'cluster_id'] == '00000000000000aa'
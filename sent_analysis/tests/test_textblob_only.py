@@ -0,0 +1,49 @@
+import glob
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import main
+from collectors.orchestrator import CollectionJob
+from processor.charts import ChartRenderer
+from processor.sentiment_analyzer import SentimentProcessor
+
+RECORDS = [
+    {
+        'source': 'Reddit', 'id': f"r{i}", 'text': text, 'author': 'someone',
+        'created_at': datetime(2025, 7, 1, 12, tzinfo=timezone.utc),
+        'source_specific_metrics': {'score': 1}, 'query': 'UAE',
+    }
+    for i, text in enumerate(['Dubai is wonderful', 'The heat was awful', 'Flights are on Tuesday'])
+]
+
+def textblob_processor():
+    return SentimentProcessor(analyzers=['textblob'], renderer=ChartRenderer(mode='headless'))
+
+def test_batch_run_saves_results_without_vader(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, 'build_collection_jobs', lambda queries, response_cache=None: [
+        CollectionJob('Reddit', 'UAE', lambda: iter(RECORDS))
+    ])
+
+    main.run_batch(textblob_processor(), ['UAE'])
+
+    saved = glob.glob(str(tmp_path / '*_combined_sentiment.csv'))
+    assert len(saved) == 1
+    df = pd.read_csv(saved[0])
+    assert len(df) == len(RECORDS)
+    assert 'textblob_polarity' in df.columns
+    assert 'vader_compound' not in df.columns
+    # No report, so no summary or charts either
+    assert not glob.glob(str(tmp_path / '*_sentiment_summary.csv'))
+    assert not glob.glob(str(tmp_path / '*.png'))
+
+def test_reports_are_skipped_without_vader(capsys):
+    processor = textblob_processor()
+    df = processor.process_data(RECORDS)
+
+    assert processor.analyze_and_chart(df) is None
+    processor.analyze_and_visualize(df)
+    processor.create_detailed_trend_chart(df)
+
+    assert 'No VADER scores' in capsys.readouterr().out
@@ -0,0 +1,174 @@
+import os
+from datetime import datetime, timezone
+from functools import partial
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from collectors.bluesky_collector import BlueskyCollector
+from collectors.orchestrator import CollectionIncomplete, CollectionJob
+from collectors.rate_limit import RateLimiter
+from collectors.reddit_collector import RedditCollector
+from collectors.youtube_collector import QuotaTracker, YouTubeCollector
+from storage.watermarks import WatermarkStore
+
+REAL_TIME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'realTime')
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+def _post(post_id, created_utc):
+    return SimpleNamespace(
+        id=post_id, title=f"Post {post_id} about the weather", selftext='', author=None,
+        created_utc=created_utc, score=1, upvote_ratio=1.0, num_comments=0,
+        subreddit=SimpleNamespace(display_name='news'),
+    )
+
+class FakeSubreddit:
+    """A multireddit whose search lists the given posts newest first, optionally failing partway"""
+
+    def __init__(self, posts, fail_after=None):
+        self.posts = sorted(posts, key=lambda post: post.created_utc, reverse=True)
+        self.fail_after = fail_after
+
+    def search(self, query, limit, **options):
+        for i, post in enumerate(self.posts[:limit]):
+            if i == self.fail_after:
+                raise ConnectionError("connection reset")
+            yield post
+
+def _reddit(watermarks, posts, fail_after=None):
+    collector = RedditCollector('id', 'secret', 'test', watermarks=watermarks, limiter=RateLimiter('Reddit', 1000, 1000))
+    subreddit = FakeSubreddit(posts, fail_after)
+    collector.reddit = SimpleNamespace(subreddit=lambda name: subreddit)
+    return collector
+
+def test_reddit_watermark_holds_when_the_limit_stops_short_of_it(tmp_path):
+    watermarks = WatermarkStore(str(tmp_path / 'watermarks.db'))
+    list(_reddit(watermarks, [_post('old', 100)]).iter_search('UAE', limit=2))
+    watermarks.commit()
+    assert watermarks.since('Reddit', 'UAE') == 100
+
+    # Three new posts but room for two: the oldest new one would be skipped if the watermark moved to 400
+    posts = [_post('old', 100), _post('a', 200), _post('b', 300), _post('c', 400)]
+    list(_reddit(watermarks, posts).iter_search('UAE', limit=2))
+    watermarks.commit()
+    assert watermarks.since('Reddit', 'UAE') == 100
+
+    # With room for all of them the listing reaches the watermark and it moves on
+    records = list(_reddit(watermarks, posts).iter_search('UAE', limit=10))
+    watermarks.commit()
+    assert [record['id'] for record in records] == ['c', 'b', 'a']
+    assert watermarks.since('Reddit', 'UAE') == 400
+
+def test_reddit_error_mid_listing_yields_the_posts_then_raises(tmp_path):
+    watermarks = WatermarkStore(str(tmp_path / 'watermarks.db'))
+    posts = [_post('a', 200), _post('b', 300), _post('c', 400)]
+    records = []
+    with pytest.raises(CollectionIncomplete):
+        for record in _reddit(watermarks, posts, fail_after=2).iter_search('UAE', limit=10):
+            records.append(record)
+    assert [record['id'] for record in records] == ['c', 'b']
+
+def _bluesky_post(uri, epoch):
+    return SimpleNamespace(
+        uri=uri, indexed_at=_iso(epoch), record=SimpleNamespace(text=f"Post {uri} about the weather"),
+        author=SimpleNamespace(handle='someone'), reply_count=0, repost_count=0, like_count=0,
+    )
+
+def test_bluesky_watermark_holds_when_the_limit_stops_short_of_it(tmp_path):
+    watermarks = WatermarkStore(str(tmp_path / 'watermarks.db'))
+    watermarks.observe('Bluesky', 'UAE', 100, 'old')
+    watermarks.commit()
+
+    posts = [_bluesky_post(f"at://{epoch}", epoch) for epoch in (400, 300, 200, 100)]
+    collector = BlueskyCollector('handle', 'password', watermarks=watermarks, limiter=RateLimiter('Bluesky', 1000, 1000))
+    collector._logged_in = True
+
+    def search_posts(params):
+        start = int(params.get('cursor') or 0)
+        page = posts[start:start + params['limit']]
+        return SimpleNamespace(posts=page, cursor=str(start + len(page)) if start + len(page) < len(posts) else None)
+
+    collector._search_posts = search_posts
+    assert len(list(collector.iter_search('UAE', limit=2))) == 2
+    watermarks.commit()
+    assert watermarks.since('Bluesky', 'UAE') == 100
+
+    assert len(list(collector.iter_search('UAE', limit=10))) == 3
+    watermarks.commit()
+    assert watermarks.since('Bluesky', 'UAE') == 400
+
+class FakeYouTube:
+    """Just enough of the YouTube Data API client for search.list and commentThreads.list"""
+
+    def __init__(self, comments):
+        # video id -> [(comment id, epoch seconds)]
+        self.comments = comments
+
+    def search(self):
+        return SimpleNamespace(list=lambda **params: SimpleNamespace(
+            execute=lambda: {'items': [{'id': {'videoId': video_id}} for video_id in self.comments]}
+        ))
+
+    def commentThreads(self):
+        return SimpleNamespace(list=self._comment_threads)
+
+    def _comment_threads(self, videoId, maxResults, pageToken=None, **params):
+        threads = sorted(self.comments[videoId], key=lambda comment: comment[1], reverse=True)
+        start = int(pageToken or 0)
+        page = threads[start:start + maxResults]
+        response = {'items': [
+            {'id': comment_id, 'snippet': {'topLevelComment': {'snippet': {
+                'textDisplay': f"Comment {comment_id} about the weather",
+                'authorDisplayName': 'someone',
+                'publishedAt': _iso(epoch),
+                'likeCount': 0,
+            }}}}
+            for comment_id, epoch in page
+        ]}
+        if start + len(page) < len(threads):
+            response['nextPageToken'] = str(start + len(page))
+        return SimpleNamespace(execute=lambda: response)
+
+@pytest.fixture
+def runtime(tmp_path, monkeypatch):
+    for name in ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET', 'BLUESKY_HANDLE', 'BLUESKY_PASSWORD', 'YOUTUBE_API_KEY'):
+        monkeypatch.setenv(name, '')
+    monkeypatch.setenv('SENTIMENT_ANALYZERS', 'textblob')
+    monkeypatch.setenv('SENTIMENT_CACHE_PATH', '')
+    monkeypatch.setenv('HISTORY_BACKEND', 'csv')
+    monkeypatch.setenv('DEDUP_INDEX_PATH', str(tmp_path / 'dedup.db'))
+    monkeypatch.setenv('WATERMARK_PATH', str(tmp_path / 'watermarks.db'))
+    monkeypatch.setenv('ROLLUP_PATH', '')
+    monkeypatch.setenv('NEAR_DUP_MAX_ITEMS', '0')
+    monkeypatch.setenv('METRICS_JSON_PATH', str(tmp_path / 'metrics.json'))
+    monkeypatch.syspath_prepend(REAL_TIME_DIR)
+    # realTime/ carries identical copies of collectors/, processor/ and storage/; the ones already imported are used
+    import real_time_collector
+    monkeypatch.setattr(real_time_collector, 'OUTPUT_CSV_PATH', str(tmp_path / 'sentiment_data.csv'))
+    return real_time_collector.CollectionRuntime()
+
+def test_youtube_quota_stop_keeps_the_skipped_videos_comments_for_the_next_cycle(runtime, tmp_path):
+    service = FakeYouTube({'A': [('a1', 100)], 'B': [('b1', 90)]})
+    quota = QuotaTracker(daily_budget=10_000)
+    youtube = YouTubeCollector('key', quota=quota, max_workers=1, dedup_index=runtime.dedup_index,
+                               watermarks=runtime.watermarks, limiter=RateLimiter('YouTube', 1000, 1000))
+    youtube._youtube = lambda: service
+    runtime.jobs = [CollectionJob('YouTube', 'UAE', partial(youtube.iter_search, query='UAE', max_comments_per_video=50))]
+    assert runtime.run_cycle() == 2
+
+    # Enough quota for the search and video A's comments only; B's new comment is older than A's
+    service.comments['A'].append(('a2', 300))
+    service.comments['B'].append(('b2', 200))
+    quota.used = quota.daily_budget - 101
+    assert runtime.run_cycle() == 1
+    assert runtime.watermarks.since('YouTube', 'UAE|A') == 100
+
+    quota.used = 0
+    assert runtime.run_cycle() == 1
+    saved = pd.read_csv(str(tmp_path / 'sentiment_data.csv'))
+    assert sorted(saved['id']) == ['a1', 'a2', 'b1', 'b2']
+    assert runtime.watermarks.since('YouTube', 'UAE|A') == 300
+    assert runtime.watermarks.since('YouTube', 'UAE|B') == 200